@@ -0,0 +1,153 @@
+"""Benchmark of the player backends against a running MPRIS player.
+
+Measures the latency of the operations exposed by Player on every backend that
+can be imported: Player_pydbus, Player_dbus_python and the asyncio based
+Player_dbus_next. For Player_dbus_next, the same number of calls is also issued
+concurrently from one event loop.
+
+Seek(0) is used for the seek measurements, it does not move the playback
+position.
+
+The synchronous backends are then compared side by side, per operation by median
+latency, together with the Get(Position) + Get(PlaybackStatus) round trip that
+BackendSelector measures to choose a backend when PlayerFactory.backend is
+"fastest".
+
+With --mock, the benchmark runs headlessly against a fake player, on a private
+session bus, that answers every call after --latency seconds.
+
+Usage: python -m benchmarks.bench_backends PLAYER [--iterations N]
+           [--mock [--latency SECONDS]]
+e.g.   python -m benchmarks.bench_backends vlc
+       python -m benchmarks.bench_backends mock --mock --latency 0.002
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from chapters.mpris_player import BackendSelector
+
+# For Player_dbus_next, the operations return awaitables
+OPERATIONS: Dict[str, Callable] = {
+    "Get(PlaybackStatus)": lambda p: p.playback_status,
+    "Get(Position)": lambda p: p.position,
+    "Get(Metadata)": lambda p: p.metadata,
+    "GetAll": lambda p: p.get_all(),
+    "Seek(0)": lambda p: p.seek(0),
+}
+
+
+def _summary(samples: List[float]) -> str:
+    samples_ms = [s * 1000 for s in samples]
+    return (
+        f"mean {statistics.mean(samples_ms):8.3f} ms"
+        f"  median {statistics.median(samples_ms):8.3f} ms"
+        f"  max {max(samples_ms):8.3f} ms"
+    )
+
+
+def bench_sync_backend(backend_name, backend, fq_name, short_name, iterations):
+    """returns: the median latency, in seconds, of each operation"""
+    player = backend(fq_name, short_name)
+    medians = {}
+    print(f"\n{backend_name}")
+    for operation_name, operation in OPERATIONS.items():
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            operation(player)
+            samples.append(time.perf_counter() - start)
+        medians[operation_name] = statistics.median(samples)
+        print(f"  {operation_name:<22} {_summary(samples)}")
+    selector = BackendSelector(samples=iterations)
+    medians["selection round trip"] = selector.measure(backend, fq_name, short_name)
+    return medians
+
+
+def compare_sync_backends(medians: Dict[str, Dict[str, float]]) -> None:
+    if len(medians) < 2:
+        return
+    (first, first_medians), (second, second_medians) = list(medians.items())[:2]
+    print(f"\nMedian latency, {first} vs {second}")
+    print(f"  {'operation':<22} {first:>12} {second:>12} {'ratio':>7}  faster")
+    for operation_name, first_median in first_medians.items():
+        second_median = second_medians[operation_name]
+        faster = first if first_median <= second_median else second
+        print(
+            f"  {operation_name:<22} {first_median * 1000:9.3f} ms"
+            f" {second_median * 1000:9.3f} ms"
+            f" {second_median / first_median:7.2f}  {faster}"
+        )
+
+
+async def bench_async_backend(fq_name, short_name, iterations):
+    from chapters.mpris_player import PlayerFactory
+
+    player = await PlayerFactory.get_async_player(fq_name, short_name)
+    print("\ndbus-next (asyncio)")
+    for operation_name, operation in OPERATIONS.items():
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await operation(player)
+            samples.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        await asyncio.gather(*(operation(player) for _ in range(iterations)))
+        concurrent_total = time.perf_counter() - start
+        print(
+            f"  {operation_name:<22} {_summary(samples)}"
+            f"  ({iterations} concurrent: {concurrent_total * 1000:8.3f} ms total)"
+        )
+
+
+def run(short_name: str, iterations: int) -> None:
+    fq_name = f"org.mpris.MediaPlayer2.{short_name}"
+    print(f"Player: {fq_name}, {iterations} iterations per operation")
+    backends = BackendSelector.available_backends()
+    for backend_name in ("pydbus", "dbus-python"):
+        if backend_name not in backends:
+            print(f"{backend_name} is not available")
+    medians = {
+        backend_name: bench_sync_backend(
+            backend_name, backend, fq_name, short_name, iterations
+        )
+        for backend_name, backend in backends.items()
+    }
+    compare_sync_backends(medians)
+    try:
+        import dbus_next  # noqa: F401
+    except ImportError:
+        print("\ndbus-next is not available")
+        return
+    asyncio.run(bench_async_backend(fq_name, short_name, iterations))
+
+
+def run_with_mock_player(short_name: str, iterations: int, latency: float) -> None:
+    from chapters.mpris_player.testing import MockMprisSession
+
+    with MockMprisSession() as session:
+        session.add_player(short_name, latency=latency)
+        print(f"Mock player latency: {latency * 1000:.1f} ms")
+        run(short_name, iterations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("player", help="the unqualified player name, e.g. vlc")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument(
+        "--mock", action="store_true", help="benchmark a fake player instead"
+    )
+    parser.add_argument("--latency", type=float, default=0.0)
+    arguments = parser.parse_args()
+    if arguments.mock:
+        run_with_mock_player(arguments.player, arguments.iterations, arguments.latency)
+    else:
+        run(arguments.player, arguments.iterations)
+
+
+if __name__ == "__main__":
+    main()
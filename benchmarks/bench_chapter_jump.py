@@ -0,0 +1,127 @@
+"""Microbenchmark of chapter jump latency, i.e. of Player.set_position.
+
+Player.set_position is run against an in-process stand-in for the D-Bus proxy
+that adds a fixed latency to every call and counts the round trips. Players
+with a valid trackid (SetPosition) and with an invalid trackid (Seek fallback)
+are measured, uncached and with the trackid and position served locally, as
+they are for cached players.
+
+Usage: python -m benchmarks.bench_chapter_jump [--latency SECONDS] [--jumps N]
+"""
+
+import argparse
+import time
+from typing import Any, Dict
+
+from chapters.mpris_player.player import Player
+
+
+class LatencyProxy:
+    """Stands in for the MPRIS proxy, every call costs one round trip"""
+
+    def __init__(self, latency: float, trackid: str) -> None:
+        self.latency = latency
+        self.round_trips = 0
+        self.properties = {
+            "PlaybackStatus": "Playing",
+            "Position": 0,
+            "Metadata": {"mpris:trackid": trackid},
+        }
+
+    def _round_trip(self) -> None:
+        self.round_trips += 1
+        time.sleep(self.latency)
+
+    def Get(self, interface_name: str, property_name: str, timeout=None) -> Any:
+        self._round_trip()
+        return self.properties[property_name]
+
+    def SetPosition(self, trackid: str, position: int, timeout=None) -> None:
+        self._round_trip()
+        self.properties["Position"] = position
+
+    def Seek(self, offset: int, timeout=None) -> None:
+        self._round_trip()
+        self.properties["Position"] += offset
+
+
+class BenchPlayer(Player):
+    def __init__(self, ext_player_name: str, proxy: LatencyProxy, cached: bool):
+        self._proxy = proxy
+        super().__init__(f"org.mpris.MediaPlayer2.{ext_player_name}", ext_player_name)
+        self._local = cached
+
+    def get(self, property_name: str, interface_name=None) -> Any:
+        if self._local:
+            return self._proxy.properties[property_name]
+        return self._proxy.Get("org.mpris.MediaPlayer2.Player", property_name)
+
+    def get_all(self, interface_name=None) -> Dict[str, Any]:
+        if self._local:
+            return dict(self._proxy.properties)
+        self._proxy._round_trip()
+        return dict(self._proxy.properties)
+
+    def seek(self, offset: int) -> None:
+        self._proxy.Seek(offset)
+
+    raise_window = play = play_pause = pause = next = previous = stop = None
+
+    mpris_player = property(lambda self: self._proxy)
+    mpris_media_player2 = mpris_player_properties = mpris_player
+    name = property(lambda self: self._name)
+    ext_name = property(lambda self: self._ext_name)
+    playback_status = property(lambda self: self.get("PlaybackStatus"))
+    position = property(lambda self: self.get("Position"))
+    metadata = property(lambda self: self.get("Metadata"))
+    trackid = property(lambda self: self.metadata["mpris:trackid"])
+    can_control = can_seek = can_pause = can_play = True
+
+
+def bench(trackid: str, cached: bool, latency: float, jumps: int) -> Dict:
+    player = BenchPlayer("bench", LatencyProxy(latency, trackid), cached)
+    start = time.perf_counter()
+    player.set_position(60000000)
+    first = time.perf_counter() - start
+    first_round_trips = player.mpris_player.round_trips
+    start = time.perf_counter()
+    for i in range(jumps):
+        player.set_position(i * 1000000)
+    later = (time.perf_counter() - start) / jumps
+    later_round_trips = (player.mpris_player.round_trips - first_round_trips) / jumps
+    return {
+        "first_ms": first * 1000,
+        "first_round_trips": first_round_trips,
+        "later_ms": later * 1000,
+        "later_round_trips": later_round_trips,
+    }
+
+
+def run(latency: float, jumps: int) -> None:
+    print(f"Simulated D-Bus latency per call: {latency * 1000:.1f} ms")
+    print(f"{'case':<40} {'first jump':>18} {'later jumps (mean)':>24}")
+    cases = (
+        ("valid trackid", "/org/mpris/MediaPlayer2/Track/1"),
+        ("invalid trackid (Seek fallback)", "not an object path"),
+    )
+    for case_name, trackid in cases:
+        for cached in (False, True):
+            result = bench(trackid, cached, latency, jumps)
+            label = f"{case_name}{', cached' if cached else ''}"
+            print(
+                f"{label:<40}"
+                f" {result['first_ms']:7.2f} ms ({result['first_round_trips']} rt)"
+                f" {result['later_ms']:11.2f} ms ({result['later_round_trips']:.0f} rt)"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--jumps", type=int, default=50)
+    arguments = parser.parse_args()
+    run(arguments.latency, arguments.jumps)
+
+
+if __name__ == "__main__":
+    main()
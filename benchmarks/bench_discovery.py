@@ -0,0 +1,76 @@
+"""Benchmark of PlayerFactory.get_running_player_names.
+
+Measures the wall clock time of player discovery as the number of running
+players grows. Player validation is simulated with a fixed per player latency,
+so that the benchmark does not depend on the media players installed on the
+host. A sequential validation loop (the previous implementation) is measured
+for comparison.
+
+Usage: python -m benchmarks.bench_discovery [--latency SECONDS] [--hung]
+"""
+
+import argparse
+import time
+from unittest import mock
+
+from chapters.mpris_player import PlayerFactory
+
+
+def _service_names(n_players: int):
+    return [f"org.mpris.MediaPlayer2.player{i}" for i in range(n_players)]
+
+
+def _discover_sequentially():
+    for service in PlayerFactory.get_mpris_service_names():
+        PlayerFactory._probe_player(service, service.split(".")[-1])
+
+
+def _time(func, repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(latency: float, hung: bool) -> None:
+    def probe(fq_player_name, short_player_name, owner=None):
+        if hung and short_player_name == "player0":
+            time.sleep(PlayerFactory.discovery_timeout * 2)
+        time.sleep(latency)
+
+    print(f"Simulated validation latency per player: {latency * 1000:.0f} ms")
+    if hung:
+        print(
+            "player0 is hung, discovery timeout:"
+            f" {PlayerFactory.discovery_timeout:.1f} s"
+        )
+    print(f"{'players':>8} {'concurrent (s)':>15} {'sequential (s)':>15}")
+    for n_players in (1, 2, 4, 8, 16):
+        with mock.patch.object(
+            PlayerFactory,
+            "get_mpris_service_names",
+            return_value=_service_names(n_players),
+        ), mock.patch.object(
+            PlayerFactory, "get_name_owner", side_effect=lambda name: name
+        ), mock.patch.object(
+            PlayerFactory, "_probe_player", side_effect=probe
+        ):
+            concurrent = _time(PlayerFactory.get_running_player_names)
+            sequential = None if hung else _time(_discover_sequentially, repeat=1)
+        sequential_s = f"{'-':>15}" if sequential is None else f"{sequential:15.3f}"
+        print(f"{n_players:>8} {concurrent:15.3f} {sequential_s}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--hung", action="store_true")
+    arguments = parser.parse_args()
+    run(arguments.latency, arguments.hung)
+
+
+if __name__ == "__main__":
+    main()
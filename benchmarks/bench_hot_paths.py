@@ -0,0 +1,159 @@
+"""Microbenchmark of the GuiController and console menu hot paths.
+
+The player is a simulated player (PlayerFactory.backend = "simulated") that
+charges a fixed IPC latency per call. By default the latency is accounted but not
+slept, so the measured time is the application's own cost and the IPC cost is
+reported next to it, both deterministic enough to compare runs in CI. With
+--sleep the latency is slept as well, which gives the end to end time.
+
+GuiController commands are sent through its command dispatcher. "ui" is the time
+the Tk event handler takes, "app" the time until the dispatcher has sent the
+command, minus the slept IPC time. Seek coalescing is disabled, so every command
+reaches the player.
+
+Usage: python -m benchmarks.bench_hot_paths [--latency SECONDS] [--sleep]
+           [--iterations N]
+"""
+
+import argparse
+import json
+import tempfile
+import threading
+import time
+from typing import Callable, Dict
+
+from chapters.mpris_player import PlayerFactory, Player_simulated, constant_latency
+from chapters.ui.console_ui import ChaptersMenuConsoleBuilder
+from chapters.ui.gui_controller import GuiController
+
+CHAPTERS = {f"Chapter {i}": f"00:{i:02d}:00" for i in range(1, 50)}
+
+
+class HeadlessView:
+    """Stands in for AppMainWindow. after(0, ...) runs its function straight
+    away, later calls run on a timer thread."""
+
+    def after(self, ms: int, func: Callable, *args):
+        if ms:
+            timer = threading.Timer(ms / 1000, func, args)
+            timer.daemon = True
+            timer.start()
+        else:
+            func(*args)
+
+    def __getattr__(self, name: str):
+        return lambda *args, **kwargs: None
+
+
+class HeadlessGuiBuilder:
+    def __getattr__(self, name: str):
+        return lambda *args, **kwargs: None
+
+
+def _measure(operation: Callable, wait: Callable, media_player, iterations: int):
+    calls = media_player.calls
+    ipc_time = media_player.ipc_time
+    ui_time = 0.0
+    start = time.perf_counter()
+    for i in range(iterations):
+        operation_start = time.perf_counter()
+        operation(i)
+        ui_time += time.perf_counter() - operation_start
+        wait()
+    total = time.perf_counter() - start
+    return {
+        "ui_us": ui_time / iterations * 1_000_000,
+        "total_us": total / iterations * 1_000_000,
+        "ipc_us": (media_player.ipc_time - ipc_time) / iterations * 1_000_000,
+        "calls": (media_player.calls - calls) / iterations,
+    }
+
+
+def _print(name: str, result: Dict, slept: bool) -> None:
+    app_us = result["total_us"] - (result["ipc_us"] if slept else 0.0)
+    print(
+        f"  {name:<28} {result['ui_us']:9.1f} {app_us:9.1f}"
+        f" {result['ipc_us']:11.1f} {result['calls']:7.1f}"
+    )
+
+
+def bench_gui_controller(media_player, iterations: int, slept: bool) -> None:
+    controller = GuiController(HeadlessView(), HeadlessGuiBuilder())
+    controller.wait_for_startup_connection()
+    controller.cur_player.set_seek_coalescing_window(None)
+    dispatcher = controller._command_dispatcher
+    operations = {
+        "set_player_position": lambda i: controller.set_player_position(
+            f"00:{i % 60:02d}:00"
+        ),
+        "skip_player": lambda i: controller.skip_player("00:00:10"),
+        "play_pause_player": lambda i: controller.play_pause_player(),
+    }
+    print("\nGuiController (cached player, command dispatcher)")
+    for name, operation in operations.items():
+        result = _measure(
+            operation, dispatcher.wait_until_idle, media_player, iterations
+        )
+        _print(name, result, slept)
+    controller.handle_exit_application_command()
+
+
+def bench_console_menu(media_player, iterations: int, slept: bool) -> None:
+    with tempfile.NamedTemporaryFile("w", suffix=".ch") as chapters_file:
+        json.dump({"title": "Benchmark", "chapters": CHAPTERS}, chapters_file)
+        chapters_file.flush()
+        player = PlayerFactory.get_player(
+            "org.mpris.MediaPlayer2.simulated", "simulated"
+        )
+        start = time.perf_counter()
+        builder = ChaptersMenuConsoleBuilder(chapters_file.name, player)
+        builder.build_player_control_menu()
+        builder.build_chapters_menu()
+        build_us = (time.perf_counter() - start) * 1_000_000
+    items = builder.chapters_menu_console._console_main_menu.items
+    chapter_items = [item for item in items if item.text.startswith("Chapter")]
+    command_menu = items[0].submenu
+    skip_item = command_menu.items[1]
+    operations = {
+        "chapter item (set_position)": lambda i: chapter_items[
+            i % len(chapter_items)
+        ].action(),
+        "skip forward item (seek)": lambda i: skip_item.action(),
+    }
+    print(f"\nChaptersMenuConsoleBuilder (uncached player), built in {build_us:.0f} us")
+    for name, operation in operations.items():
+        result = _measure(operation, lambda: None, media_player, iterations)
+        _print(name, result, slept)
+
+
+def run(latency: float, sleep: bool, iterations: int) -> None:
+    PlayerFactory.backend = "simulated"
+    media_player = Player_simulated.add_service(
+        "simulated",
+        latency=constant_latency(latency),
+        sleep=time.sleep if sleep else lambda seconds: None,
+    )
+    print(
+        f"Simulated IPC latency per call: {latency * 1000:.2f} ms"
+        f" ({'slept' if sleep else 'accounted, not slept'}),"
+        f" {iterations} iterations"
+    )
+    print(
+        f"  {'operation':<28} {'ui (us)':>9} {'app (us)':>9}"
+        f" {'ipc (us)':>11} {'calls':>7}"
+    )
+    bench_gui_controller(media_player, iterations, sleep)
+    bench_console_menu(media_player, iterations, sleep)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--sleep", action="store_true")
+    parser.add_argument("--iterations", type=int, default=500)
+    arguments = parser.parse_args()
+    run(arguments.latency, arguments.sleep, arguments.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Benchmark of the GUI startup, with and without players running.
+
+The players are simulated players (PlayerFactory.backend = "simulated") that
+answer every call, the introspection at connection included, after --latency
+seconds. Each scenario starts the GUI with 0, 1 and --players players running.
+
+"first paint" is the time until the main window has been built and drawn, "player
+attached" the time until the players have been discovered and, when a single
+player runs, connected to. Before the connection moved to the background, the
+first paint waited for the player to be attached.
+
+Without a display, the GUI is started with a headless view and "first paint" is
+the time GuiController takes to return, which is what delays the first paint.
+
+Usage: python -m benchmarks.bench_startup [--latency SECONDS] [--players N]
+           [--runs N]
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+import tkinter
+
+from benchmarks.bench_hot_paths import HeadlessGuiBuilder, HeadlessView
+from chapters.mpris_player import Player_simulated, PlayerFactory, constant_latency
+from chapters.ui.gui_controller import GuiController
+
+
+def start_gui(chapters_filename: str):
+    """returns: the times, in seconds, to the first paint and until the player is
+    attached"""
+    from chapters.ui.gui_builder import AppGuiBuilder
+
+    start = time.perf_counter()
+    gui_builder = AppGuiBuilder(chapters_filename)
+    window = gui_builder.build()
+    window.update()
+    first_paint = time.perf_counter() - start
+    controller = gui_builder._gui_controller
+    while not controller.wait_for_startup_connection(timeout=0.001):
+        window.update()
+    window.update()
+    attached = time.perf_counter() - start
+    controller.handle_exit_application_command()
+    return first_paint, attached
+
+
+def start_headless(chapters_filename: str):
+    start = time.perf_counter()
+    controller = GuiController(HeadlessView(), HeadlessGuiBuilder())
+    first_paint = time.perf_counter() - start
+    controller.wait_for_startup_connection()
+    attached = time.perf_counter() - start
+    controller.handle_exit_application_command()
+    return first_paint, attached
+
+
+def display_available() -> bool:
+    try:
+        tkinter.Tk().destroy()
+    except tkinter.TclError:
+        return False
+    return True
+
+
+def run(latency: float, players: int, runs: int) -> None:
+    PlayerFactory.backend = "simulated"
+    headless = not display_available()
+    start = start_headless if headless else start_gui
+    print(
+        f"Simulated IPC latency per call: {latency * 1000:.1f} ms, {runs} runs"
+        + (", no display, headless view" if headless else "")
+    )
+    print(
+        f"  {'players running':<16} {'first paint (ms)':>17}"
+        f" {'player attached (ms)':>21}"
+    )
+    with tempfile.NamedTemporaryFile("w", suffix=".ch") as chapters_file:
+        json.dump(
+            {"title": "Benchmark", "chapters": {"Chapter 1": "00:00:00"}},
+            chapters_file,
+        )
+        chapters_file.flush()
+        for player_count in sorted({0, 1, players}):
+            Player_simulated.services.clear()
+            for i in range(player_count):
+                Player_simulated.add_service(
+                    f"simulated{i}", latency=constant_latency(latency)
+                )
+            results = [start(chapters_file.name) for _ in range(runs)]
+            first_paint = statistics.median(r[0] for r in results)
+            attached = statistics.median(r[1] for r in results)
+            print(
+                f"  {player_count:<16} {first_paint * 1000:17.1f}"
+                f" {attached * 1000:21.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--players", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=5)
+    arguments = parser.parse_args()
+    run(arguments.latency, arguments.players, arguments.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,11 +6,14 @@ option.
 import argparse
 from chapters.ui.console_ui import build_console_menu
 from chapters.ui.gui_builder import AppMainWindow, build_gui
+from chapters.mpris_player import PlayerFactory
 from chapters.logger_config import logger
 
 
 def main():
     arguments: argparse.Namespace = get_arguments()
+    if arguments.b:
+        PlayerFactory.backend = arguments.b
     try:
         if arguments.c:
             launch_console(arguments)
@@ -98,6 +101,17 @@ def get_arguments() -> argparse.Namespace:
         default=False,
         help="Launch in console mode (terminal interface).",
     )
+    parser.add_argument(
+        "-b",
+        action="store",
+        required=False,
+        default=None,
+        choices=["pydbus", "dbus-python", "fastest"],
+        help="The D-Bus backend used to control the player. fastest measures "
+        "both backends the first time a player is connected to and remembers the "
+        "faster one for this host. Overrides the CHAPTERS_PLAYER_BACKEND "
+        "environment variable.",
+    )
     arguments = parser.parse_args()
     return arguments
 
@@ -0,0 +1,103 @@
+"""
+An index from the media that players play to the chapters files that belong to
+them
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+from urllib.parse import unquote, urlparse
+from chapters.mpris_player.cache_files import cache_file, load_json, save_json
+
+
+class ChapterIndex:
+    """Maps media, as described by the MPRIS Metadata of the track a player
+    plays, to chapters files.
+
+    A track is identified by a hash of its xesam:url, normalised so that a
+    file:// URL and the path it points to match, and by a hash of its
+    xesam:title, which is only used for tracks without a URL. The index is a
+    dictionary from these hashes to chapters file paths, kept in a JSON file and
+    loaded once, so that a lookup is a couple of dictionary lookups however many
+    mappings there are."""
+
+    def __init__(self, index_path: Path = None) -> None:
+        self.index_path = index_path if index_path else cache_file("chapter_index.json")
+        self._lock = threading.Lock()
+        self._entries: Dict[str, str] = None
+
+    def _load(self) -> Dict[str, str]:
+        if self._entries is None:
+            self._entries = {
+                key: path
+                for key, path in load_json(self.index_path).items()
+                if isinstance(path, str)
+            }
+        return self._entries
+
+    # The Metadata keys the index reads
+    METADATA_KEYS = ("xesam:url", "xesam:title")
+
+    @staticmethod
+    def media_keys(metadata: Dict[str, Any]) -> List[str]:
+        """returns: the keys of the track described by metadata, most specific
+        first"""
+        if not metadata:
+            return []
+        keys = []
+        url = metadata.get("xesam:url")
+        if url:
+            keys.append(_hash(f"url:{_normalise_url(str(url))}"))
+        title = metadata.get("xesam:title")
+        if title and not url:
+            keys.append(_hash(f"title:{str(title).strip()}"))
+        return keys
+
+    def lookup(self, metadata: Dict[str, Any]) -> str | None:
+        """returns: the chapters file of the track described by metadata, None if
+        no existing file is mapped to it"""
+        keys = self.media_keys(metadata)
+        if not keys:
+            return None
+        with self._lock:
+            entries = self._load()
+            paths = [entries.get(key) for key in keys]
+        for path in paths:
+            if path and os.path.isfile(path):
+                return path
+        return None
+
+    def add(self, metadata: Dict[str, Any], chapters_file: str) -> bool:
+        """Maps the track described by metadata to chapters_file.
+        returns: False if metadata has no URL or title to map."""
+        keys = self.media_keys(metadata)
+        if not keys:
+            return False
+        chapters_file = os.path.abspath(chapters_file)
+        with self._lock:
+            entries = self._load()
+            if all(entries.get(key) == chapters_file for key in keys):
+                return True
+            for key in keys:
+                entries[key] = chapters_file
+            save_json(self.index_path, entries)
+        return True
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+
+def _normalise_url(url: str) -> str:
+    url = url.strip()
+    if url.startswith("file://"):
+        url = unquote(urlparse(url).path)
+    if url.startswith("/"):
+        return os.path.normpath(url)
+    return url
+
+
+def _hash(media_key: str) -> str:
+    return hashlib.blake2b(media_key.encode(), digest_size=16).hexdigest()
@@ -94,6 +94,16 @@ keyboard_shortcuts_help: str = """
                 <td>-----&gt;</td>
                 <td>n</td>
             </tr>
+            <tr>
+                <td>Connect to previous player</td>
+                <td>-----&gt;</td>
+                <td>b</td>
+            </tr>
+            <tr>
+                <td>Connect to all players (group)</td>
+                <td>-----&gt;</td>
+                <td>g</td>
+            </tr>
             <tr>
                 <td>Disconnect from player</td>
                 <td>-----&gt;</td>
@@ -103,6 +103,9 @@ def get_valid_filename(name):
 
 
 def is_player_useable(player: Player) -> bool:
+    # The capabilities of known players are served from the capability cache,
+    # which revalidates them in the background and drops the entries the player
+    # contradicts
     if player.can_control and player.can_seek:
         return True
     return False
@@ -1,3 +1,16 @@
 from .player import *
 from .player_factory import *
+from .player_group import *
 from .proxy_player import *
+from .player_registry import *
+from .command_dispatcher import *
+from .seek_coalescer import *
+from .reconnect_policy import *
+from .call_timeouts import *
+from .latency_stats import *
+from .expiring_set import *
+from .player_simulated import *
+from .backend_selection import *
+from .capability_cache import *
+from .seek_calibration import *
+from .player_watchdog import *
@@ -0,0 +1,120 @@
+import socket
+import statistics
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict
+from .call_timeouts import CallTimeouts
+from .cache_files import cache_file, load_json, save_json
+from chapters.logger_config import logger
+
+
+class BackendSelector:
+    """Chooses the faster of the D-Bus player backends (pydbus, dbus-python) on
+    this host.
+
+    The first time a player is connected to, a short Get(Position) and
+    Get(PlaybackStatus) round trip is measured on each installed backend and the
+    backend with the lower median round trip wins. The player is only read from,
+    playback is left alone, and every call is bounded by the player's
+    CallTimeouts. The winner, and the measurements, are kept per
+    host name in a small JSON file, so later runs use it without measuring. Delete
+    the file, or call forget, to measure again."""
+
+    def __init__(self, cache_path: Path = None, samples: int = 5) -> None:
+        self.cache_path = cache_path if cache_path else cache_file("backend.json")
+        self.samples = samples
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def available_backends() -> Dict[str, type]:
+        """returns: the installed D-Bus backends, by backend name"""
+        backends = {}
+        try:
+            from .player_pydbus import Player_pydbus
+
+            backends["pydbus"] = Player_pydbus
+        except ImportError:
+            pass
+        try:
+            from .player_dbus_python import Player_dbus_python
+
+            backends["dbus-python"] = Player_dbus_python
+        except ImportError:
+            pass
+        return backends
+
+    def cached_choice(self) -> str | None:
+        """returns: the backend chosen earlier on this host, if it is installed"""
+        entry = load_json(self.cache_path).get(socket.gethostname(), {})
+        backend_name = entry.get("backend")
+        if backend_name in BackendSelector.available_backends():
+            return backend_name
+        return None
+
+    def measure(
+        self,
+        backend: type,
+        fq_player_name: str,
+        short_player_name: str,
+        timeouts: CallTimeouts = None,
+    ) -> float:
+        """returns: the median time, in seconds, of a Get(Position) and
+        Get(PlaybackStatus) round trip to the player with backend.
+        raises: PlayerTimeoutError if the player does not reply within timeouts."""
+        player = backend(fq_player_name, short_player_name, False, timeouts)
+        round_trips = []
+        for _ in range(self.samples):
+            start = time.perf_counter()
+            player.position
+            player.playback_status
+            round_trips.append(time.perf_counter() - start)
+        return statistics.median(round_trips)
+
+    def select(
+        self,
+        fq_player_name: str,
+        short_player_name: str,
+        measure: Callable[[type, str, str, CallTimeouts], float] = None,
+        timeouts: CallTimeouts = None,
+    ) -> str | None:
+        """returns: the name of the faster backend, measured against the player
+        with timeouts unless a choice is cached, None if no backend could be
+        measured."""
+        measure = measure if measure else self.measure
+        with self._lock:
+            backend_name = self.cached_choice()
+            if backend_name:
+                return backend_name
+            round_trips = {}
+            for backend_name, backend in self.available_backends().items():
+                try:
+                    round_trips[backend_name] = measure(
+                        backend, fq_player_name, short_player_name, timeouts
+                    )
+                except Exception as e:
+                    logger().warning(f"Unable to measure the {backend_name} backend")
+                    logger().warning(e)
+            if not round_trips:
+                return None
+            backend_name = min(round_trips, key=round_trips.get)
+            logger().info(
+                f"Selected the {backend_name} backend, round trips: "
+                + ", ".join(f"{n} {t * 1000:.3f} ms" for n, t in round_trips.items())
+            )
+            content = load_json(self.cache_path)
+            content[socket.gethostname()] = {
+                "backend": backend_name,
+                "round_trip_ms": {n: t * 1000 for n, t in round_trips.items()},
+                "measured_with": short_player_name,
+                "measured_at": time.time(),
+            }
+            save_json(self.cache_path, content)
+            return backend_name
+
+    def forget(self) -> None:
+        """Discards the choice for this host, the next selection measures again"""
+        with self._lock:
+            content = load_json(self.cache_path)
+            if content.pop(socket.gethostname(), None) is not None:
+                save_json(self.cache_path, content)
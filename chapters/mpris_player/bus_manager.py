@@ -0,0 +1,81 @@
+import threading
+import weakref
+from typing import Any, Callable, Dict
+from chapters.logger_config import logger
+
+
+class BusConnectionManager:
+    """Owns the session bus connection that is shared by all the players of a
+    backend.
+
+    The connection is opened on first use and reopened when it has been
+    dropped. The manager counts the connections it opened and the players that
+    hold a proxy on the connection, so that connection churn and leaked proxies
+    show up in the statistics."""
+
+    def __init__(
+        self,
+        backend_name: str,
+        connect: Callable[[], Any],
+        is_connected: Callable[[Any], bool],
+        reconnect: Callable[[], Any] = None,
+    ) -> None:
+        """:param connect: returns a new connection to the session bus.
+        :param is_connected: returns whether a connection is still usable.
+        :param reconnect: returns a new connection after the previous one was
+        dropped, defaults to connect."""
+        self._backend_name = backend_name
+        self._connect = connect
+        self._reconnect = reconnect if reconnect else connect
+        self._is_connected = is_connected
+        self._lock = threading.Lock()
+        self._bus = None
+        self._proxy_owners = weakref.WeakSet()
+        self.connections_opened = 0
+        self.reconnections = 0
+        self.proxies_created = 0
+
+    def get_bus(self) -> Any:
+        with self._lock:
+            if self._bus is not None and self._is_connected(self._bus):
+                return self._bus
+            if self._bus is None:
+                self._bus = self._connect()
+            else:
+                logger().warning(
+                    f"The {self._backend_name} session bus connection was dropped,"
+                    " reconnecting"
+                )
+                self._bus = self._reconnect()
+                self.reconnections += 1
+            self.connections_opened += 1
+            return self._bus
+
+    def register_proxy(self, owner: Any) -> None:
+        """Records that owner created a proxy on the shared connection. The proxy
+        is considered alive until owner is garbage collected."""
+        with self._lock:
+            self.proxies_created += 1
+            self._proxy_owners.add(owner)
+
+    @property
+    def connections_alive(self) -> int:
+        """The number of open connections, 0 or 1. A dropped connection is not
+        alive, even before get_bus replaces it."""
+        with self._lock:
+            if self._bus is not None and self._is_connected(self._bus):
+                return 1
+            return 0
+
+    @property
+    def proxies_alive(self) -> int:
+        return len(self._proxy_owners)
+
+    def statistics(self) -> Dict[str, int]:
+        return {
+            "connections_alive": self.connections_alive,
+            "connections_opened": self.connections_opened,
+            "reconnections": self.reconnections,
+            "proxies_alive": self.proxies_alive,
+            "proxies_created": self.proxies_created,
+        }
@@ -0,0 +1,50 @@
+"""Small JSON files in which the player layer remembers what it measured or
+learned about the host and its players between runs. The files live in
+$XDG_CACHE_HOME/chapters (~/.cache/chapters by default), losing them only costs
+a remeasurement."""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict
+from chapters.logger_config import logger
+
+
+def cache_file(filename: str) -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "chapters" / filename
+
+
+def load_json(path: Path) -> Dict[str, Any]:
+    """returns: the JSON object in path, an empty dictionary if the file does not
+    exist or cannot be read."""
+    try:
+        with open(path, "r") as json_file:
+            content = json.load(json_file)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger().warning(f"Ignoring the unreadable cache file {path}: {e}")
+        return {}
+    return content if isinstance(content, dict) else {}
+
+
+def save_json(path: Path, content: Dict[str, Any]) -> None:
+    """Replaces path atomically, so that a concurrent reader never sees a partly
+    written file. Failures are logged, not raised."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        descriptor, temporary_path = tempfile.mkstemp(
+            dir=path.parent, prefix=f".{path.name}."
+        )
+    except OSError as e:
+        logger().warning(f"Unable to write the cache file {path}: {e}")
+        return
+    try:
+        with os.fdopen(descriptor, "w") as json_file:
+            json.dump(content, json_file, indent=1, sort_keys=True)
+        os.replace(temporary_path, path)
+    except (OSError, TypeError, ValueError) as e:
+        logger().warning(f"Unable to write the cache file {path}: {e}")
+        os.unlink(temporary_path)
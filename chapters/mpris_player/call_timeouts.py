@@ -0,0 +1,45 @@
+from typing import Dict
+
+
+class CallTimeouts:
+    """Per method timeouts, in seconds, of the D-Bus calls the player backends
+    make. A call that does not receive a reply within its timeout is abandoned
+    and raises PlayerTimeoutError, so no call can stall the caller for longer
+    than max_timeout seconds.
+
+    Calls that are made on every keypress get tight timeouts, Raise gets a looser
+    one as raising a window can take a while."""
+
+    default_timeouts: Dict[str, float] = {
+        "Get": 0.5,
+        "GetAll": 1.0,
+        "Seek": 1.0,
+        "SetPosition": 1.0,
+        "Play": 1.0,
+        "PlayPause": 1.0,
+        "Pause": 1.0,
+        "Stop": 1.0,
+        "Next": 2.0,
+        "Previous": 2.0,
+        "Raise": 5.0,
+        "Introspect": 2.0,
+    }
+
+    def __init__(self, default: float = 2.0, **timeouts: float) -> None:
+        """:param default: the timeout of methods without a specific timeout.
+        :param timeouts: timeouts by method name, overriding default_timeouts,
+        e.g. CallTimeouts(Seek=0.5)."""
+        self.default = default
+        self._timeouts = dict(CallTimeouts.default_timeouts)
+        self._timeouts.update(timeouts)
+
+    def timeout(self, method_name: str) -> float:
+        return self._timeouts.get(method_name, self.default)
+
+    def set_timeout(self, method_name: str, timeout: float) -> None:
+        self._timeouts[method_name] = timeout
+
+    @property
+    def max_timeout(self) -> float:
+        """The upper bound of the time any single call can take"""
+        return max(self.default, *self._timeouts.values())
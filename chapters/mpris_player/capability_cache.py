@@ -0,0 +1,164 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Set
+from .cache_files import cache_file, load_json, save_json
+from chapters.logger_config import logger
+
+MEDIA_PLAYER2_INTERFACE = "org.mpris.MediaPlayer2"
+CAPABILITIES = ("CanControl", "CanSeek", "CanPause", "CanPlay")
+
+
+class CapabilityCache:
+    """Remembers the capabilities (CanControl, CanSeek, CanPause, CanPlay) and the
+    identity (Identity, DesktopEntry) of the players across sessions, so that
+    connecting to a known player takes no capability round trips.
+
+    The entries are kept in a small JSON file, keyed by the player's DesktopEntry,
+    or its Identity when it has none, with an index from the kind of player (the
+    bus name without its instance suffix, e.g. vlc) to the entry. A cached entry
+    is revalidated once per session, in the background, the first time it is
+    used. The capabilities of a player that is not in the file are read with one
+    GetAll and kept in memory until its revalidation has stored them.
+
+    Capabilities such as CanSeek depend on what the player plays (a live stream,
+    no track). An entry the revalidation contradicts is removed from the file,
+    the capabilities read are used for the rest of the session and stored by the
+    next session's revalidation if they hold."""
+
+    def __init__(self, cache_path: Path = None) -> None:
+        self.cache_path = cache_path if cache_path else cache_file("players.json")
+        self._lock = threading.Lock()
+        self._content: Dict[str, Dict[str, Any]] = None
+        # Capabilities read in this session, for players without an entry yet
+        self._session_capabilities: Dict[str, Dict[str, bool]] = {}
+        self._revalidated: Set[str] = set()
+        self._executor: ThreadPoolExecutor = None
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._content is None:
+            content = load_json(self.cache_path)
+            self._content = {
+                "players": content.get("players", {}),
+                "names": content.get("names", {}),
+            }
+        return self._content
+
+    def _entry(self, player_kind: str) -> Dict[str, Any] | None:
+        content = self._load()
+        return content["players"].get(content["names"].get(player_kind))
+
+    def capabilities(self, player_kind: str) -> Dict[str, bool] | None:
+        """returns: the capabilities of the kind of player, None if unknown"""
+        with self._lock:
+            if player_kind in self._session_capabilities:
+                return dict(self._session_capabilities[player_kind])
+            entry = self._entry(player_kind)
+            return dict(entry["capabilities"]) if entry else None
+
+    def identity(self, player_kind: str) -> Dict[str, str] | None:
+        """returns: the Identity and DesktopEntry of the kind of player, None if
+        unknown"""
+        with self._lock:
+            entry = self._entry(player_kind)
+            if entry is None:
+                return None
+            return {
+                "Identity": entry.get("identity", ""),
+                "DesktopEntry": entry.get("desktop_entry", ""),
+            }
+
+    def remember(
+        self, player_kind: str, player_properties: Dict[str, Any]
+    ) -> Dict[str, bool]:
+        """Keeps the capabilities in player_properties, the properties of the
+        org.mpris.MediaPlayer2.Player interface, for the rest of the session.
+        returns: the capabilities."""
+        capabilities = _capabilities(player_properties)
+        with self._lock:
+            self._session_capabilities[player_kind] = capabilities
+        return dict(capabilities)
+
+    def store(
+        self,
+        player_kind: str,
+        media_player2_properties: Dict[str, Any],
+        player_properties: Dict[str, Any],
+    ) -> bool:
+        """Stores the identity and capabilities of the kind of player in the file.
+        Capabilities that contradict the stored ones are kept for the session
+        only and the stored entry is removed.
+        returns: whether the capabilities differ from the ones known before."""
+        capabilities = _capabilities(player_properties)
+        identity = str(media_player2_properties.get("Identity", ""))
+        desktop_entry = str(media_player2_properties.get("DesktopEntry", ""))
+        key = desktop_entry or identity or player_kind
+        with self._lock:
+            known = self._session_capabilities.pop(player_kind, None)
+            entry = self._entry(player_kind)
+            if known is None and entry:
+                known = entry["capabilities"]
+            content = self._load()
+            if entry and entry["capabilities"] != capabilities:
+                self._session_capabilities[player_kind] = capabilities
+                content["players"].pop(content["names"].pop(player_kind), None)
+                save_json(self.cache_path, content)
+                return known != capabilities
+            content["players"][key] = {
+                "identity": identity,
+                "desktop_entry": desktop_entry,
+                "capabilities": capabilities,
+                "validated_at": time.time(),
+            }
+            content["names"][player_kind] = key
+            save_json(self.cache_path, content)
+        return known is not None and known != capabilities
+
+    def revalidate(
+        self, player, capabilities_changed: Callable[[], None] = None
+    ) -> Future | None:
+        """Reads the identity and capabilities of player again, in the background,
+        once per kind of player and session. capabilities_changed is called when
+        they differ from the ones in use.
+        returns: the Future of the revalidation, None if it was already done."""
+        player_kind = player.player_kind
+        with self._lock:
+            if player_kind in self._revalidated:
+                return None
+            self._revalidated.add(player_kind)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="capabilities"
+                )
+        return self._executor.submit(
+            self._revalidate, player, player_kind, capabilities_changed
+        )
+
+    def _revalidate(
+        self, player, player_kind: str, capabilities_changed: Callable[[], None]
+    ) -> None:
+        try:
+            media_player2_properties = player.get_all(MEDIA_PLAYER2_INTERFACE)
+            player_properties = player.get_all()
+        except Exception as e:
+            logger().warning(f"Unable to revalidate {player.ext_name}: {e}")
+            with self._lock:
+                self._revalidated.discard(player_kind)
+            return
+        if self.store(player_kind, media_player2_properties, player_properties):
+            logger().info(f"The capabilities of {player.ext_name} have changed")
+            if capabilities_changed:
+                capabilities_changed()
+
+    def forget(self) -> None:
+        """Discards all the entries, in memory and in the file"""
+        with self._lock:
+            self._content = {"players": {}, "names": {}}
+            self._session_capabilities.clear()
+            self._revalidated.clear()
+            save_json(self.cache_path, self._content)
+
+
+def _capabilities(player_properties: Dict[str, Any]) -> Dict[str, bool]:
+    return {name: bool(player_properties.get(name, False)) for name in CAPABILITIES}
@@ -0,0 +1,52 @@
+import queue
+import threading
+from typing import Callable
+from chapters.logger_config import logger
+
+
+class CommandDispatcher:
+    """Sends fire and forget player commands (PlayPause, Next, Seek, ...) from a
+    dedicated worker thread, so that the caller, typically a Tk event handler,
+    returns without waiting for the player's reply.
+
+    Commands are sent one at a time in the order in which they were submitted.
+    A command that fails is reported to the on_error callback, which is called
+    from the worker thread with the command name and the exception."""
+
+    def __init__(self, on_error: Callable[[str, Exception], None] = None) -> None:
+        self._on_error = on_error
+        self._commands = queue.Queue()
+        self._worker = threading.Thread(
+            target=self._run, name="player-commands", daemon=True
+        )
+        self._worker.start()
+
+    def submit(self, command_name: str, command: Callable, *args) -> None:
+        self._commands.put((command_name, command, args))
+
+    def _run(self) -> None:
+        while True:
+            command_name, command, args = self._commands.get()
+            try:
+                if command is None:
+                    return
+                command(*args)
+            except Exception as e:
+                logger().error(f"Player command {command_name} failed")
+                logger().error(e)
+                if self._on_error:
+                    self._on_error(command_name, e)
+            finally:
+                self._commands.task_done()
+
+    @property
+    def pending(self) -> int:
+        return self._commands.qsize()
+
+    def wait_until_idle(self) -> None:
+        """Blocks until all submitted commands have been sent"""
+        self._commands.join()
+
+    def stop(self) -> None:
+        """Stops the worker thread once the submitted commands have been sent"""
+        self._commands.put(("stop", None, ()))
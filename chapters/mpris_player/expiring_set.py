@@ -0,0 +1,59 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+
+class ExpiringSet:
+    """A set whose members expire ttl seconds after they were last added.
+    Once the set holds max_size members, adding a member evicts the oldest one.
+    Membership checks are O(1), expired members are removed lazily."""
+
+    def __init__(
+        self,
+        ttl: float,
+        max_size: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self._clock = clock
+        self._lock = threading.Lock()
+        # member -> expiry time, the oldest addition first
+        self._expiries: OrderedDict = OrderedDict()
+
+    def add(self, member: Hashable) -> None:
+        with self._lock:
+            self._expiries.pop(member, None)
+            while len(self._expiries) >= self.max_size:
+                self._expiries.popitem(last=False)
+            self._expiries[member] = self._clock() + self.ttl
+
+    def discard(self, member: Hashable) -> None:
+        with self._lock:
+            self._expiries.pop(member, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._expiries.clear()
+
+    def __contains__(self, member: Hashable) -> bool:
+        with self._lock:
+            expiry = self._expiries.get(member)
+            if expiry is None:
+                return False
+            if expiry <= self._clock():
+                del self._expiries[member]
+                return False
+            return True
+
+    def __len__(self) -> int:
+        with self._lock:
+            now = self._clock()
+            # Additions are in expiry order, as the ttl is the same for all members
+            while self._expiries:
+                member, expiry = next(iter(self._expiries.items()))
+                if expiry > now:
+                    break
+                del self._expiries[member]
+            return len(self._expiries)
@@ -0,0 +1,129 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+
+def _bucket_bounds() -> List[int]:
+    """Upper bounds, in microseconds, of the histogram buckets: four buckets per
+    doubling from 10 microseconds up to about 90 seconds, so a percentile is
+    accurate to within 19%."""
+    bounds = []
+    bound = 10.0
+    while bound < 90_000_000:
+        bounds.append(int(bound))
+        bound *= 2**0.25
+    return bounds
+
+
+class LatencyHistogram:
+    """The distribution of the latencies of one method of one player.
+    Latencies are counted in fixed, logarithmically sized buckets, so recording is
+    a bisect and an increment and the memory use does not grow with the number of
+    calls."""
+
+    _bounds = _bucket_bounds()
+
+    def __init__(self) -> None:
+        self._counts = [0] * (len(LatencyHistogram._bounds) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, micros: int, failed: bool = False) -> None:
+        self._counts[bisect_left(LatencyHistogram._bounds, micros)] += 1
+        self.count += 1
+        self.total += micros
+        if micros > self.max:
+            self.max = micros
+        if failed:
+            self.errors += 1
+
+    def percentile(self, percent: float) -> int:
+        """:returns: the latency, in microseconds, that percent of the calls did
+        not exceed, rounded up to the bucket bound"""
+        if self.count == 0:
+            return 0
+        rank = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank and count:
+                if index < len(LatencyHistogram._bounds):
+                    return min(LatencyHistogram._bounds[index], self.max)
+                return self.max
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class LatencyRecorder:
+    """Latency histograms of the calls made to the players, by player and method.
+
+    The player backends record every D-Bus method call (Seek, GetAll, ...), the
+    PlayerProxy records its commands (seek, play_pause, ...), which includes the
+    time spent reconnecting. Recording takes about a microsecond, so it is always
+    enabled."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.enabled = True
+
+    def record(
+        self, player_name: str, method_name: str, seconds: float, failed=False
+    ) -> None:
+        if not self.enabled:
+            return
+        key = (player_name, method_name)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.record(int(seconds * 1_000_000), failed)
+
+    def histograms(self) -> Dict[Tuple[str, str], Dict[str, int]]:
+        """:returns: the summary of each histogram, keyed by (player, method)"""
+        with self._lock:
+            return {
+                key: histogram.summary()
+                for key, histogram in sorted(self._histograms.items())
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def report(self) -> str:
+        """:returns: a plain text table of the histograms, latencies in
+        milliseconds"""
+        histograms = self.histograms()
+        if not histograms:
+            return "No player calls have been recorded."
+        player_width = max(len("player"), *(len(p) for p, _ in histograms))
+        method_width = max(len("method"), *(len(m) for _, m in histograms))
+        lines = [
+            f"{'player':<{player_width}}  {'method':<{method_width}}"
+            f"  {'count':>7}  {'errors':>6}  {'p50 ms':>8}  {'p95 ms':>8}"
+            f"  {'p99 ms':>8}  {'max ms':>8}"
+        ]
+        for (player_name, method_name), summary in histograms.items():
+            lines.append(
+                f"{player_name:<{player_width}}  {method_name:<{method_width}}"
+                f"  {summary['count']:>7}  {summary['errors']:>6}"
+                f"  {summary['p50'] / 1000:>8.2f}  {summary['p95'] / 1000:>8.2f}"
+                f"  {summary['p99'] / 1000:>8.2f}  {summary['max'] / 1000:>8.2f}"
+            )
+        return "\n".join(lines)
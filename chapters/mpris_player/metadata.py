@@ -0,0 +1,69 @@
+from typing import Any, Dict, FrozenSet, Iterable, Mapping
+
+# The keys that identify the track a player plays
+TRACK_KEYS = ("mpris:trackid", "xesam:url")
+
+
+def decode(value: Any) -> Any:
+    """Converts a Metadata value, as returned by any of the backends, to the
+    plain Python value it holds: GLib.Variant (pydbus, unpacked on demand),
+    dbus_next.Variant and the dbus-python types, which subclass str, int,
+    float, list and dict."""
+    if hasattr(value, "unpack"):
+        return value.unpack()
+    if hasattr(value, "signature") and hasattr(value, "value"):
+        return decode(value.value)
+    if isinstance(value, bool) or _is_dbus_python_boolean(value):
+        # dbus.Boolean subclasses int
+        return bool(value)
+    if isinstance(value, str):
+        return str(value)
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float):
+        return float(value)
+    if isinstance(value, (list, tuple)):
+        return [decode(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): decode(item) for key, item in value.items()}
+    return value
+
+
+def _is_dbus_python_boolean(value: Any) -> bool:
+    return type(value).__name__ == "Boolean" and hasattr(value, "variant_level")
+
+
+def select_metadata(
+    metadata: Mapping[str, Any] | None, keys: Iterable[str]
+) -> Dict[str, Any]:
+    """returns: the decoded values of the keys of metadata, keys missing from
+    metadata are left out. The other values are neither copied nor decoded."""
+    if not metadata:
+        return {}
+    selected = {}
+    for key in keys:
+        value = metadata.get(key)
+        if value is not None:
+            selected[key] = decode(value)
+    return selected
+
+
+def metadata_diff(
+    previous: Mapping[str, Any] | None,
+    current: Mapping[str, Any] | None,
+    keys: Iterable[str] = None,
+) -> FrozenSet[str]:
+    """returns: the keys whose value differs between previous and current, only
+    among keys if given. Values are compared in place, the same object is not
+    compared any further, so unchanged art URLs, lyrics or comments cost an
+    identity check."""
+    previous = previous or {}
+    current = current or {}
+    if keys is None:
+        keys = previous.keys() | current.keys()
+    changed = []
+    for key in keys:
+        old, new = previous.get(key), current.get(key)
+        if old is not new and old != new:
+            changed.append(key)
+    return frozenset(changed)
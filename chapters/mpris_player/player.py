@@ -2,9 +2,82 @@
 
 from abc import ABC, abstractmethod
 import re
-from typing import Any, Dict
+import time
+from typing import Any, Callable, Dict
 from functools import lru_cache, cached_property
 from chapters.logger_config import logger
+from .metadata import select_metadata
+from .position_clock import PositionClock
+from .property_cache import PropertyCache
+from .call_timeouts import CallTimeouts
+from .latency_stats import LatencyRecorder
+from .capability_cache import CapabilityCache
+from .seek_calibration import CorrectionProfile, SeekCalibration
+
+
+class PlayerState:
+    """A compact, point in time snapshot of the org.mpris.MediaPlayer2.Player
+    properties, built from a single Properties.GetAll call."""
+
+    __slots__ = (
+        "playback_status",
+        "position",
+        "rate",
+        "metadata",
+        "trackid",
+        "can_control",
+        "can_seek",
+        "can_pause",
+        "can_play",
+    )
+
+    def __init__(
+        self,
+        playback_status: str = None,
+        position: int = 0,
+        rate: float = 1.0,
+        metadata: Dict[str, Any] = None,
+        trackid: str = "",
+        can_control: bool = False,
+        can_seek: bool = False,
+        can_pause: bool = False,
+        can_play: bool = False,
+    ) -> None:
+        self.playback_status = playback_status
+        self.position = position
+        self.rate = rate
+        self.metadata = metadata if metadata is not None else {}
+        self.trackid = trackid
+        self.can_control = can_control
+        self.can_seek = can_seek
+        self.can_pause = can_pause
+        self.can_play = can_play
+
+    @classmethod
+    def from_properties(cls, properties: Dict[str, Any]) -> "PlayerState":
+        """Creates a PlayerState from the dictionary returned by
+        Properties.GetAll("org.mpris.MediaPlayer2.Player")."""
+        metadata = properties.get("Metadata", {})
+        return cls(
+            playback_status=properties.get("PlaybackStatus"),
+            position=properties.get("Position", 0),
+            rate=properties.get("Rate", 1.0),
+            metadata=metadata,
+            trackid=select_metadata(metadata, ("mpris:trackid",)).get(
+                "mpris:trackid", ""
+            ),
+            can_control=properties.get("CanControl", False),
+            can_seek=properties.get("CanSeek", False),
+            can_pause=properties.get("CanPause", False),
+            can_play=properties.get("CanPlay", False),
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"PlayerState(playback_status={self.playback_status!r}, "
+            f"position={self.position!r}, rate={self.rate!r}, "
+            f"trackid={self.trackid!r})"
+        )
 
 
 class Player(ABC):
@@ -12,15 +85,95 @@ class Player(ABC):
     an MPRIS player object and exposes a subset of
     the org.mpris.MediaPlayer2.Player interface."""
 
+    # How long, in seconds, an uncached player that fell back to Seek keeps using
+    # it before its trackid is read again, see set_position
+    set_position_recheck: float = 10.0
+    # The latencies of the calls made to all players
+    latency_recorder = LatencyRecorder()
+    # The capabilities and identity of the players, remembered across sessions
+    capability_cache = CapabilityCache()
+    # The landing error and command latency of the kinds of players
+    seek_calibration = SeekCalibration()
+    # Whether the backend's signals are delivered through the GLib main loop
+    needs_signal_loop = True
+    # The unique bus name (:1.xx) of the connection the player is bound to and
+    # the bus connection it is bound on, see _bind_owner
+    _owner: str = None
+    _bus: Any = None
+    _resolved_owner: str = None
+    # Whether SetPosition works for the player, None until it has been used, and
+    # the trackid Seek is used for instead of SetPosition, see set_position
+    _set_position_supported: bool = None
+    _seek_fallback_trackid: str = None
+    _seek_fallback_until: float = 0.0
+    # The property cache of a cached player, see PropertyCache
+    _cache: PropertyCache = None
+
     @abstractmethod
-    def __init__(self, mpris_player_name, ext_player_name) -> None:
+    def __init__(
+        self,
+        mpris_player_name,
+        ext_player_name,
+        cached: bool = False,
+        timeouts: CallTimeouts = None,
+        owner: str = None,
+    ) -> None:
         self._name = mpris_player_name
         self._ext_name = ext_player_name
+        self._timeouts = timeouts if timeouts else CallTimeouts()
+        # When cached is True, the backend serves property reads from a cache
+        # that is kept up to date by the player's D-Bus signals.
+        self._cached = cached
+        # The owner of the name when the caller has just resolved it, connect
+        # binds the player to it without resolving it again
+        self._resolved_owner = owner
         self.connect()
 
     def connect(self):
         pass
 
+    def _bind_owner(self, bus: Any) -> str:
+        """Resolves the current owner of the player's well known name, calls are
+        addressed to the owner so that they cannot reach another process that
+        takes over the name.
+        returns: the unique bus name of the owner.
+        raises: PlayerConnectionError if the name has no owner."""
+        owner, self._resolved_owner = self._resolved_owner, None
+        if owner is None:
+            try:
+                owner = self.get_name_owner(self._name)
+            except Exception as e:
+                logger().error(e)
+                raise PlayerConnectionError(
+                    f"Unable to connect to {self._ext_name},"
+                    f" check if {self._ext_name} it is running."
+                )
+        if owner != self._owner:
+            # Another process, SetPosition has to be tried again
+            self._set_position_supported = None
+            self._seek_fallback_trackid = None
+        self._owner = owner
+        self._bus = bus
+        return owner
+
+    @property
+    def owner(self) -> str:
+        """The unique bus name (:1.xx) of the connection the player is bound to,
+        None if the player is not bound to one."""
+        return self._owner
+
+    def owner_changed(self) -> bool:
+        """returns: whether the player has to be reconnected, because its well
+        known name is owned by another connection than the one it is bound to or
+        because the bus connection was replaced. Always True for players that are
+        not bound to an owner.
+        raises: the backend's error if the name has no owner."""
+        if self._owner is None:
+            return True
+        if self.bus_manager.get_bus() is not self._bus:
+            return True
+        return self.get_name_owner(self._name) != self._owner
+
     @abstractmethod
     def raise_window(self) -> None: ...
 
@@ -45,11 +198,170 @@ class Player(ABC):
     @abstractmethod
     def seek(self, offset: int) -> None: ...
 
-    @abstractmethod
-    def set_position(self, to_position: int) -> None: ...
+    def set_position(self, to_position: int) -> None:
+        """Sets the playback position with SetPosition(trackid, position) or, for
+        players whose trackid is not a valid object path or that reject
+        SetPosition, with Seek(offset).
+        The player then uses Seek for as long as it plays the same track. Cached
+        players read their trackid locally on every call. Uncached players read it
+        again only after set_position_recheck seconds, so later calls skip that
+        round trip.
+        The position is corrected with the calibrated landing error of the kind of
+        player, if it was calibrated (see SeekCalibration)."""
+        profile = Player.seek_calibration.profile(self.player_kind)
+        if self._may_use_set_position():
+            trackid = self.metadata_values("mpris:trackid").get("mpris:trackid", "")
+            if trackid == self._seek_fallback_trackid:
+                # SetPosition was given up on for this track
+                self._seek_fallback_until = time.monotonic() + self.set_position_recheck
+            elif not self._is_object_path_valid(trackid):
+                self._fall_back_to_seek(
+                    trackid, f"The trackid returned by {self.ext_name} is not valid."
+                )
+            elif self._try_set_position(trackid, to_position, profile):
+                return
+        seek_to_position = to_position - self._position_at_seek(profile)
+        self.seek(seek_to_position)
+
+    def _may_use_set_position(self) -> bool:
+        if self._set_position_supported is not False:
+            return True
+        return self._cache is not None or time.monotonic() >= self._seek_fallback_until
+
+    def _try_set_position(
+        self, trackid: str, to_position: int, profile: CorrectionProfile | None
+    ) -> bool:
+        """returns: False if the player rejected SetPosition"""
+        if profile:
+            to_position = profile.corrected_position(to_position)
+        try:
+            self._send_set_position(trackid, to_position)
+        except PlayerTimeoutError:
+            raise
+        except Exception as e:
+            if self._set_position_supported:
+                # SetPosition worked before, the player is gone or failing
+                raise
+            self._fall_back_to_seek(trackid, f"{self.ext_name} rejected SetPosition")
+            logger().debug(e)
+            return False
+        self._set_position_supported = True
+        self._seek_fallback_trackid = None
+        return True
+
+    def _send_set_position(self, trackid: str, to_position: int) -> None:
+        self._call(self.mpris_player.SetPosition, "SetPosition", trackid, to_position)
+
+    def _fall_back_to_seek(self, trackid: str, reason: str) -> None:
+        if self._set_position_supported is not False:
+            logger().warning(reason)
+            logger().debug(
+                f"Using Seek() to set the requested position for {self.ext_name}"
+                " until its track changes."
+            )
+        self._set_position_supported = False
+        self._seek_fallback_trackid = trackid
+        self._seek_fallback_until = time.monotonic() + self.set_position_recheck
+
+    def _position_at_seek(self, profile: CorrectionProfile | None) -> int:
+        """returns: the estimated position of the player when a Seek sent now
+        reaches it. While playing, the position read from the player is advanced by
+        the time since it was valid, half way through the read, and by half the
+        calibrated command latency. Uncached players are read in one round trip,
+        cached players locally."""
+        start = time.perf_counter()
+        if self._cache is not None:
+            playback_status, position = self.playback_status, self.position
+        else:
+            state = self.snapshot()
+            playback_status, position = state.playback_status, state.position
+        if playback_status != "Playing":
+            return position
+        elapsed = (time.perf_counter() - start) / 2
+        if profile:
+            elapsed += profile.command_latency / 2
+        return position + int(elapsed * 1_000_000)
+
+    def _corrected_seek_offset(self, offset: int) -> int:
+        profile = Player.seek_calibration.profile(self.player_kind)
+        return profile.corrected_offset(offset) if profile else offset
+
+    @property
+    def player_kind(self) -> str:
+        """The player name without its instance suffix, e.g. firefox for
+        firefox.instance_1_42"""
+        return self.ext_name.split(".")[0]
+
+    def _capability(self, property_name: str) -> bool:
+        """returns: the capability property_name (e.g. CanSeek) of the player,
+        from the capability cache when the kind of player is known. The cached
+        capabilities are revalidated in the background."""
+        capabilities = Player.capability_cache.capabilities(self.player_kind)
+        if capabilities is None:
+            capabilities = Player.capability_cache.remember(
+                self.player_kind, self.get_all()
+            )
+        Player.capability_cache.revalidate(self, self._capabilities_changed)
+        return capabilities[property_name]
+
+    def _capabilities_changed(self) -> None:
+        for name in ("can_control", "can_seek", "can_pause", "can_play"):
+            self.__dict__.pop(name, None)
+
+    def _call(self, method: Callable, method_name: str, *args) -> Any:
+        """Calls a D-Bus method of the player with the method's timeout.
+        raises: PlayerTimeoutError if the player does not reply in time."""
+        timeout = self._timeouts.timeout(method_name)
+        start = time.perf_counter()
+        try:
+            result = method(*args, timeout=timeout)
+        except Exception as e:
+            Player.latency_recorder.record(
+                self._ext_name, method_name, time.perf_counter() - start, failed=True
+            )
+            if is_timeout_error(e):
+                raise PlayerTimeoutError(
+                    f"{self._ext_name} did not reply to {method_name}"
+                    f" within {timeout} seconds"
+                ) from e
+            raise
+        Player.latency_recorder.record(
+            self._ext_name, method_name, time.perf_counter() - start
+        )
+        return result
+
+    @property
+    def timeouts(self) -> CallTimeouts:
+        return self._timeouts
 
     def get(self, interface_name: str, property_name: str) -> Any: ...
 
+    def get_all(
+        self, interface_name: str = "org.mpris.MediaPlayer2.Player"
+    ) -> Dict[str, Any]: ...
+
+    def snapshot(self) -> PlayerState:
+        """Retrieves the current state of the player in a single D-Bus round trip."""
+        return PlayerState.from_properties(self.get_all())
+
+    def retrieve_position(self) -> int:
+        """returns: the position read from the player, never extrapolated by the
+        position clock of a cached player"""
+        if self._cache is not None:
+            return self._cache.retrieve_position()
+        return self.position
+
+    def add_track_listener(self, listener: Callable[[Dict[str, Any]], None]) -> bool:
+        """Registers a function that is called with the new Metadata whenever the
+        player moves to another track, from the thread that delivers the player's
+        signals.
+        returns: False if the player does not signal track changes, only cached
+        players do."""
+        if self._cache is None:
+            return False
+        self._cache.add_track_listener(listener)
+        return True
+
     @lru_cache()
     def _is_object_path_valid(self, path: str) -> bool:
         """Whether this is a valid object path.
@@ -99,6 +411,16 @@ class Player(ABC):
         ...
         return self._ext_name
 
+    @property
+    def cached(self) -> bool:
+        return self._cached
+
+    @property
+    def position_clock(self) -> PositionClock:
+        """The clock that extrapolates the position of a cached player,
+        None for players that are not cached."""
+        return None
+
     @property
     @abstractmethod
     def playback_status(self) -> str: ...
@@ -111,9 +433,23 @@ class Player(ABC):
     @abstractmethod
     def metadata(self) -> Dict[str, Any]: ...
 
+    def metadata_values(self, *keys: str) -> Dict[str, Any]:
+        """returns: the decoded values of keys in the player's Metadata, keys the
+        player does not provide are left out. The rest of the Metadata, art URLs,
+        lyrics or comments, is not decoded."""
+        return select_metadata(self.metadata, keys)
+
     @property
-    @abstractmethod
-    def trackid(self) -> str: ...
+    def trackid(self) -> str:
+        values = self.metadata_values("mpris:trackid")
+        if "mpris:trackid" in values:
+            return values["mpris:trackid"]
+        else:
+            logger().warning(
+                f"Metadata from {self.ext_name} does not contain mpris:trackid\n"
+                f"Returning an empty string instead"
+            )
+            return ""
 
     @cached_property
     @abstractmethod
@@ -132,6 +468,30 @@ class Player(ABC):
     def can_play(self) -> bool: ...
 
 
+_TIMEOUT_ERROR_NAMES = (
+    "org.freedesktop.DBus.Error.NoReply",
+    "org.freedesktop.DBus.Error.Timeout",
+    "org.freedesktop.DBus.Error.TimedOut",
+    "Timeout was reached",
+)
+
+
+def is_timeout_error(error: Exception) -> bool:
+    """Whether error reports a D-Bus call that did not receive a reply in time.
+    dbus-python raises DBusException, which carries the D-Bus error name, pydbus
+    raises GLib.Error, whose message contains it."""
+    if isinstance(error, TimeoutError):
+        return True
+    description = str(error)
+    if hasattr(error, "get_dbus_name"):
+        description = f"{error.get_dbus_name()} {description}"
+    return any(name in description for name in _TIMEOUT_ERROR_NAMES)
+
+
+class PlayerTimeoutError(TimeoutError):
+    pass
+
+
 class NoValidMprisPlayersError(Exception):
     pass
 
@@ -0,0 +1,203 @@
+import asyncio
+from typing import Any, Dict, List, Tuple
+from dbus_next import Variant
+from dbus_next.aio import MessageBus
+from dbus_next.errors import DBusError
+from .metadata import select_metadata
+from .player import Player, PlayerConnectionError, PlayerState
+from chapters.logger_config import logger
+
+
+def _unpack(value: Any) -> Any:
+    if isinstance(value, Variant):
+        return _unpack(value.value)
+    if isinstance(value, dict):
+        return {k: _unpack(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_unpack(v) for v in value]
+    return value
+
+
+class Player_dbus_next(Player):
+    """An asyncio based variant of the MPRIS player convenience class, built on
+    dbus-next. All methods that communicate with the player are coroutines, as
+    are the values of the properties that are read from the player, e.g.
+    await player.seek(offset), await player.position, await player.snapshot().
+
+    Instances are created with PlayerFactory.get_async_player, as connecting to
+    the player has to be awaited. Players that are created on the same event
+    loop share one bus connection."""
+
+    _buses: Dict[asyncio.AbstractEventLoop, MessageBus] = {}
+
+    @staticmethod
+    async def get_bus() -> MessageBus:
+        loop = asyncio.get_running_loop()
+        bus = Player_dbus_next._buses.get(loop)
+        if bus is None or not bus.connected:
+            bus = await MessageBus().connect()
+            Player_dbus_next._buses[loop] = bus
+        return bus
+
+    @staticmethod
+    async def get_service_names() -> List:
+        bus = await Player_dbus_next.get_bus()
+        introspection = await bus.introspect(
+            "org.freedesktop.DBus", "/org/freedesktop/DBus"
+        )
+        remote_object = bus.get_proxy_object(
+            "org.freedesktop.DBus", "/org/freedesktop/DBus", introspection
+        )
+        dbus_interface = remote_object.get_interface("org.freedesktop.DBus")
+        return await dbus_interface.call_list_names()
+
+    def __init__(self, mpris_player_name, ext_player_name) -> None:
+        # connect() is a coroutine, it is awaited by PlayerFactory.get_async_player
+        self._name = mpris_player_name
+        self._ext_name = ext_player_name
+        self._cached = False
+
+    async def connect(self):
+        bus = await Player_dbus_next.get_bus()
+        try:
+            introspection = await bus.introspect(self._name, "/org/mpris/MediaPlayer2")
+        except DBusError as e:
+            logger().error(e)
+            logger().error(f"Unable to retrieve the {self._name} proxy from dbus.")
+            raise PlayerConnectionError(
+                f"Unable to connect to {self._ext_name},"
+                f" check if {self._ext_name} it is running."
+            )
+        self._proxy = bus.get_proxy_object(
+            self._name, "/org/mpris/MediaPlayer2", introspection
+        )
+        self._media_player2 = self._proxy.get_interface("org.mpris.MediaPlayer2")
+        self._player = self._proxy.get_interface("org.mpris.MediaPlayer2.Player")
+        self._player_properties = self._proxy.get_interface(
+            "org.freedesktop.DBus.Properties"
+        )
+
+    async def raise_window(self) -> None:
+        await self.mpris_media_player2.call_raise()
+
+    async def play(self) -> None:
+        await self.mpris_player.call_play()
+
+    async def play_pause(self) -> None:
+        await self.mpris_player.call_play_pause()
+
+    async def pause(self) -> None:
+        await self.mpris_player.call_pause()
+
+    async def next(self) -> None:
+        await self.mpris_player.call_next()
+
+    async def previous(self) -> None:
+        await self.mpris_player.call_previous()
+
+    async def stop(self) -> None:
+        await self.mpris_player.call_stop()
+
+    async def seek(self, offset: int) -> None:
+        await self.mpris_player.call_seek(offset)
+
+    async def set_position(self, to_position: int) -> None:
+        state = await self.snapshot()
+        if self._is_object_path_valid(state.trackid):
+            await self.mpris_player.call_set_position(state.trackid, to_position)
+        else:
+            logger().warning(f"The trackid returned by {self.ext_name} is not valid.")
+            logger().debug("Attempting to use Seek() to set the requested postion.")
+            await self.seek(to_position - state.position)
+
+    async def get(
+        self, property_name: str, interface_name="org.mpris.MediaPlayer2.Player"
+    ) -> Any:
+        variant = await self.mpris_player_properties.call_get(
+            interface_name, property_name
+        )
+        return _unpack(variant)
+
+    async def get_all(
+        self, interface_name="org.mpris.MediaPlayer2.Player"
+    ) -> Dict[str, Any]:
+        properties = await self.mpris_player_properties.call_get_all(interface_name)
+        return _unpack(properties)
+
+    async def snapshot(self) -> PlayerState:
+        return PlayerState.from_properties(await self.get_all())
+
+    @property
+    def mpris_player(self):
+        return self._player
+
+    @property
+    def mpris_media_player2(self):
+        return self._media_player2
+
+    @property
+    def mpris_player_properties(self):
+        return self._player_properties
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def ext_name(self) -> str:
+        return self._ext_name
+
+    @property
+    def playback_status(self) -> str:
+        return self.get(property_name="PlaybackStatus")
+
+    @property
+    def position(self) -> int:
+        return self.get(property_name="Position")
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self.get(property_name="Metadata")
+
+    @property
+    def trackid(self) -> str:
+        return self._trackid()
+
+    def metadata_values(self, *keys: str) -> Dict[str, Any]:
+        return self._metadata_values(keys)
+
+    async def _metadata_values(self, keys: Tuple[str, ...]) -> Dict[str, Any]:
+        # The Metadata variant is left packed, only the values of keys are unpacked
+        variant = await self.mpris_player_properties.call_get(
+            "org.mpris.MediaPlayer2.Player", "Metadata"
+        )
+        return select_metadata(variant.value, keys)
+
+    async def _trackid(self) -> str:
+        values = await self.metadata_values("mpris:trackid")
+        if "mpris:trackid" in values:
+            return values["mpris:trackid"]
+        else:
+            logger().warning(
+                f"Metadata from {self.ext_name} does not contain mpris:trackid\n"
+                f"Returning an empty string instead"
+            )
+            return ""
+
+    # The capabilities are read on every access, a cached coroutine could only
+    # be awaited once.
+    @property
+    def can_control(self) -> bool:
+        return self.get(property_name="CanControl")
+
+    @property
+    def can_seek(self) -> bool:
+        return self.get(property_name="CanSeek")
+
+    @property
+    def can_pause(self) -> bool:
+        return self.get(property_name="CanPause")
+
+    @property
+    def can_play(self) -> bool:
+        return self.get(property_name="CanPlay")
@@ -1,27 +1,78 @@
 from .player import Player
-from typing import Any, Dict, List
+from .position_clock import PositionClock
+from .property_cache import PropertyCache
+from .bus_manager import BusConnectionManager
+from .signal_loop import ensure_signal_loop, install_dbus_python_main_loop
+from typing import Any, Callable, Dict, List
 from functools import cached_property
 import dbus
 from chapters.logger_config import logger
 
+install_dbus_python_main_loop()
+
 
 class Player_dbus_python(Player):
     """A convenience class whose object instances encapsulates
     an MPRIS player object and exposes a subset of
     the org.mpris.MediaPlayer2.Player interface."""
 
+    # The shared dbus.SessionBus instance is not replaced by dbus-python once it
+    # is disconnected, a private connection is opened instead.
+    bus_manager = BusConnectionManager(
+        backend_name="dbus-python",
+        connect=dbus.SessionBus,
+        is_connected=lambda bus: bus.get_is_connected(),
+        reconnect=lambda: dbus.SessionBus(private=True),
+    )
+
     @staticmethod
     def get_service_names() -> List:
-        all_service_names = dbus.SessionBus().list_names()
+        all_service_names = Player_dbus_python.bus_manager.get_bus().list_names()
         return all_service_names
 
-    def __init__(self, mpris_player_name, ext_player_name) -> None:
-        super().__init__(mpris_player_name, ext_player_name)
+    @staticmethod
+    def get_name_owner(name: str) -> str:
+        """returns: the unique bus name (:1.xx) of the owner of name"""
+        return str(Player_dbus_python.bus_manager.get_bus().get_name_owner(name))
+
+    @staticmethod
+    def subscribe_name_owner_changed(
+        handler: Callable[[str, str, str], None],
+    ) -> Callable[[], None]:
+        """Subscribes handler(name, old_owner, new_owner) to the
+        org.freedesktop.DBus.NameOwnerChanged signal.
+        returns: a function that cancels the subscription."""
+        bus = Player_dbus_python.bus_manager.get_bus()
+        signal_match = bus.add_signal_receiver(
+            handler,
+            signal_name="NameOwnerChanged",
+            dbus_interface="org.freedesktop.DBus",
+            bus_name="org.freedesktop.DBus",
+            path="/org/freedesktop/DBus",
+        )
+        return signal_match.remove
+
+    def __init__(
+        self,
+        mpris_player_name,
+        ext_player_name,
+        cached=False,
+        timeouts=None,
+        owner=None,
+    ) -> None:
+        self._cache: PropertyCache = None
+        self._signal_matches = []
+        self._name_owner_watch = None
+        super().__init__(mpris_player_name, ext_player_name, cached, timeouts, owner)
 
     def connect(self):
-        bus = dbus.SessionBus()
+        bus = Player_dbus_python.bus_manager.get_bus()
+        owner = self._bind_owner(bus)
         try:
-            self._proxy = bus.get_object(self._name, "/org/mpris/MediaPlayer2")
+            self._proxy = bus.get_object(
+                owner, "/org/mpris/MediaPlayer2", introspect=False
+            )
+            Player_dbus_python.bus_manager.register_proxy(self)
         except Exception as e:
             logger().error(f"Caught exceptio {type(e)}")
             logger().error(f"Unable to retrieve the {self._name} proxy from dbus.")
@@ -39,49 +90,100 @@ class Player_dbus_python(Player):
         self._player_properties = dbus.Interface(
             self._player, dbus_interface="org.freedesktop.DBus.Properties"
         )
+        if self._cached:
+            self._subscribe_to_signals(bus)
+
+    def _subscribe_to_signals(self, bus) -> None:
+        self._unsubscribe_from_signals()
+        if not ensure_signal_loop():
+            logger().warning(f"Property caching disabled for {self._ext_name}")
+            self._cache = None
+            return
+        if self._cache is None:
+            self._cache = PropertyCache(self._bus_get, self._bus_get_all)
+        else:
+            self._cache.clear()
+        self._signal_matches = [
+            self._proxy.connect_to_signal(
+                "PropertiesChanged",
+                self._cache.properties_changed,
+                dbus_interface="org.freedesktop.DBus.Properties",
+            ),
+            self._proxy.connect_to_signal(
+                "Seeked",
+                self._cache.seeked,
+                dbus_interface="org.mpris.MediaPlayer2.Player",
+            ),
+        ]
+        self._name_owner_watch = bus.watch_name_owner(self._name, self._cache.clear)
+
+    def _unsubscribe_from_signals(self) -> None:
+        for signal_match in self._signal_matches:
+            signal_match.remove()
+        self._signal_matches = []
+        if self._name_owner_watch is not None:
+            self._name_owner_watch.cancel()
+            self._name_owner_watch = None
+
+    def _bus_get(self, interface_name: str, property_name: str) -> Any:
+        return self._call(
+            self.mpris_player_properties.Get, "Get", interface_name, property_name
+        )
+
+    def _bus_get_all(self, interface_name: str) -> Dict[str, Any]:
+        return self._call(self.mpris_player_properties.GetAll, "GetAll", interface_name)
 
     def raise_window(self) -> None:
-        self.mpris_media_player2.Raise()
+        self._call(self.mpris_media_player2.Raise, "Raise")
 
     def play(self) -> None:
-        self.mpris_player.Play()
+        self._call(self.mpris_player.Play, "Play")
 
     def play_pause(self) -> None:
-        self.mpris_player.PlayPause()
+        self._call(self.mpris_player.PlayPause, "PlayPause")
 
     def pause(self) -> None:
-        self.mpris_player.Pause()
+        self._call(self.mpris_player.Pause, "Pause")
 
     def next(self) -> None:
-        self.mpris_player.Next()
+        self._call(self.mpris_player.Next, "Next")
 
     def previous(self) -> None:
-        self.mpris_player.Previous()
+        self._call(self.mpris_player.Previous, "Previous")
 
     def stop(self) -> None:
-        self.mpris_player.Stop()
+        self._call(self.mpris_player.Stop, "Stop")
 
+    # The proxy is not introspected, the arguments are typed for the signatures of
+    # Seek (x) and SetPosition (ox)
     def seek(self, offset: int) -> None:
-        self.mpris_player.Seek(offset)
+        self._call(
+            self.mpris_player.Seek,
+            "Seek",
+            dbus.Int64(self._corrected_seek_offset(offset)),
+        )
 
-    def set_position(self, to_position: int) -> None:
-        if self._is_object_path_valid(self.trackid):
-            self.mpris_player.SetPosition(self.trackid, to_position)
-        else:
-            logger().warning(f"The trackid returned by {self.ext_name} is not valid.")
-            logger().debug(
-                "Unable to use SetPosition(trackid,postion),"
-                " due to invalid trackid value."
-            )
-            logger().debug("Attempting to use Seek() to set the requested postion.")
-            cur_pos = self.position
-            seek_to_position = to_position - cur_pos
-            self.seek(seek_to_position)
+    def _send_set_position(self, trackid: str, to_position: int) -> None:
+        self._call(
+            self.mpris_player.SetPosition,
+            "SetPosition",
+            dbus.ObjectPath(trackid),
+            dbus.Int64(to_position),
+        )
 
     def get(
         self, property_name: str, interface_name: str = "org.mpris.MediaPlayer2.Player"
     ) -> Any:
-        return self.mpris_player_properties.Get(interface_name, property_name)
+        if self._cache is not None:
+            return self._cache.get(interface_name, property_name)
+        return self._bus_get(interface_name, property_name)
+
+    def get_all(
+        self, interface_name: str = "org.mpris.MediaPlayer2.Player"
+    ) -> Dict[str, Any]:
+        if self._cache is not None:
+            return self._cache.get_all(interface_name)
+        return self._bus_get_all(interface_name)
 
     @property
     def mpris_player(self):
@@ -103,6 +205,12 @@ class Player_dbus_python(Player):
     def ext_name(self) -> str:
         return self._ext_name
 
+    @property
+    def position_clock(self) -> PositionClock:
+        if self._cache is not None:
+            return self._cache.position_clock
+        return None
+
     @property
     def playback_status(self) -> str:
         return self.get(property_name="PlaybackStatus")
@@ -115,29 +223,18 @@ class Player_dbus_python(Player):
     def metadata(self) -> Dict[str, Any]:
         return self.get(property_name="Metadata")
 
-    @property
-    def trackid(self) -> str:
-        if "mpris:trackid" in self.metadata:
-            return self.metadata["mpris:trackid"]
-        else:
-            logger().warning(
-                f"Metadata from {self.ext_name} does not contain mpris:trackid\n"
-                f"Returning an empty string instead"
-            )
-            return ""
-
     @cached_property
     def can_control(self) -> bool:
-        return self.get(property_name="CanControl")
+        return self._capability("CanControl")
 
     @cached_property
     def can_seek(self) -> bool:
-        return self.get(property_name="CanSeek")
+        return self._capability("CanSeek")
 
     @cached_property
     def can_pause(self) -> bool:
-        return self.get(property_name="CanPause")
+        return self._capability("CanPause")
 
     @cached_property
     def can_play(self) -> bool:
-        return self.get(property_name="CanPlay")
+        return self._capability("CanPlay")
@@ -1,63 +1,285 @@
-from typing import Dict
+import os
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+from typing import Callable, Dict, Iterator, List, Tuple
 from .player import Player, PlayerConnectionError, PlayerCreationError
 from .proxy_player import PlayerProxy
+from .player_group import PlayerGroup
+from .bus_manager import BusConnectionManager
+from .call_timeouts import CallTimeouts
+from .expiring_set import ExpiringSet
+from .player_simulated import Player_simulated
+from .backend_selection import BackendSelector
 from chapters.logger_config import logger
 
 
 try:
     from .player_pydbus import Player_pydbus
 except ImportError:
-    from .player_dbus_python import Player_dbus_python
+    try:
+        from .player_dbus_python import Player_dbus_python
+    except ImportError:
+        # Only the simulated backend is available
+        pass
+
+try:
+    from .player_dbus_next import Player_dbus_next
+except ImportError:
+    pass
 
 
 class PlayerFactory:
-    unuseable_player_names = []
+    # The player backend, None for the D-Bus backend (pydbus, or dbus-python if
+    # pydbus is not installed), "pydbus" or "dbus-python" for that backend,
+    # "fastest" for the D-Bus backend measured fastest on this host (see
+    # BackendSelector) or "simulated" for Player_simulated, which has no bus.
+    # Configured with the CHAPTERS_PLAYER_BACKEND environment variable.
+    backend: str = os.environ.get("CHAPTERS_PLAYER_BACKEND")
+    backend_selector = BackendSelector()
+    # The backend chosen by backend_selector, when backend is "fastest"
+    selected_backend: str = None
+    # The unique bus names (:1.xx) of the players that failed validation. They are
+    # not validated again until their entry expires, a restarted player has a new
+    # unique name and is validated straight away.
+    unuseable_players = ExpiringSet(ttl=300.0, max_size=256)
+    # The time, in seconds, a player has to respond during discovery
+    discovery_timeout = 2.0
+    max_discovery_workers = 16
+    media_player_prefix = "org.mpris.MediaPlayer2"
+
+    @staticmethod
+    def get_backend() -> type:
+        """returns: the Player class of the configured backend"""
+        backend_name = PlayerFactory.backend
+        if backend_name == "simulated":
+            return Player_simulated
+        if backend_name == "fastest":
+            backend_name = PlayerFactory.selected_backend
+        if backend_name:
+            backends = BackendSelector.available_backends()
+            if backend_name in backends:
+                return backends[backend_name]
+            if backend_name != "fastest":
+                logger().warning(f"The {backend_name} backend is not installed")
+        try:
+            return Player_pydbus
+        except NameError:
+            pass
+        try:
+            return Player_dbus_python
+        except NameError:
+            raise PlayerCreationError("Neither pydbus nor dbus-python is installed")
+
+    @staticmethod
+    def get_bus_manager() -> BusConnectionManager:
+        """returns: the session bus connection manager of the player backend"""
+        return PlayerFactory.get_backend().bus_manager
+
+    @staticmethod
+    def get_mpris_service_names() -> List[str]:
+        """Retrieves the names of the org.mpris.MediaPlayer2.* services on the
+        dbus SessionBus."""
+        all_service_names = PlayerFactory.get_backend().get_service_names()
+        return [
+            str(service)
+            for service in all_service_names
+            if PlayerFactory.media_player_prefix in service
+        ]
 
     @staticmethod
-    def get_running_player_names() -> Dict[str, str]:
+    def get_name_owner(service_name: str) -> str:
+        """returns: the unique bus name (:1.xx) of the owner of service_name"""
+        return PlayerFactory.get_backend().get_name_owner(service_name)
+
+    @staticmethod
+    def subscribe_name_owner_changed(
+        handler: Callable[[str, str, str], None],
+    ) -> Callable[[], None]:
+        """Subscribes handler(name, old_owner, new_owner) to the NameOwnerChanged
+        signal of the dbus SessionBus.
+        returns: a function that cancels the subscription."""
+        return PlayerFactory.get_backend().subscribe_name_owner_changed(handler)
+
+    @staticmethod
+    def _probe_player(
+        fq_player_name: str, short_player_name: str, owner: str = None
+    ) -> None:
+        # Not all org.mpris.MediaPlayer2 instances are useable
+        # Attempting (relatively cheap) player creation to
+        # exclude unusable players. The player shares the backend's bus
+        # connection and is released as soon as the probe completes. The owner,
+        # when given, is not resolved again.
+        PlayerFactory._create_player(fq_player_name, short_player_name, owner=owner)
+
+    @staticmethod
+    def _validate_player(fq_player_name: str, short_player_name: str) -> bool:
+        """Probes the player unless its owner is known to be unuseable.
+        returns: whether the player is useable."""
+        try:
+            owner = PlayerFactory.get_name_owner(fq_player_name)
+        except Exception as e:
+            logger().debug(f"{fq_player_name} has no owner, it may have exited: {e}")
+            return False
+        if owner in PlayerFactory.unuseable_players:
+            return False
+        try:
+            PlayerFactory._probe_player(fq_player_name, short_player_name, owner)
+        except PlayerCreationError:
+            PlayerFactory.unuseable_players.add(owner)
+            return False
+        return True
+
+    @staticmethod
+    def iter_running_player_names(
+        timeout: float = None,
+    ) -> Iterator[Tuple[str, str]]:
+        """Validates the running MPRIS D-Bus enabled players concurrently and yields
+        the names of the useable ones as soon as their validation completes.
+        Players that do not respond within timeout seconds (default
+        PlayerFactory.discovery_timeout) are skipped.
+        yields: tuples of the unqualified and the fully qualified player name."""
+        return PlayerFactory._validate_players(
+            PlayerFactory.get_mpris_service_names(), timeout
+        )
+
+    @staticmethod
+    def _validate_players(
+        service_names: List[str], timeout: float = None
+    ) -> Iterator[Tuple[str, str]]:
+        if timeout is None:
+            timeout = PlayerFactory.discovery_timeout
+        if not service_names:
+            return
+        prefix_len = len(PlayerFactory.media_player_prefix)
+        executor = ThreadPoolExecutor(
+            max_workers=min(len(service_names), PlayerFactory.max_discovery_workers),
+            thread_name_prefix="player-discovery",
+        )
+        futures = {}
+        for service in service_names:
+            service_suffix = service[prefix_len + 1 :]
+            future = executor.submit(
+                PlayerFactory._validate_player, service, service_suffix
+            )
+            futures[future] = (service_suffix, service)
+        # All probes run at the same time unless there are more services than
+        # workers, in which case the later probes are given extra time.
+        n_rounds = -(-len(service_names) // PlayerFactory.max_discovery_workers)
+        try:
+            for future in as_completed(futures, timeout=timeout * n_rounds):
+                service_suffix, service = futures[future]
+                if future.result():
+                    yield service_suffix, service
+        except TimeoutError:
+            for future, (_, service) in futures.items():
+                if not future.done():
+                    logger().warning(
+                        f"{service} did not respond within {timeout} seconds,"
+                        " skipping it"
+                    )
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def get_running_player_names(timeout: float = None) -> Dict[str, str]:
         """Retrieves media player instances names of currently running
         MPRIS D-Bus enabled players, from the dbus SessionBus.
         returns: a dictionary. The dictionary key is the unqualified
-        player instance name and value is the fully qualified player name."""
+        player instance name and value is the fully qualified player name.
+        The players are in the order in which the SessionBus lists them."""
 
+        service_names = PlayerFactory.get_mpris_service_names()
+        useable_services = {
+            service
+            for _, service in PlayerFactory._validate_players(service_names, timeout)
+        }
+        prefix_len = len(PlayerFactory.media_player_prefix)
         running_player_names = {}
-        media_player_prefix = "org.mpris.MediaPlayer2"
-        media_player_prefix_len = len(media_player_prefix)
-        try:
-            all_service_names = Player_pydbus.get_service_names()
-        except NameError:
-            all_service_names = Player_dbus_python.get_service_names()
-            logger().info("Retrieved running services with dbus-python")
-
-        for service in all_service_names:
-            if media_player_prefix in service:
-                if service in PlayerFactory.unuseable_player_names:
-                    continue
-                service_suffix = service[media_player_prefix_len + 1 :]
-                try:
-                    # Not all org.mpris.MediaPlayer2 instances are useable
-                    # Attempting (relatively cheap) player creation to
-                    # exclude unusable players
-                    PlayerFactory.get_player(str(service), service_suffix)
-                    running_player_names[service_suffix] = str(service)
-                except PlayerCreationError:
-                    PlayerFactory.unuseable_player_names.append(str(service))
+        for service in service_names:
+            if service in useable_services:
+                running_player_names[service[prefix_len + 1 :]] = service
         return running_player_names
 
     @staticmethod
-    def get_player(fq_player_name, short_player_name) -> Player:
+    def get_player(
+        fq_player_name, short_player_name, cached=False, timeouts=None
+    ) -> Player:
+        """Creates a player for the fully qualified player name.
+        When cached is True, the player serves property reads from a cache that is
+        kept up to date by the player's PropertiesChanged and Seeked signals.
+        timeouts is a CallTimeouts that bounds each D-Bus call the player makes,
+        the CallTimeouts defaults are used when it is None."""
+        PlayerFactory.select_backend(fq_player_name, short_player_name, timeouts)
+        return PlayerFactory._create_player(
+            fq_player_name, short_player_name, cached, timeouts
+        )
+
+    @staticmethod
+    def select_backend(
+        fq_player_name: str, short_player_name: str, timeouts: CallTimeouts = None
+    ) -> None:
+        """Chooses the fastest D-Bus backend, measured against the player with
+        timeouts, the first time a player is connected to when backend is
+        "fastest"."""
+        if PlayerFactory.backend != "fastest" or PlayerFactory.selected_backend:
+            return
+        PlayerFactory.selected_backend = PlayerFactory.backend_selector.select(
+            fq_player_name, short_player_name, timeouts=timeouts
+        )
+
+    @staticmethod
+    def _create_player(
+        fq_player_name, short_player_name, cached=False, timeouts=None, owner=None
+    ) -> Player:
         try:
-            type(Player_pydbus)
-            logger().debug("Creating a Player_pydbus instance.")
-            player = Player_pydbus(fq_player_name, short_player_name)
-            return PlayerProxy(player)
-        except (NameError, KeyError):
-            logger().debug("Creating a Player_dbus_python instance.")
-            player = Player_dbus_python(fq_player_name, short_player_name)
+            backend = PlayerFactory.get_backend()
+            logger().debug(f"Creating a {backend.__name__} instance.")
+            player = backend(fq_player_name, short_player_name, cached, timeouts, owner)
             return PlayerProxy(player)
+        except PlayerCreationError:
+            raise
+        except PlayerConnectionError as per:
+            raise PlayerCreationError(per)
+        except Exception as e:
+            logger().error(type(e))
+            logger().error(e)
+            raise PlayerCreationError(e)
+
+    @staticmethod
+    def get_player_group(
+        player_names: Dict[str, str], cached=False, timeouts=None
+    ) -> PlayerGroup:
+        """Creates a group of the players in player_names, a dictionary of short
+        player names to fully qualified player names, in that order. Players that
+        cannot be created are left out of the group.
+        raises: PlayerCreationError if none of the players can be created."""
+        members = []
+        for short_player_name, fq_player_name in player_names.items():
+            try:
+                members.append(
+                    PlayerFactory.get_player(
+                        fq_player_name, short_player_name, cached, timeouts
+                    )
+                )
+            except PlayerCreationError as e:
+                logger().error(e)
+        if not members:
+            raise PlayerCreationError("None of the players could be connected to.")
+        return PlayerGroup(members)
+
+    @staticmethod
+    async def get_async_player(fq_player_name, short_player_name) -> Player:
+        """Creates and connects an asyncio based player (Player_dbus_next).
+        The player is not wrapped in a PlayerProxy, its methods are coroutines."""
+        try:
+            player = Player_dbus_next(fq_player_name, short_player_name)
+        except NameError:
+            raise PlayerCreationError("dbus-next is required for asyncio based players")
+        try:
+            await player.connect()
         except PlayerConnectionError as per:
             raise PlayerCreationError(per)
         except Exception as e:
             logger().error(type(e))
             logger().error(e)
             raise PlayerCreationError(e)
+        return player
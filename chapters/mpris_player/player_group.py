@@ -0,0 +1,266 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import cached_property
+from typing import Any, Callable, Dict, List, Tuple
+from chapters.logger_config import logger
+from .player import Player, PlayerState
+
+
+class GroupCommandReport:
+    """The outcome of a command sent to every member of a PlayerGroup.
+    positions holds the position, in microseconds, that each member reported after
+    the command and failures the exception raised by the members the command or
+    the position read failed for, both keyed by the member's ext_name."""
+
+    __slots__ = ("command", "elapsed", "positions", "failures")
+
+    def __init__(
+        self,
+        command: str,
+        elapsed: float,
+        positions: Dict[str, int],
+        failures: Dict[str, Exception],
+    ) -> None:
+        self.command = command
+        self.elapsed = elapsed
+        self.positions = positions
+        self.failures = failures
+
+    @property
+    def spread(self) -> int:
+        """How far apart, in microseconds, the members landed"""
+        if not self.positions:
+            return 0
+        return max(self.positions.values()) - min(self.positions.values())
+
+    def __repr__(self) -> str:
+        return (
+            f"GroupCommandReport({self.command}, elapsed={self.elapsed * 1000:.1f}ms,"
+            f" spread={self.spread / 1000:.1f}ms, positions={self.positions},"
+            f" failures={list(self.failures)})"
+        )
+
+
+class PlayerGroup(Player):
+    """Controls several players as one, e.g. the same lecture playing in a local
+    player and on a second screen.
+
+    Commands are sent to all members concurrently, so a group command takes about
+    one round trip to the slowest member rather than one round trip per member.
+    After set_position, seek and play_pause the members' positions are read back,
+    again concurrently, and the resulting GroupCommandReport, which tells how far
+    apart the members landed, is passed to the report listeners.
+
+    Properties such as position and metadata are read from the first member, the
+    leader. A command fails only if it fails for every member, failures of some
+    members are logged and reported."""
+
+    def __init__(self, members: List[Player]) -> None:
+        if not members:
+            raise ValueError("A player group needs at least one member")
+        self._members = list(members)
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(self._members), thread_name_prefix="player-group"
+        )
+        self._report_listeners: List[Callable[[GroupCommandReport], None]] = []
+        self._last_report: GroupCommandReport = None
+        # The members are already connected, Player.__init__ would connect them
+        # again
+        self._ext_name = "+".join(member.ext_name for member in self._members)
+        self._name = f"group:{self._ext_name}"
+
+    @property
+    def members(self) -> List[Player]:
+        return list(self._members)
+
+    @property
+    def leader(self) -> Player:
+        return self._members[0]
+
+    @property
+    def last_report(self) -> GroupCommandReport:
+        return self._last_report
+
+    def add_report_listener(
+        self, listener: Callable[[GroupCommandReport], None]
+    ) -> None:
+        """listener is called, from the thread that sent the command, with the
+        GroupCommandReport of each set_position, seek and play_pause"""
+        self._report_listeners.append(listener)
+
+    def _fan_out(self, command: Callable[[Player], Any]) -> Dict[str, Any]:
+        """Runs command for every member concurrently and waits for all of them.
+        :returns: the results and the exceptions, keyed by member ext_name"""
+        futures = {
+            member.ext_name: self._executor.submit(command, member)
+            for member in self._members
+        }
+        wait(futures.values())
+        outcomes = {}
+        for ext_name, future in futures.items():
+            error = future.exception()
+            outcomes[ext_name] = error if error else future.result()
+        return outcomes
+
+    def _send(
+        self, command_name: str, command: Callable[[Player], Any]
+    ) -> Tuple[float, Dict[str, Exception]]:
+        """Sends command to every member.
+        :returns: the wall clock time it took, in seconds, and the exceptions of
+        the members it failed for
+        :raises: the exception of the first member if the command failed for all
+        members."""
+        start = time.perf_counter()
+        outcomes = self._fan_out(command)
+        elapsed = time.perf_counter() - start
+        failures = {
+            ext_name: outcome
+            for ext_name, outcome in outcomes.items()
+            if isinstance(outcome, Exception)
+        }
+        for ext_name, error in failures.items():
+            logger().warning(f"{command_name} failed for {ext_name}: {error}")
+        if len(failures) == len(self._members):
+            raise failures[self.leader.ext_name]
+        return elapsed, failures
+
+    def _send_and_report(
+        self, command_name: str, command: Callable[[Player], Any]
+    ) -> GroupCommandReport:
+        elapsed, failures = self._send(command_name, command)
+        # A cached member's clock extrapolates its position from before the
+        # command until the member's Seeked signal arrives
+        outcomes = self._fan_out(lambda member: member.retrieve_position())
+        positions = {}
+        for ext_name, outcome in outcomes.items():
+            if ext_name in failures:
+                continue
+            if isinstance(outcome, Exception):
+                failures[ext_name] = outcome
+            elif outcome is not None:
+                positions[ext_name] = outcome
+        report = GroupCommandReport(command_name, elapsed, positions, failures)
+        self._last_report = report
+        logger().debug(report)
+        for listener in self._report_listeners:
+            listener(report)
+        return report
+
+    def connect(self):
+        self._fan_out(lambda member: member.connect())
+
+    def close(self) -> None:
+        """Stops the threads the commands are sent to the members from. The group
+        cannot send commands afterwards."""
+        self._executor.shutdown(wait=False)
+
+    def raise_window(self) -> None:
+        self.leader.raise_window()
+
+    def play(self) -> None:
+        self._send("play", lambda member: member.play())
+
+    def play_pause(self) -> None:
+        self._send_and_report("play_pause", lambda member: member.play_pause())
+
+    def pause(self) -> None:
+        self._send("pause", lambda member: member.pause())
+
+    def next(self) -> None:
+        self._send("next", lambda member: member.next())
+
+    def previous(self) -> None:
+        self._send("previous", lambda member: member.previous())
+
+    def stop(self) -> None:
+        self._send("stop", lambda member: member.stop())
+
+    def seek(self, offset: int) -> None:
+        self._send_and_report("seek", lambda member: member.seek(offset))
+
+    def set_position(self, to_position: int) -> None:
+        self._send_and_report(
+            "set_position", lambda member: member.set_position(to_position)
+        )
+
+    def get(self, interface_name: str, property_name: str) -> Any:
+        return self.leader.get(
+            interface_name=interface_name, property_name=property_name
+        )
+
+    def get_all(
+        self, interface_name: str = "org.mpris.MediaPlayer2.Player"
+    ) -> Dict[str, Any]:
+        return self.leader.get_all(interface_name)
+
+    def snapshot(self) -> PlayerState:
+        return self.leader.snapshot()
+
+    def add_track_listener(self, listener: Callable[[Dict[str, Any]], None]) -> bool:
+        return self.leader.add_track_listener(listener)
+
+    @property
+    def mpris_player(self) -> Any:
+        return self.leader.mpris_player
+
+    @property
+    def mpris_media_player2(self) -> Any:
+        return self.leader.mpris_media_player2
+
+    @property
+    def mpris_player_properties(self) -> Any:
+        return self.leader.mpris_player_properties
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def ext_name(self) -> str:
+        return self._ext_name
+
+    @property
+    def cached(self) -> bool:
+        return self.leader.cached
+
+    @property
+    def position_clock(self):
+        return self.leader.position_clock
+
+    @property
+    def playback_status(self) -> str:
+        return self.leader.playback_status
+
+    @property
+    def position(self) -> int:
+        return self.leader.position
+
+    def retrieve_position(self) -> int:
+        return self.leader.retrieve_position()
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self.leader.metadata
+
+    def metadata_values(self, *keys: str) -> Dict[str, Any]:
+        return self.leader.metadata_values(*keys)
+
+    @property
+    def trackid(self) -> str:
+        return self.leader.trackid
+
+    @cached_property
+    def can_control(self) -> bool:
+        return all(member.can_control for member in self._members)
+
+    @cached_property
+    def can_seek(self) -> bool:
+        return all(member.can_seek for member in self._members)
+
+    @cached_property
+    def can_pause(self) -> bool:
+        return all(member.can_pause for member in self._members)
+
+    @cached_property
+    def can_play(self) -> bool:
+        return all(member.can_play for member in self._members)
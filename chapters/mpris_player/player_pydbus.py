@@ -1,6 +1,12 @@
+from .metadata import decode
 from .player import Player, PlayerConnectionError
+from .position_clock import PositionClock
+from .property_cache import PropertyCache
+from .bus_manager import BusConnectionManager
+from .signal_loop import ensure_signal_loop
 import pydbus
-from typing import Any, Dict, List
+from gi.repository import GLib
+from typing import Any, Callable, Dict, List
 from functools import cached_property
 from chapters.logger_config import logger
 
@@ -10,9 +16,15 @@ class Player_pydbus(Player):
     an MPRIS player object and exposes a subset of
     the org.mpris.MediaPlayer2.Player interface."""
 
+    bus_manager = BusConnectionManager(
+        backend_name="pydbus",
+        connect=pydbus.SessionBus,
+        is_connected=lambda bus: not bus.con.is_closed(),
+    )
+
     @staticmethod
     def get_service_names() -> List:
-        bus = pydbus.SessionBus()
+        bus = Player_pydbus.bus_manager.get_bus()
         remote_object = bus.get(
             "org.freedesktop.DBus",  # Bus name
             "/org/freedesktop/DBus",  # Object path
@@ -20,13 +32,51 @@ class Player_pydbus(Player):
         all_service_names = remote_object.ListNames()
         return all_service_names
 
-    def __init__(self, mpris_player_name, ext_player_name) -> None:
-        super().__init__(mpris_player_name, ext_player_name)
+    @staticmethod
+    def get_name_owner(name: str) -> str:
+        """returns: the unique bus name (:1.xx) of the owner of name"""
+        bus = Player_pydbus.bus_manager.get_bus()
+        return str(bus.dbus.GetNameOwner(name))
+
+    @staticmethod
+    def subscribe_name_owner_changed(
+        handler: Callable[[str, str, str], None],
+    ) -> Callable[[], None]:
+        """Subscribes handler(name, old_owner, new_owner) to the
+        org.freedesktop.DBus.NameOwnerChanged signal.
+        returns: a function that cancels the subscription."""
+        bus = Player_pydbus.bus_manager.get_bus()
+        subscription = bus.subscribe(
+            sender="org.freedesktop.DBus",
+            iface="org.freedesktop.DBus",
+            signal="NameOwnerChanged",
+            signal_fired=lambda sender, object, iface, signal, params: handler(*params),
+        )
+        return subscription.unsubscribe
+
+    def __init__(
+        self,
+        mpris_player_name,
+        ext_player_name,
+        cached=False,
+        timeouts=None,
+        owner=None,
+    ) -> None:
+        self._cache: PropertyCache = None
+        self._signal_subscriptions = []
+        self._name_watcher = None
+        super().__init__(mpris_player_name, ext_player_name, cached, timeouts, owner)
 
     def connect(self):
-        bus = pydbus.SessionBus()
+        bus = Player_pydbus.bus_manager.get_bus()
+        owner = self._bind_owner(bus)
         try:
-            self._proxy = bus.get(self._name, "/org/mpris/MediaPlayer2")
+            self._proxy = bus.get(
+                owner,
+                "/org/mpris/MediaPlayer2",
+                timeout=self._timeouts.timeout("Introspect"),
+            )
+            Player_pydbus.bus_manager.register_proxy(self)
         except KeyError as e:
             logger().error(e)
             logger().error(f"Unable to retrieve the {self._name} proxy from dbus.")
@@ -34,49 +84,108 @@ class Player_pydbus(Player):
                 f"Unable to connect to {self._ext_name},"
                 f" check if {self._ext_name} it is running."
             )
+        if self._cached:
+            self._subscribe_to_signals(bus)
+
+    def _subscribe_to_signals(self, bus) -> None:
+        self._unsubscribe_from_signals()
+        if not ensure_signal_loop():
+            logger().warning(f"Property caching disabled for {self._ext_name}")
+            self._cache = None
+            return
+        if self._cache is None:
+            self._cache = PropertyCache(self._bus_get, self._bus_get_all)
+        else:
+            self._cache.clear()
+        self._signal_subscriptions = [
+            self._proxy.PropertiesChanged.connect(self._cache.properties_changed),
+            self._proxy.Seeked.connect(self._cache.seeked),
+        ]
+        self._name_watcher = bus.watch_name(self._name, name_vanished=self._cache.clear)
+
+    def _unsubscribe_from_signals(self) -> None:
+        for subscription in self._signal_subscriptions:
+            subscription.disconnect()
+        self._signal_subscriptions = []
+        if self._name_watcher is not None:
+            self._name_watcher.unwatch()
+            self._name_watcher = None
+
+    def _bus_get(self, interface_name: str, property_name: str) -> Any:
+        return self._call(
+            self.mpris_player_properties.Get, "Get", interface_name, property_name
+        )
+
+    def _bus_get_all(self, interface_name: str) -> Dict[str, Any]:
+        return self._call(self.mpris_player_properties.GetAll, "GetAll", interface_name)
+
+    def _bus_get_variant(
+        self, interface_name: str, property_name: str, timeout: float
+    ) -> GLib.Variant:
+        # pydbus unpacks the values it receives into Python values, Gio leaves
+        # them packed
+        bus = Player_pydbus.bus_manager.get_bus()
+        reply = bus.con.call_sync(
+            self._owner or self._name,
+            "/org/mpris/MediaPlayer2",
+            "org.freedesktop.DBus.Properties",
+            "Get",
+            GLib.Variant("(ss)", (interface_name, property_name)),
+            GLib.VariantType.new("(v)"),
+            0,
+            int(timeout * 1000),
+            None,
+        )
+        return reply.get_child_value(0).get_variant()
+
+    def metadata_values(self, *keys: str) -> Dict[str, Any]:
+        if self._cache is not None:
+            return super().metadata_values(*keys)
+        metadata = self._call(
+            self._bus_get_variant, "Get", "org.mpris.MediaPlayer2.Player", "Metadata"
+        )
+        values = {}
+        for key in keys:
+            value = metadata.lookup_value(key, None)
+            if value is not None:
+                values[key] = decode(value)
+        return values
 
     def get(
         self, property_name: str, interface_name="org.mpris.MediaPlayer2.Player"
     ) -> Any:
-        return self.mpris_player_properties.Get(interface_name, property_name)
+        if self._cache is not None:
+            return self._cache.get(interface_name, property_name)
+        return self._bus_get(interface_name, property_name)
+
+    def get_all(self, interface_name="org.mpris.MediaPlayer2.Player") -> Dict[str, Any]:
+        if self._cache is not None:
+            return self._cache.get_all(interface_name)
+        return self._bus_get_all(interface_name)
 
     def raise_window(self) -> None:
-        self.mpris_media_player2.Raise()
+        self._call(self.mpris_media_player2.Raise, "Raise")
 
     def play(self) -> None:
-        self.mpris_player.Play()
+        self._call(self.mpris_player.Play, "Play")
 
     def play_pause(self) -> None:
-        self.mpris_player.PlayPause()
+        self._call(self.mpris_player.PlayPause, "PlayPause")
 
     def pause(self) -> None:
-        self.mpris_player.Pause()
+        self._call(self.mpris_player.Pause, "Pause")
 
     def next(self) -> None:
-        self.mpris_player.Next()
+        self._call(self.mpris_player.Next, "Next")
 
     def previous(self) -> None:
-        self.mpris_player.Previous()
+        self._call(self.mpris_player.Previous, "Previous")
 
     def stop(self) -> None:
-        self.mpris_player.Stop()
+        self._call(self.mpris_player.Stop, "Stop")
 
     def seek(self, offset: int) -> None:
-        self.mpris_player.Seek(offset)
-
-    def set_position(self, to_position: int) -> None:
-        if self._is_object_path_valid(self.trackid):
-            self.mpris_player.SetPosition(self.trackid, to_position)
-        else:
-            logger().warning(f"The trackid returned by {self.ext_name} is not valid.")
-            logger().debug(
-                "Unable to use SetPosition(trackid,postion),"
-                " due to invalid trackid value."
-            )
-            logger().debug("Attempting to use Seek() to set the requested postion.")
-            cur_pos = self.position
-            seek_to_position = to_position - cur_pos
-            self.seek(seek_to_position)
+        self._call(self.mpris_player.Seek, "Seek", self._corrected_seek_offset(offset))
 
     @property
     def mpris_player(self):
@@ -98,6 +207,12 @@ class Player_pydbus(Player):
     def ext_name(self) -> str:
         return self._ext_name
 
+    @property
+    def position_clock(self) -> PositionClock:
+        if self._cache is not None:
+            return self._cache.position_clock
+        return None
+
     @property
     def playback_status(self) -> str:
         return self.get(property_name="PlaybackStatus")
@@ -110,29 +225,18 @@ class Player_pydbus(Player):
     def metadata(self) -> Dict[str, Any]:
         return self.get(property_name="Metadata")
 
-    @property
-    def trackid(self) -> str:
-        if "mpris:trackid" in self.metadata:
-            return self.metadata["mpris:trackid"]
-        else:
-            logger().warning(
-                f"Metadata from {self.ext_name} does not contain mpris:trackid\n"
-                f"Returning an empty string instead"
-            )
-            return ""
-
     @cached_property
     def can_control(self) -> bool:
-        return self.get(property_name="CanControl")
+        return self._capability("CanControl")
 
     @cached_property
     def can_seek(self) -> bool:
-        return self.get(property_name="CanSeek")
+        return self._capability("CanSeek")
 
     @cached_property
     def can_pause(self) -> bool:
-        return self.get(property_name="CanPause")
+        return self._capability("CanPause")
 
     @cached_property
     def can_play(self) -> bool:
-        return self.get(property_name="CanPlay")
+        return self._capability("CanPlay")
@@ -0,0 +1,166 @@
+import threading
+from typing import Callable, Dict, List, Tuple
+from .player_factory import PlayerFactory
+from .signal_loop import ensure_signal_loop
+from chapters.logger_config import logger
+
+
+class PlayerRegistry:
+    """A long lived, ordered list of the useable MPRIS players on the SessionBus.
+
+    The registry is seeded once with PlayerFactory.get_running_player_names and
+    then tracks the org.mpris.MediaPlayer2.* names incrementally via the
+    NameOwnerChanged signal. Players that appear are validated in the
+    background before they are added, so reading the registry, including
+    cycling through the players, never causes bus traffic.
+
+    If D-Bus signals cannot be received, every read of player_names falls back
+    to a full discovery."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._player_names: List[str] = []
+        self._fq_player_names: Dict[str, str] = {}
+        self._indices: Dict[str, int] = {}
+        self._unsubscribe: Callable[[], None] = None
+        self._listeners: List[Callable[[], None]] = []
+        # The players added (fq name) and removed (None) by NameOwnerChanged while
+        # a refresh is discovering the players, None when no refresh is running
+        self._changes_during_refresh: List[Tuple[str, str | None]] = None
+
+    @property
+    def live(self) -> bool:
+        """True if the registry is kept up to date by NameOwnerChanged signals"""
+        return self._unsubscribe is not None
+
+    def start(self) -> None:
+        if self.live:
+            return
+        if not PlayerFactory.get_backend().needs_signal_loop or ensure_signal_loop():
+            try:
+                self._unsubscribe = PlayerFactory.subscribe_name_owner_changed(
+                    self._name_owner_changed
+                )
+            except Exception as e:
+                logger().warning("Unable to subscribe to NameOwnerChanged")
+                logger().warning(e)
+        # Subscribing before seeding ensures no player changes are missed, the
+        # changes signalled during the seeding are applied on top of it
+        self.refresh()
+
+    def stop(self) -> None:
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    def refresh(self) -> None:
+        """Rebuilds the registry from a full discovery of the running players.
+        Players added or removed while the discovery runs are added or removed
+        from its result."""
+        with self._lock:
+            self._changes_during_refresh = []
+        try:
+            running_player_names = PlayerFactory.get_running_player_names()
+        except Exception:
+            with self._lock:
+                self._changes_during_refresh = None
+            raise
+        with self._lock:
+            fq_player_names = dict(running_player_names)
+            for player_name, fq_name in self._changes_during_refresh:
+                if fq_name is None:
+                    fq_player_names.pop(player_name, None)
+                else:
+                    fq_player_names.setdefault(player_name, fq_name)
+            self._changes_during_refresh = None
+            self._player_names = list(fq_player_names.keys())
+            self._fq_player_names = fq_player_names
+            self._reindex()
+        self._notify_listeners()
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """Registers a function that is called, without arguments, whenever the
+        registered players change. Listeners may be called from a background
+        thread."""
+        self._listeners.append(listener)
+
+    def _notify_listeners(self) -> None:
+        for listener in self._listeners:
+            listener()
+
+    def _reindex(self) -> None:
+        self._indices = {name: i for i, name in enumerate(self._player_names)}
+
+    def _name_owner_changed(self, name: str, old_owner: str, new_owner: str) -> None:
+        name = str(name)
+        if not name.startswith(PlayerFactory.media_player_prefix + "."):
+            return
+        if old_owner:
+            self._remove(name)
+        if new_owner:
+            threading.Thread(
+                target=self._validate_and_add, args=(name,), daemon=True
+            ).start()
+
+    def _validate_and_add(self, fq_player_name: str) -> None:
+        for player_name, fq_name in PlayerFactory._validate_players([fq_player_name]):
+            with self._lock:
+                if self._changes_during_refresh is not None:
+                    self._changes_during_refresh.append((player_name, fq_name))
+                if player_name in self._indices:
+                    continue
+                self._player_names.append(player_name)
+                self._fq_player_names[player_name] = fq_name
+                self._indices[player_name] = len(self._player_names) - 1
+            logger().debug(f"{player_name} added to the player registry")
+            self._notify_listeners()
+
+    def _remove(self, fq_player_name: str) -> None:
+        player_name = fq_player_name[len(PlayerFactory.media_player_prefix) + 1 :]
+        with self._lock:
+            if self._changes_during_refresh is not None:
+                self._changes_during_refresh.append((player_name, None))
+            if player_name not in self._indices:
+                return
+            self._player_names.remove(player_name)
+            del self._fq_player_names[player_name]
+            self._reindex()
+        logger().debug(f"{player_name} removed from the player registry")
+        self._notify_listeners()
+
+    def player_names(self) -> Dict[str, str]:
+        """returns: a dictionary of the useable players, in registration order.
+        The dictionary key is the unqualified player instance name and value is
+        the fully qualified player name."""
+        if not self.live:
+            self.refresh()
+        with self._lock:
+            return dict(self._fq_player_names)
+
+    def __len__(self) -> int:
+        return len(self._player_names)
+
+    def _neighbour(self, player_name: str, step: int) -> str | None:
+        with self._lock:
+            if not self._player_names:
+                return None
+            index = self._indices.get(player_name)
+            if index is None:
+                return self._player_names[0]
+            return self._player_names[(index + step) % len(self._player_names)]
+
+    def next_player_name(self, player_name: str) -> str | None:
+        """returns: the player after player_name, wrapping around to the first
+        player. The first player if player_name is not registered and None if no
+        players are registered."""
+        return self._neighbour(player_name, 1)
+
+    def previous_player_name(self, player_name: str) -> str | None:
+        """returns: the player before player_name, wrapping around to the last
+        player. The first player if player_name is not registered and None if no
+        players are registered."""
+        return self._neighbour(player_name, -1)
+
+    def fq_player_name(self, player_name: str) -> str | None:
+        with self._lock:
+            return self._fq_player_names.get(player_name)
@@ -0,0 +1,435 @@
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List
+from functools import cached_property
+from .player import Player
+from .position_clock import PositionClock
+from .property_cache import PropertyCache, PLAYER_INTERFACE
+from .bus_manager import BusConnectionManager
+from .capability_cache import MEDIA_PLAYER2_INTERFACE
+
+
+def constant_latency(seconds: float) -> Callable[[], float]:
+    return lambda: seconds
+
+
+def uniform_latency(
+    mean: float, jitter: float, rng: random.Random = None
+) -> Callable[[], float]:
+    """Latencies uniformly distributed in [mean - jitter, mean + jitter]"""
+    rng = rng if rng else random.Random(0)
+    return lambda: max(0.0, rng.uniform(mean - jitter, mean + jitter))
+
+
+def lognormal_latency(
+    median: float, sigma: float, rng: random.Random = None
+) -> Callable[[], float]:
+    """Latencies with the long tail of real IPC, median seconds in the middle"""
+    rng = rng if rng else random.Random(0)
+    return lambda: median * rng.lognormvariate(0.0, sigma)
+
+
+class SimulatedDBusError(Exception):
+    """Raised by simulated calls that fail, carries a D-Bus error name so that the
+    failure is classified like a real D-Bus error"""
+
+    def __init__(self, dbus_name: str, message: str = "") -> None:
+        super().__init__(f"{dbus_name}: {message}")
+        self._dbus_name = dbus_name
+
+    def get_dbus_name(self) -> str:
+        return self._dbus_name
+
+
+class SimulatedMediaPlayer:
+    """The remote end of a simulated player: the playback state of a media player
+    and the cost of calling it.
+
+    The position advances in real time while playing. Seek and SetPosition follow
+    the MPRIS specification: seeking before the start moves to the start, seeking
+    past the end of the track moves to the next track and SetPosition calls with
+    a stale trackid or a position outside the track are ignored. Both land
+    landing_error microseconds away from the requested position, like a player
+    that seeks to the nearest keyframe.
+
+    Each call first draws a latency from the latency distribution, e.g.
+    uniform_latency(0.002, 0.001), and sleeps for it. A call whose latency exceeds
+    the caller's timeout fails with NoReply after the timeout. A call fails with
+    ServiceUnknown while the player is crashed, and with failure_error for a
+    failure_rate share of calls. The sleep is injectable, so that benchmarks can
+    account the simulated IPC time (ipc_time) without waiting for it."""
+
+    def __init__(
+        self,
+        identity: str,
+        latency: Callable[[], float] = constant_latency(0.0),
+        trackid: str = "/org/mpris/MediaPlayer2/Track/1",
+        length: int = 3600 * 1_000_000,
+        failure_rate: float = 0.0,
+        failure_error: str = "org.freedesktop.DBus.Error.Failed",
+        landing_error: int = 0,
+        rng: random.Random = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.identity = identity
+        self.latency = latency
+        self.trackid = trackid
+        self.length = length
+        self.failure_rate = failure_rate
+        self.failure_error = failure_error
+        self.landing_error = landing_error
+        self.crashed = False
+        self.calls = 0
+        self.ipc_time = 0.0
+        self._rng = rng if rng else random.Random(0)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._status = "Paused"
+        self._position = 0
+        self._anchor = clock()
+        self._track = 1
+        self._properties_changed_handlers: List[Callable] = []
+        self._seeked_handlers: List[Callable] = []
+
+    def _round_trip(self, method_name: str, timeout: float = None) -> None:
+        latency = self.latency()
+        with self._lock:
+            self.calls += 1
+            self.ipc_time += latency if timeout is None else min(latency, timeout)
+        if timeout is not None and latency > timeout:
+            self._sleep(timeout)
+            raise SimulatedDBusError(
+                "org.freedesktop.DBus.Error.NoReply",
+                f"{method_name} did not receive a reply",
+            )
+        self._sleep(latency)
+        if self.crashed:
+            raise SimulatedDBusError(
+                "org.freedesktop.DBus.Error.ServiceUnknown",
+                f"The name {self.identity} is not owned",
+            )
+        if self.failure_rate and self._rng.random() < self.failure_rate:
+            raise SimulatedDBusError(self.failure_error, f"{method_name} failed")
+
+    def subscribe(
+        self, properties_changed: Callable, seeked: Callable
+    ) -> Callable[[], None]:
+        """Subscribes to the player's PropertiesChanged and Seeked signals,
+        which are emitted synchronously.
+        returns: a function that cancels the subscription."""
+        self._properties_changed_handlers.append(properties_changed)
+        self._seeked_handlers.append(seeked)
+
+        def unsubscribe():
+            self._properties_changed_handlers.remove(properties_changed)
+            self._seeked_handlers.remove(seeked)
+
+        return unsubscribe
+
+    def _emit_properties_changed(self, changed_properties: Dict[str, Any]) -> None:
+        for handler in list(self._properties_changed_handlers):
+            handler(PLAYER_INTERFACE, changed_properties, [])
+
+    def _emit_seeked(self) -> None:
+        position = self.current_position()
+        for handler in list(self._seeked_handlers):
+            handler(position)
+
+    def current_position(self) -> int:
+        position = self._position
+        if self._status == "Playing":
+            position += int((self._clock() - self._anchor) * 1_000_000)
+        return min(position, self.length)
+
+    def _move_to(self, position: int) -> None:
+        self._position = position
+        self._anchor = self._clock()
+
+    def _set_status(self, status: str) -> None:
+        self._move_to(self.current_position())
+        self._status = status
+        self._emit_properties_changed({"PlaybackStatus": status})
+
+    def _change_track(self, step: int) -> None:
+        self._track = max(1, self._track + step)
+        self.trackid = f"/org/mpris/MediaPlayer2/Track/{self._track}"
+        self._move_to(0)
+        self._emit_properties_changed({"Metadata": self.metadata()})
+
+    def metadata(self) -> Dict[str, Any]:
+        metadata = {
+            "mpris:length": self.length,
+            "xesam:title": f"Simulated track {self._track}",
+        }
+        if self.trackid is not None:
+            metadata["mpris:trackid"] = self.trackid
+        return metadata
+
+    def properties(self, interface_name: str = PLAYER_INTERFACE) -> Dict[str, Any]:
+        if interface_name == MEDIA_PLAYER2_INTERFACE:
+            return {
+                "Identity": f"Simulated {self.identity}",
+                "DesktopEntry": self.identity,
+                "CanQuit": False,
+                "CanRaise": True,
+                "HasTrackList": False,
+            }
+        return {
+            "PlaybackStatus": self._status,
+            "Position": self.current_position(),
+            "Rate": 1.0,
+            "Metadata": self.metadata(),
+            "CanControl": True,
+            "CanSeek": True,
+            "CanPause": True,
+            "CanPlay": True,
+        }
+
+    # The org.mpris.MediaPlayer2, org.mpris.MediaPlayer2.Player and
+    # org.freedesktop.DBus.Properties methods
+
+    def Introspect(self, timeout: float = None) -> None:
+        self._round_trip("Introspect", timeout)
+
+    def Raise(self, timeout: float = None) -> None:
+        self._round_trip("Raise", timeout)
+
+    def Play(self, timeout: float = None) -> None:
+        self._round_trip("Play", timeout)
+        self._set_status("Playing")
+
+    def Pause(self, timeout: float = None) -> None:
+        self._round_trip("Pause", timeout)
+        self._set_status("Paused")
+
+    def PlayPause(self, timeout: float = None) -> None:
+        self._round_trip("PlayPause", timeout)
+        self._set_status("Paused" if self._status == "Playing" else "Playing")
+
+    def Stop(self, timeout: float = None) -> None:
+        self._round_trip("Stop", timeout)
+        self._set_status("Stopped")
+        self._move_to(0)
+
+    def Next(self, timeout: float = None) -> None:
+        self._round_trip("Next", timeout)
+        self._change_track(1)
+
+    def Previous(self, timeout: float = None) -> None:
+        self._round_trip("Previous", timeout)
+        self._change_track(-1)
+
+    def Seek(self, offset: int, timeout: float = None) -> None:
+        self._round_trip("Seek", timeout)
+        position = self.current_position() + offset
+        if position > self.length:
+            self._change_track(1)
+            return
+        self._move_to(max(0, position + self.landing_error))
+        self._emit_seeked()
+
+    def SetPosition(self, trackid: str, position: int, timeout: float = None) -> None:
+        self._round_trip("SetPosition", timeout)
+        if trackid != self.trackid or not 0 <= position <= self.length:
+            return
+        self._move_to(max(0, position + self.landing_error))
+        self._emit_seeked()
+
+    def Get(self, interface_name: str, property_name: str, timeout: float = None):
+        self._round_trip("Get", timeout)
+        return self.properties(interface_name)[property_name]
+
+    def GetAll(self, interface_name: str, timeout: float = None) -> Dict[str, Any]:
+        self._round_trip("GetAll", timeout)
+        return self.properties(interface_name)
+
+
+class Player_simulated(Player):
+    """A player backend without a bus, the players are SimulatedMediaPlayers in
+    this process. Selected with PlayerFactory.backend = "simulated", it makes the
+    application's own cost measurable, deterministically, apart from the IPC
+    cost.
+
+    Simulated players are registered with add_service and removed, as if they
+    had exited, with remove_service."""
+
+    services: Dict[str, SimulatedMediaPlayer] = {}
+    # Signals are emitted synchronously by the SimulatedMediaPlayers
+    needs_signal_loop = False
+    _name_owner_changed_handlers: List[Callable[[str, str, str], None]] = []
+
+    bus_manager = BusConnectionManager(
+        backend_name="simulated",
+        connect=lambda: Player_simulated.services,
+        is_connected=lambda bus: True,
+    )
+
+    @staticmethod
+    def add_service(short_player_name: str, **kwargs) -> SimulatedMediaPlayer:
+        """Registers a simulated player as org.mpris.MediaPlayer2.<short name>,
+        kwargs are passed to SimulatedMediaPlayer."""
+        fq_player_name = f"org.mpris.MediaPlayer2.{short_player_name}"
+        media_player = SimulatedMediaPlayer(short_player_name, **kwargs)
+        Player_simulated.services[fq_player_name] = media_player
+        for handler in list(Player_simulated._name_owner_changed_handlers):
+            handler(fq_player_name, "", Player_simulated.get_name_owner(fq_player_name))
+        return media_player
+
+    @staticmethod
+    def remove_service(short_player_name: str) -> None:
+        fq_player_name = f"org.mpris.MediaPlayer2.{short_player_name}"
+        owner = Player_simulated.get_name_owner(fq_player_name)
+        media_player = Player_simulated.services.pop(fq_player_name)
+        media_player.crashed = True
+        for handler in list(Player_simulated._name_owner_changed_handlers):
+            handler(fq_player_name, owner, "")
+
+    @staticmethod
+    def get_service_names() -> List:
+        return list(Player_simulated.services)
+
+    @staticmethod
+    def get_name_owner(name: str) -> str:
+        if name not in Player_simulated.services:
+            raise SimulatedDBusError(
+                "org.freedesktop.DBus.Error.NameHasNoOwner", f"{name} has no owner"
+            )
+        return f":sim.{id(Player_simulated.services[name])}"
+
+    @staticmethod
+    def subscribe_name_owner_changed(
+        handler: Callable[[str, str, str], None],
+    ) -> Callable[[], None]:
+        Player_simulated._name_owner_changed_handlers.append(handler)
+        return lambda: Player_simulated._name_owner_changed_handlers.remove(handler)
+
+    def __init__(
+        self,
+        mpris_player_name,
+        ext_player_name,
+        cached=False,
+        timeouts=None,
+        owner=None,
+    ) -> None:
+        self._cache: PropertyCache = None
+        self._unsubscribe = None
+        super().__init__(mpris_player_name, ext_player_name, cached, timeouts, owner)
+
+    def connect(self):
+        services = Player_simulated.bus_manager.get_bus()
+        self._bind_owner(services)
+        self._proxy = services[self._name]
+        # pydbus introspects the player when it creates the proxy
+        self._call(self._proxy.Introspect, "Introspect")
+        Player_simulated.bus_manager.register_proxy(self)
+        if self._cached:
+            if self._unsubscribe is not None:
+                self._unsubscribe()
+            if self._cache is None:
+                self._cache = PropertyCache(self._bus_get, self._bus_get_all)
+            else:
+                self._cache.clear()
+            self._unsubscribe = self._proxy.subscribe(
+                self._cache.properties_changed, self._cache.seeked
+            )
+
+    def _bus_get(self, interface_name: str, property_name: str) -> Any:
+        return self._call(
+            self.mpris_player_properties.Get, "Get", interface_name, property_name
+        )
+
+    def _bus_get_all(self, interface_name: str) -> Dict[str, Any]:
+        return self._call(self.mpris_player_properties.GetAll, "GetAll", interface_name)
+
+    def get(
+        self, property_name: str, interface_name="org.mpris.MediaPlayer2.Player"
+    ) -> Any:
+        if self._cache is not None:
+            return self._cache.get(interface_name, property_name)
+        return self._bus_get(interface_name, property_name)
+
+    def get_all(self, interface_name="org.mpris.MediaPlayer2.Player") -> Dict[str, Any]:
+        if self._cache is not None:
+            return self._cache.get_all(interface_name)
+        return self._bus_get_all(interface_name)
+
+    def raise_window(self) -> None:
+        self._call(self.mpris_media_player2.Raise, "Raise")
+
+    def play(self) -> None:
+        self._call(self.mpris_player.Play, "Play")
+
+    def play_pause(self) -> None:
+        self._call(self.mpris_player.PlayPause, "PlayPause")
+
+    def pause(self) -> None:
+        self._call(self.mpris_player.Pause, "Pause")
+
+    def next(self) -> None:
+        self._call(self.mpris_player.Next, "Next")
+
+    def previous(self) -> None:
+        self._call(self.mpris_player.Previous, "Previous")
+
+    def stop(self) -> None:
+        self._call(self.mpris_player.Stop, "Stop")
+
+    def seek(self, offset: int) -> None:
+        self._call(self.mpris_player.Seek, "Seek", self._corrected_seek_offset(offset))
+
+    @property
+    def mpris_player(self):
+        return self._proxy
+
+    @property
+    def mpris_media_player2(self):
+        return self._proxy
+
+    @property
+    def mpris_player_properties(self):
+        return self._proxy
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def ext_name(self) -> str:
+        return self._ext_name
+
+    @property
+    def position_clock(self) -> PositionClock:
+        if self._cache is not None:
+            return self._cache.position_clock
+        return None
+
+    @property
+    def playback_status(self) -> str:
+        return self.get(property_name="PlaybackStatus")
+
+    @property
+    def position(self) -> int:
+        return self.get(property_name="Position")
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self.get(property_name="Metadata")
+
+    @cached_property
+    def can_control(self) -> bool:
+        return self._capability("CanControl")
+
+    @cached_property
+    def can_seek(self) -> bool:
+        return self._capability("CanSeek")
+
+    @cached_property
+    def can_pause(self) -> bool:
+        return self._capability("CanPause")
+
+    @cached_property
+    def can_play(self) -> bool:
+        return self._capability("CanPlay")
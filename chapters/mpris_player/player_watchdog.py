@@ -0,0 +1,125 @@
+import threading
+import time
+from typing import Callable
+from .player import Player
+from .player_factory import PlayerFactory
+from .proxy_player import PlayerProxy
+from .reconnect_policy import CircuitState
+from .signal_loop import ensure_signal_loop
+from chapters.logger_config import logger
+
+
+class PlayerWatchdog:
+    """Watches the owner of a PlayerProxy's bus name with the NameOwnerChanged
+    signal, so that the proxy follows the player without waiting for a command to
+    fail.
+
+    When the player quits, the proxy's circuit is opened straight away, its
+    connection state listeners (e.g. the GUI's instance label) see it as
+    disconnected. When the player reappears, under the same name or, for players
+    with an instance suffix (firefox.instance_1_42), as another instance of the
+    same kind of player, the proxy is reconnected in the background. The first
+    command after a restart then goes straight to the restarted player."""
+
+    def __init__(
+        self,
+        proxy: PlayerProxy,
+        reconnect_attempts: int = 3,
+        retry_delay: float = 0.5,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._proxy = proxy
+        self.reconnect_attempts = reconnect_attempts
+        self.retry_delay = retry_delay
+        self._sleep = sleep
+        self._unsubscribe: Callable[[], None] = None
+        self._reconnection: threading.Thread = None
+
+    @property
+    def watching(self) -> bool:
+        return self._unsubscribe is not None
+
+    def start(self) -> bool:
+        """returns: whether the player's bus name is being watched"""
+        if self.watching:
+            return True
+        if PlayerFactory.get_backend().needs_signal_loop and not ensure_signal_loop():
+            logger().warning("Unable to watch the player, no signal loop")
+            return False
+        try:
+            self._unsubscribe = PlayerFactory.subscribe_name_owner_changed(
+                self._name_owner_changed
+            )
+        except Exception as e:
+            logger().warning("Unable to subscribe to NameOwnerChanged")
+            logger().warning(e)
+            return False
+        return True
+
+    def stop(self) -> None:
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    def wait_for_reconnection(self, timeout: float = None) -> None:
+        """Blocks until a reconnection in progress has finished"""
+        reconnection = self._reconnection
+        if reconnection is not None:
+            reconnection.join(timeout)
+
+    def _name_owner_changed(self, name: str, old_owner: str, new_owner: str) -> None:
+        name = str(name)
+        player: Player = self._proxy.player
+        if player is None or not name.startswith(PlayerFactory.media_player_prefix):
+            return
+        if name == player.name and old_owner and not new_owner:
+            if player.owner is None or str(old_owner) == player.owner:
+                logger().info(f"{player.ext_name} has quit")
+                self._proxy.reconnect_policy.open()
+        elif new_owner and self._is_same_player(player, name):
+            self._reconnection = threading.Thread(
+                target=self._reconnect,
+                args=(player, name),
+                name="player-watchdog",
+                daemon=True,
+            )
+            self._reconnection.start()
+
+    def _is_same_player(self, player: Player, fq_player_name: str) -> bool:
+        if fq_player_name == player.name:
+            return True
+        # Another instance of the same kind of player replaces a player that quit
+        short_player_name = _short_player_name(fq_player_name)
+        return (
+            short_player_name.split(".")[0] == player.player_kind
+            and self._proxy.reconnect_policy.state is not CircuitState.CLOSED
+        )
+
+    def _reconnect(self, player: Player, fq_player_name: str) -> None:
+        # Runs on a thread of its own, not on the thread that delivers the signal
+        short_player_name = _short_player_name(fq_player_name)
+        for attempt in range(self.reconnect_attempts):
+            if attempt:
+                self._sleep(self.retry_delay)
+            try:
+                if fq_player_name == player.name:
+                    player.connect()
+                else:
+                    self._proxy.set_player(
+                        type(player)(
+                            fq_player_name,
+                            short_player_name,
+                            player.cached,
+                            player.timeouts,
+                        )
+                    )
+            except Exception as e:
+                logger().info(f"Unable to reconnect to {short_player_name}: {e}")
+                continue
+            logger().info(f"Reconnected to {short_player_name}")
+            self._proxy.reconnect_policy.record_success()
+            return
+
+
+def _short_player_name(fq_player_name: str) -> str:
+    return fq_player_name[len(PlayerFactory.media_player_prefix) + 1 :]
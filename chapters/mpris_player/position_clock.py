@@ -0,0 +1,139 @@
+import threading
+import time
+from typing import Callable, Tuple
+
+
+class PositionClock:
+    """Extrapolates the playback position of a player on the client side.
+
+    MPRIS players do not signal changes of Position during playback. The clock is
+    anchored on the last known Position, Rate and PlaybackStatus together with
+    the (monotonic) time at which they were known, and estimates the current
+    position from them without any D-Bus traffic. The clock must be re-synced
+    on the Seeked signal and on changes of PlaybackStatus and Rate.
+
+    Every estimate comes with a drift bound, an upper bound (in microseconds) of
+    the difference between the estimated and the actual position. It grows with
+    the time since the last anchor, as the player's and the local clock drift
+    apart, and with the uncertainty of the anchor itself."""
+
+    def __init__(
+        self,
+        drift_rate: float = 0.002,
+        signal_latency: int = 50000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """:param drift_rate: the assumed maximum relative drift between the
+        player's playback and the local monotonic clock.
+        :param signal_latency: the assumed maximum delay, in microseconds, between
+        a change in the player and the arrival of the corresponding signal.
+        :param clock: the time source, in seconds."""
+        self._drift_rate = drift_rate
+        self._signal_latency = signal_latency
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._anchor_position: int = None
+        self._anchor_time: float = 0.0
+        self._anchor_uncertainty: int = 0
+        self._rate: float = 1.0
+        self._playback_status: str = None
+        self._length: int = None
+
+    @property
+    def synced(self) -> bool:
+        return self._anchor_position is not None
+
+    @property
+    def playback_status(self) -> str:
+        return self._playback_status
+
+    def anchor(
+        self,
+        position: int,
+        rate: float = None,
+        playback_status: str = None,
+        uncertainty: int = 0,
+        at: float = None,
+    ) -> None:
+        """Anchors the clock on a position reported by the player.
+        :param uncertainty: the uncertainty of the reported position in microseconds,
+        typically half of the round trip time of the Get call that retrieved it.
+        :param at: the monotonic time at which the position was valid."""
+        with self._lock:
+            self._anchor_position = int(position)
+            self._anchor_time = self._clock() if at is None else at
+            self._anchor_uncertainty = int(uncertainty)
+            if rate is not None:
+                self._rate = float(rate)
+            if playback_status is not None:
+                self._playback_status = str(playback_status)
+
+    def seeked(self, position: int) -> None:
+        """Handler for the Seeked signal"""
+        self.anchor(position, uncertainty=self._signal_latency)
+
+    def set_playback_status(self, playback_status: str) -> None:
+        self._reanchor(playback_status=str(playback_status))
+
+    def set_rate(self, rate: float) -> None:
+        self._reanchor(rate=float(rate))
+
+    def set_length(self, length: int) -> None:
+        with self._lock:
+            self._length = int(length) if length else None
+
+    def invalidate(self, *args) -> None:
+        """Discards the anchor, e.g. on a track change or loss of the player"""
+        with self._lock:
+            self._anchor_position = None
+            self._length = None
+
+    def reset(self) -> None:
+        """Discards everything known about the player"""
+        with self._lock:
+            self._anchor_position = None
+            self._length = None
+            self._rate = 1.0
+            self._playback_status = None
+
+    def _reanchor(self, playback_status: str = None, rate: float = None) -> None:
+        # The position at which the status or rate changed is not reported, the
+        # estimate at the time the change is received is used as the new anchor.
+        with self._lock:
+            if self._anchor_position is not None:
+                now = self._clock()
+                position, bound = self._estimate(now)
+                self._anchor_position = position
+                self._anchor_time = now
+                self._anchor_uncertainty = bound + self._signal_latency
+            if playback_status is not None:
+                self._playback_status = playback_status
+            if rate is not None:
+                self._rate = rate
+
+    def _estimate(self, now: float) -> Tuple[int, int]:
+        elapsed = max(0.0, now - self._anchor_time) * 1000000
+        if self._playback_status == "Playing":
+            position = self._anchor_position + int(elapsed * self._rate)
+            bound = self._anchor_uncertainty + int(elapsed * self._drift_rate)
+        else:
+            position = self._anchor_position
+            bound = self._anchor_uncertainty
+        if self._length is not None:
+            position = min(position, self._length)
+        return max(0, position), bound
+
+    def estimate(self) -> Tuple[int, int]:
+        """returns: a tuple of the estimated position and its drift bound, both in
+        microseconds.
+        raises: ValueError if the clock has not been anchored."""
+        with self._lock:
+            if self._anchor_position is None:
+                raise ValueError("The position clock has not been anchored")
+            return self._estimate(self._clock())
+
+    def estimated_position(self) -> int:
+        return self.estimate()[0]
+
+    def drift_bound(self) -> int:
+        return self.estimate()[1]
@@ -0,0 +1,180 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Set
+from .metadata import TRACK_KEYS, metadata_diff
+from .position_clock import PositionClock
+from chapters.logger_config import logger
+
+PLAYER_INTERFACE = "org.mpris.MediaPlayer2.Player"
+
+
+class PropertyCache:
+    """A thread safe cache of the D-Bus properties of a single MPRIS player.
+
+    The cache is kept up to date by the PropertiesChanged and Seeked signals of
+    the player (see Player_pydbus and Player_dbus_python) and is cleared when the
+    player's bus name loses its owner. Properties that are not cached are
+    retrieved with the get_property and get_all_properties callables.
+
+    MPRIS players do not signal changes of Position while playing. Position reads
+    are served by a PositionClock, which extrapolates the position from the last
+    retrieved or signalled one, for as long as its drift bound does not exceed
+    max_position_drift microseconds."""
+
+    def __init__(
+        self,
+        get_property: Callable[[str, str], Any],
+        get_all_properties: Callable[[str], Dict[str, Any]],
+        max_position_drift: int = 250000,
+    ) -> None:
+        self._get_property = get_property
+        self._get_all_properties = get_all_properties
+        self._max_position_drift = max_position_drift
+        self._lock = threading.Lock()
+        self._interfaces: Dict[str, Dict[str, Any]] = {}
+        self._complete_interfaces: Set[str] = set()
+        # Incremented on every change notification. Values retrieved from the bus
+        # are only stored if no notification arrived while they were in flight.
+        self._generation = 0
+        self.position_clock = PositionClock()
+        self._track_listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    def add_track_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """Registers a function that is called with the new Metadata when a
+        PropertiesChanged signal reports another track (mpris:trackid or
+        xesam:url). Listeners are called from the thread that delivers the
+        signals."""
+        self._track_listeners.append(listener)
+
+    def get(self, interface_name: str, property_name: str) -> Any:
+        if interface_name == PLAYER_INTERFACE and property_name == "Position":
+            return self.get_position()
+        with self._lock:
+            properties = self._interfaces.get(interface_name)
+            if properties is not None and property_name in properties:
+                return properties[property_name]
+            generation = self._generation
+        value = self._get_property(interface_name, property_name)
+        with self._lock:
+            if generation == self._generation:
+                self._interfaces.setdefault(interface_name, {})[property_name] = value
+        return value
+
+    def get_position(self) -> int:
+        clock = self.position_clock
+        if clock.synced and clock.playback_status is not None:
+            position, drift_bound = clock.estimate()
+            if drift_bound <= self._max_position_drift:
+                return position
+        return self.retrieve_position()
+
+    def retrieve_position(self) -> int:
+        """Reads Position from the player, not from the clock, and anchors the
+        clock to it"""
+        clock = self.position_clock
+        # The clock can only extrapolate once the playback status is known
+        playback_status = self.get(PLAYER_INTERFACE, "PlaybackStatus")
+        with self._lock:
+            generation = self._generation
+            rate = self._interfaces.get(PLAYER_INTERFACE, {}).get("Rate")
+        sent = time.monotonic()
+        position = self._get_property(PLAYER_INTERFACE, "Position")
+        received = time.monotonic()
+        with self._lock:
+            if generation == self._generation:
+                clock.anchor(
+                    position,
+                    rate=rate,
+                    playback_status=playback_status,
+                    uncertainty=int((received - sent) * 500000),
+                    at=(sent + received) / 2,
+                )
+        return position
+
+    def get_all(self, interface_name: str) -> Dict[str, Any]:
+        with self._lock:
+            if interface_name in self._complete_interfaces:
+                properties = dict(self._interfaces[interface_name])
+            else:
+                properties = None
+            generation = self._generation
+        if properties is not None:
+            if interface_name == PLAYER_INTERFACE:
+                properties["Position"] = self.get_position()
+            return properties
+        sent = time.monotonic()
+        properties = self._get_all_properties(interface_name)
+        received = time.monotonic()
+        with self._lock:
+            if generation == self._generation:
+                self._interfaces[interface_name] = dict(properties)
+                self._complete_interfaces.add(interface_name)
+                if interface_name == PLAYER_INTERFACE and "Position" in properties:
+                    self.position_clock.anchor(
+                        properties["Position"],
+                        rate=properties.get("Rate"),
+                        playback_status=properties.get("PlaybackStatus"),
+                        uncertainty=int((received - sent) * 500000),
+                        at=(sent + received) / 2,
+                    )
+                    metadata = properties.get("Metadata", {})
+                    self.position_clock.set_length(metadata.get("mpris:length"))
+        return properties
+
+    def properties_changed(
+        self,
+        interface_name: str,
+        changed_properties: Dict[str, Any],
+        invalidated_properties: List[str],
+    ) -> None:
+        """Handler for the org.freedesktop.DBus.Properties.PropertiesChanged signal"""
+        interface_name = str(interface_name)
+        track_changed = False
+        with self._lock:
+            self._generation += 1
+            properties = self._interfaces.setdefault(interface_name, {})
+            if interface_name == PLAYER_INTERFACE and "Metadata" in changed_properties:
+                track_changed = bool(
+                    metadata_diff(
+                        properties.get("Metadata"),
+                        changed_properties["Metadata"],
+                        TRACK_KEYS,
+                    )
+                )
+            for name, value in changed_properties.items():
+                properties[str(name)] = value
+            for name in invalidated_properties:
+                properties.pop(str(name), None)
+                self._complete_interfaces.discard(interface_name)
+            if interface_name != PLAYER_INTERFACE:
+                return
+            clock = self.position_clock
+            if "Metadata" in changed_properties:
+                # A track change, the position has to be retrieved again
+                clock.invalidate()
+                clock.set_length(changed_properties["Metadata"].get("mpris:length"))
+            if "PlaybackStatus" in changed_properties:
+                clock.set_playback_status(changed_properties["PlaybackStatus"])
+            if "Rate" in changed_properties:
+                clock.set_rate(changed_properties["Rate"])
+        if track_changed:
+            for listener in list(self._track_listeners):
+                try:
+                    listener(changed_properties["Metadata"])
+                except Exception as e:
+                    logger().error(f"Track listener failed: {e}")
+
+    def seeked(self, position: int) -> None:
+        """Handler for the org.mpris.MediaPlayer2.Player.Seeked signal"""
+        with self._lock:
+            self._generation += 1
+            self.position_clock.seeked(position)
+
+    def clear(self, *args) -> None:
+        """Discards all cached properties. Also used as the handler for the
+        player's bus name owner changes, hence the ignored arguments."""
+        with self._lock:
+            self._generation += 1
+            self._interfaces.clear()
+            self._complete_interfaces.clear()
+            self.position_clock.reset()
@@ -1,43 +1,188 @@
-from .player import Player
-from functools import cached_property, wraps
-from typing import Any, Dict
+from .player import Player, PlayerState
+from .position_clock import PositionClock
+from .command_dispatcher import CommandDispatcher
+from .seek_coalescer import SeekCoalescer
+from .reconnect_policy import (
+    CircuitState,
+    ErrorKind,
+    PlayerDisconnectedError,
+    ReconnectPolicy,
+    classify_error,
+)
+import time
+from functools import partial, wraps
+from typing import Any, Callable, Dict, List
 from chapters.logger_config import logger
 
 
 def reconnect_player(func):
+    """Calls the player according to the proxy's ReconnectPolicy. Errors that
+    indicate a disconnected player lead to one reconnection attempt and retry,
+    when the player's name has a new owner or the bus connection was replaced.
+    Timeouts are raised to the caller without counting as a failure.
+    While the policy's circuit is open, PlayerDisconnectedError is raised without
+    calling the player.
+    The latency of each call, reconnection included, is recorded as the
+    PlayerProxy.<command> method of the player."""
+    method_name = f"PlayerProxy.{func.__name__.removeprefix('_send_')}"
+
     @wraps(func)
     def decorator(self, *args, **kwargs):
+        policy: ReconnectPolicy = self._reconnect_policy
+        if not policy.allow_call():
+            logger().debug(f"{self.ext_name} is disconnected, {func.__name__} skipped")
+            raise PlayerDisconnectedError(
+                f"{self.ext_name} is disconnected,"
+                f" retrying in {policy.retry_in:.1f} seconds"
+            )
+        start = time.perf_counter()
         try:
-            func(self, *args, **kwargs)
-        except Exception as e:
-            logger().error(type(e))
-            logger().info(e)
-            logger().info("Possible player discconnection, attempting to reconnect")
-            self.connect()
-            logger().info(f"Attempting to call {func.__name__} again")
-            func(self, *args, **kwargs)
+            result = _call_with_reconnect(self, policy, func, *args, **kwargs)
+        except Exception:
+            Player.latency_recorder.record(
+                self.ext_name, method_name, time.perf_counter() - start, failed=True
+            )
+            raise
+        Player.latency_recorder.record(
+            self.ext_name, method_name, time.perf_counter() - start
+        )
+        return result
 
     return decorator
 
 
+def _call_with_reconnect(
+    proxy: "PlayerProxy", policy: ReconnectPolicy, func, *args, **kwargs
+):
+    try:
+        result = func(proxy, *args, **kwargs)
+    except Exception as e:
+        error_kind = classify_error(e)
+        if error_kind is not ErrorKind.DISCONNECTED:
+            # A slow reply comes from a running player, it leaves the circuit as
+            # it is and reaches the caller as PlayerTimeoutError
+            raise
+        logger().info(e)
+        if not _owner_changed(proxy):
+            policy.record_failure()
+            raise PlayerDisconnectedError(f"{proxy.ext_name} is disconnected") from e
+        logger().info(f"{proxy.ext_name} has a new owner, attempting to reconnect")
+        try:
+            proxy.connect()
+            logger().info(f"Attempting to call {func.__name__} again")
+            result = func(proxy, *args, **kwargs)
+        except Exception as retry_error:
+            policy.record_failure()
+            logger().warning(f"Unable to reconnect to {proxy.ext_name}")
+            raise PlayerDisconnectedError(
+                f"{proxy.ext_name} is disconnected"
+            ) from retry_error
+    policy.record_success()
+    return result
+
+
+def _owner_changed(proxy: "PlayerProxy") -> bool:
+    try:
+        return proxy.owner_changed()
+    except Exception as e:
+        logger().info(f"{proxy.ext_name} is not running: {e}")
+        return False
+
+
 def handle_player_error(func: callable):
     def decorator(*args, **kwargs):
         try:
-            func(*args, **kwargs)
+            return func(*args, **kwargs)
         except Exception as e:
             logger().error("An error occured when attempting to call the player")
-            logger().error(type(e))
+            logger().error(f"{type(e).__name__}: {e}")
             raise
 
     return decorator
 
 
+def dispatch_command(func):
+    """Sends the decorated player command through the proxy's CommandDispatcher,
+    when the proxy has one, instead of waiting for the player's reply."""
+
+    @wraps(func)
+    def decorator(self, *args, **kwargs):
+        if self._dispatcher is None:
+            return func(self, *args, **kwargs)
+        self._dispatcher.submit(func.__name__, partial(func, self, *args, **kwargs))
+
+    return decorator
+
+
+def flush_pending_seeks(func):
+    """Sends the coalesced seeks that are still pending before the decorated
+    player command, as they were requested earlier."""
+
+    @wraps(func)
+    def decorator(self, *args, **kwargs):
+        if self._seek_coalescer is not None:
+            self._seek_coalescer.flush()
+        return func(self, *args, **kwargs)
+
+    return decorator
+
+
 class PlayerProxy(Player):
-    def __init__(self, player: Player):
+    def __init__(
+        self,
+        player: Player,
+        dispatcher: CommandDispatcher = None,
+        seek_coalescing_window: float = None,
+        reconnect_policy: ReconnectPolicy = None,
+    ):
         self._player = player
+        self._dispatcher = dispatcher
+        self._reconnect_policy = (
+            reconnect_policy if reconnect_policy else ReconnectPolicy()
+        )
+        self._seek_coalescer: SeekCoalescer = None
+        self.set_seek_coalescing_window(seek_coalescing_window)
+        self._track_listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    @property
+    def player(self) -> Player:
+        return self._player
 
     def set_player(self, player: Player):
         self._player = player
+        if player:
+            for listener in self._track_listeners:
+                player.add_track_listener(listener)
+
+    def set_dispatcher(self, dispatcher: CommandDispatcher):
+        """Transport commands (play, pause, seek, ...) are sent through dispatcher
+        without waiting for a reply. None restores blocking commands."""
+        self._dispatcher = dispatcher
+
+    @property
+    def reconnect_policy(self) -> ReconnectPolicy:
+        return self._reconnect_policy
+
+    @property
+    def connection_state(self) -> CircuitState:
+        """CircuitState.OPEN while the player is known to be disconnected"""
+        return self._reconnect_policy.state
+
+    def set_seek_coalescing_window(self, window: float | None):
+        """The first seek of a burst is sent immediately, the seeks requested
+        within window seconds after it are sent as a single Seek, a set_position
+        absorbs the seeks that follow it within the window (see SeekCoalescer).
+        None sends every seek and set_position as requested."""
+        if self._seek_coalescer is not None:
+            self._seek_coalescer.flush()
+        if window is None:
+            self._seek_coalescer = None
+        else:
+            self._seek_coalescer = SeekCoalescer(
+                seek=self._send_seek,
+                set_position=self._send_set_position,
+                window=window,
+            )
 
     @handle_player_error
     def connect(self):
@@ -49,51 +194,103 @@ class PlayerProxy(Player):
         if self._player:
             self._player.raise_window()
 
+    @flush_pending_seeks
+    @dispatch_command
     @reconnect_player
     def play(self) -> None:
         if self._player:
             self._player.play()
 
+    @flush_pending_seeks
+    @dispatch_command
     @reconnect_player
     @handle_player_error
     def play_pause(self) -> None:
         if self._player:
             self._player.play_pause()
 
+    @flush_pending_seeks
+    @dispatch_command
     @reconnect_player
     def pause(self) -> None:
         if self._player:
             self._player.pause()
 
+    @flush_pending_seeks
+    @dispatch_command
     @reconnect_player
     def next(self) -> None:
         if self._player:
             self._player.next()
 
+    @flush_pending_seeks
+    @dispatch_command
     @reconnect_player
     def previous(self) -> None:
         if self._player:
             self._player.previous()
 
+    @flush_pending_seeks
+    @dispatch_command
     @reconnect_player
     def stop(self) -> None:
         if self._player:
             self._player.stop()
 
-    @reconnect_player
     def seek(self, offset: int) -> None:
+        if self._seek_coalescer is not None:
+            self._seek_coalescer.seek(offset)
+        else:
+            self._send_seek(offset)
+
+    def set_position(self, to_position: int) -> None:
+        if self._seek_coalescer is not None:
+            self._seek_coalescer.set_position(to_position)
+        else:
+            self._send_set_position(to_position)
+
+    @dispatch_command
+    @reconnect_player
+    def _send_seek(self, offset: int) -> None:
         if self._player:
             self._player.seek(offset)
 
+    @dispatch_command
     @reconnect_player
-    def set_position(self, to_position: int) -> None:
+    def _send_set_position(self, to_position: int) -> None:
         if self._player:
             self._player.set_position(to_position)
 
     @reconnect_player
     def get(self, interface_name: str, property_name: str) -> Any:
         if self._player:
-            self._player.get(interface_name, property_name)
+            return self._player.get(
+                property_name=property_name, interface_name=interface_name
+            )
+
+    def get_all(
+        self, interface_name: str = "org.mpris.MediaPlayer2.Player"
+    ) -> Dict[str, Any]:
+        if self._player:
+            return self._player.get_all(interface_name)
+        else:
+            return None
+
+    def snapshot(self) -> PlayerState:
+        if self._player:
+            return self._player.snapshot()
+        else:
+            return None
+
+    def add_track_listener(self, listener: Callable[[Dict[str, Any]], None]) -> bool:
+        """Registers listener with the player and with the players that replace
+        it (see set_player).
+        returns: whether the current player signals track changes"""
+        self._track_listeners.append(listener)
+        if self._player:
+            return self._player.add_track_listener(listener)
+        else:
+            return False
 
     @property
     def mpris_player(self) -> Any:
@@ -130,6 +327,33 @@ class PlayerProxy(Player):
         else:
             return None
 
+    @property
+    def cached(self) -> bool:
+        if self._player:
+            return self._player.cached
+        else:
+            return False
+
+    @property
+    def owner(self) -> str:
+        if self._player:
+            return self._player.owner
+        else:
+            return None
+
+    def owner_changed(self) -> bool:
+        if self._player:
+            return self._player.owner_changed()
+        else:
+            return False
+
+    @property
+    def position_clock(self) -> PositionClock:
+        if self._player:
+            return self._player.position_clock
+        else:
+            return None
+
     @property
     def playback_status(self) -> str:
         if self._player:
@@ -144,6 +368,12 @@ class PlayerProxy(Player):
         else:
             return None
 
+    def retrieve_position(self) -> int:
+        if self._player:
+            return self._player.retrieve_position()
+        else:
+            return None
+
     @property
     def metadata(self) -> Dict[str, Any]:
         if self._player:
@@ -151,6 +381,12 @@ class PlayerProxy(Player):
         else:
             return None
 
+    def metadata_values(self, *keys: str) -> Dict[str, Any]:
+        if self._player:
+            return self._player.metadata_values(*keys)
+        else:
+            return {}
+
     @property
     def trackid(self) -> str:
         if self._player:
@@ -158,28 +394,28 @@ class PlayerProxy(Player):
         else:
             return None
 
-    @cached_property
+    @property
     def can_control(self) -> bool:
         if self._player:
             return self._player.can_control
         else:
             return None
 
-    @cached_property
+    @property
     def can_seek(self) -> bool:
         if self._player:
             return self._player.can_seek
         else:
             return None
 
-    @cached_property
+    @property
     def can_pause(self) -> bool:
         if self._player:
             return self._player.can_pause
         else:
             return None
 
-    @cached_property
+    @property
     def can_play(self) -> bool:
         if self._player:
             return self._player.can_play
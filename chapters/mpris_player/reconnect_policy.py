@@ -0,0 +1,149 @@
+import threading
+import time
+from enum import Enum
+from typing import Callable, List
+from .player import PlayerConnectionError, is_timeout_error
+
+
+class ErrorKind(Enum):
+    # The player has quit or its connection was lost, reconnecting may help
+    DISCONNECTED = "disconnected"
+    # The player did not reply in time, it is running but unresponsive
+    TIMEOUT = "timeout"
+    # Any other error, e.g. a method the player does not support
+    OTHER = "other"
+
+
+_DISCONNECTED_ERROR_NAMES = (
+    "org.freedesktop.DBus.Error.ServiceUnknown",
+    "org.freedesktop.DBus.Error.NameHasNoOwner",
+    "org.freedesktop.DBus.Error.Disconnected",
+    "org.freedesktop.DBus.Error.UnknownObject",
+    "org.freedesktop.DBus.Error.NoServer",
+)
+
+
+def classify_error(error: Exception) -> ErrorKind:
+    """Classifies an exception raised by a player backend. dbus-python raises
+    DBusException, which carries the D-Bus error name, pydbus raises GLib.Error,
+    whose message contains it."""
+    if isinstance(error, PlayerDisconnectedError):
+        return ErrorKind.DISCONNECTED
+    if isinstance(error, PlayerConnectionError):
+        return ErrorKind.DISCONNECTED
+    if is_timeout_error(error):
+        return ErrorKind.TIMEOUT
+    description = str(error)
+    if hasattr(error, "get_dbus_name"):
+        description = f"{error.get_dbus_name()} {description}"
+    if any(name in description for name in _DISCONNECTED_ERROR_NAMES):
+        return ErrorKind.DISCONNECTED
+    return ErrorKind.OTHER
+
+
+class PlayerDisconnectedError(Exception):
+    """Raised without calling the player while the player is known to be
+    disconnected"""
+
+    pass
+
+
+class CircuitState(Enum):
+    # Calls go to the player
+    CLOSED = "closed"
+    # The player is known to be disconnected, calls fail fast
+    OPEN = "open"
+    # The backoff has elapsed, the next call is a trial call
+    HALF_OPEN = "half_open"
+
+
+class ReconnectPolicy:
+    """Decides when a disconnected player is worth calling again.
+
+    After failure_threshold consecutive failed reconnections the circuit opens
+    and calls fail fast with PlayerDisconnectedError. Once the backoff has
+    elapsed, the circuit is half open and the next call is let through as a
+    trial. If the trial fails the circuit opens again with the backoff
+    multiplied by backoff_multiplier, up to max_backoff seconds. A successful
+    call closes the circuit and resets the backoff."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 1,
+        initial_backoff: float = 1.0,
+        backoff_multiplier: float = 2.0,
+        max_backoff: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.initial_backoff = initial_backoff
+        self.backoff_multiplier = backoff_multiplier
+        self.max_backoff = max_backoff
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._backoff = initial_backoff
+        self._retry_at = 0.0
+        self._listeners: List[Callable[[CircuitState], None]] = []
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            if self._state is CircuitState.OPEN and self._clock() >= self._retry_at:
+                return CircuitState.HALF_OPEN
+            return self._state
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds until the next trial call is allowed"""
+        with self._lock:
+            if self._state is not CircuitState.OPEN:
+                return 0.0
+            return max(0.0, self._retry_at - self._clock())
+
+    def add_listener(self, listener: Callable[[CircuitState], None]) -> None:
+        """Registers a function that is called with the new state when the
+        circuit opens or closes. Listeners may be called from any thread."""
+        self._listeners.append(listener)
+
+    def allow_call(self) -> bool:
+        return self.state is not CircuitState.OPEN
+
+    def record_success(self) -> None:
+        with self._lock:
+            changed = self._state is not CircuitState.CLOSED
+            self._state = CircuitState.CLOSED
+            self._failures = 0
+            self._backoff = self.initial_backoff
+        if changed:
+            self._notify_listeners(CircuitState.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state is CircuitState.OPEN:
+                # A failed trial call
+                self._backoff = min(
+                    self._backoff * self.backoff_multiplier, self.max_backoff
+                )
+            elif self._failures < self.failure_threshold:
+                return
+            changed = self._state is not CircuitState.OPEN
+            self._state = CircuitState.OPEN
+            self._retry_at = self._clock() + self._backoff
+        if changed:
+            self._notify_listeners(CircuitState.OPEN)
+
+    def open(self) -> None:
+        """Opens the circuit, e.g. when the player is known to have quit"""
+        with self._lock:
+            changed = self._state is not CircuitState.OPEN
+            self._state = CircuitState.OPEN
+            self._retry_at = self._clock() + self._backoff
+        if changed:
+            self._notify_listeners(CircuitState.OPEN)
+
+    def _notify_listeners(self, state: CircuitState) -> None:
+        for listener in self._listeners:
+            listener(state)
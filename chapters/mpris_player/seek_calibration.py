@@ -0,0 +1,171 @@
+import statistics
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Set
+from .cache_files import cache_file, load_json, save_json
+from chapters.logger_config import logger
+
+
+class CorrectionProfile:
+    """How far a kind of player lands from the positions it is sent to, and how
+    long its seek commands take to reach it.
+
+    The offsets are the median landing errors, actual minus requested position,
+    in microseconds. Corrections subtract them from later requests."""
+
+    __slots__ = (
+        "set_position_offset",
+        "seek_offset",
+        "command_latency",
+        "samples",
+        "calibrated_at",
+    )
+
+    def __init__(
+        self,
+        set_position_offset: int = 0,
+        seek_offset: int = 0,
+        command_latency: float = 0.0,
+        samples: int = 0,
+        calibrated_at: float = 0.0,
+    ) -> None:
+        self.set_position_offset = int(set_position_offset)
+        self.seek_offset = int(seek_offset)
+        # The median round trip of the SetPosition and Seek calls, in seconds
+        self.command_latency = float(command_latency)
+        self.samples = int(samples)
+        self.calibrated_at = float(calibrated_at)
+
+    @classmethod
+    def from_dict(cls, content: Dict[str, Any]) -> "CorrectionProfile":
+        return cls(**{name: content[name] for name in cls.__slots__ if name in content})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def corrected_position(self, to_position: int) -> int:
+        return max(0, to_position - self.set_position_offset)
+
+    def corrected_offset(self, offset: int) -> int:
+        return offset - self.seek_offset
+
+    def summary(self) -> str:
+        return (
+            f"set_position lands {self.set_position_offset / 1000:+.0f} ms,"
+            f" seek lands {self.seek_offset / 1000:+.0f} ms,"
+            f" command latency {self.command_latency * 1000:.1f} ms"
+            f" ({self.samples} probes)"
+        )
+
+    def __repr__(self) -> str:
+        return f"CorrectionProfile({self.summary()})"
+
+
+class SeekCalibration:
+    """Measures, stores and looks up the CorrectionProfile of each kind of player
+    (see Player.player_kind).
+
+    calibrate pauses the player and sends it probes: SetPosition to positions
+    spread over the track, each followed by a Seek of seek_probe microseconds.
+    After each probe it waits settle seconds and reads where the player landed.
+    The player's position and playback status are restored afterwards. Profiles
+    are kept in a small JSON file, so a player is calibrated once per host."""
+
+    def __init__(
+        self,
+        cache_path: Path = None,
+        probes: int = 8,
+        settle: float = 0.3,
+        seek_probe: int = -5_000_000,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.cache_path = cache_path if cache_path else cache_file("calibration.json")
+        self.probes = probes
+        self.settle = settle
+        self.seek_probe = seek_probe
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._profiles: Dict[str, CorrectionProfile] = None
+        self._calibrating: Set[str] = set()
+
+    def _load(self) -> Dict[str, CorrectionProfile]:
+        if self._profiles is None:
+            self._profiles = {}
+            for player_kind, content in load_json(self.cache_path).items():
+                try:
+                    self._profiles[player_kind] = CorrectionProfile.from_dict(content)
+                except (TypeError, ValueError):
+                    logger().warning(f"Ignoring the calibration of {player_kind}")
+        return self._profiles
+
+    def profile(self, player_kind: str) -> CorrectionProfile | None:
+        """returns: the profile of the kind of player, None if it is not
+        calibrated or is being calibrated."""
+        with self._lock:
+            if player_kind in self._calibrating:
+                return None
+            return self._load().get(player_kind)
+
+    def _save(self) -> None:
+        save_json(
+            self.cache_path,
+            {kind: profile.to_dict() for kind, profile in self._profiles.items()},
+        )
+
+    def forget(self, player_kind: str) -> None:
+        with self._lock:
+            if self._load().pop(player_kind, None) is not None:
+                self._save()
+
+    def calibrate(self, player) -> CorrectionProfile:
+        """Measures and stores the profile of player's kind. Corrections are not
+        applied to the player's kind during the calibration.
+        raises: the player's error if a probe fails."""
+        player_kind = player.player_kind
+        with self._lock:
+            self._calibrating.add(player_kind)
+        try:
+            profile = self._measure(player)
+        finally:
+            with self._lock:
+                self._calibrating.discard(player_kind)
+        logger().info(f"Calibrated {player.ext_name}: {profile.summary()}")
+        with self._lock:
+            self._load()[player_kind] = profile
+            self._save()
+        return profile
+
+    def _measure(self, player) -> CorrectionProfile:
+        state = player.snapshot()
+        if state.playback_status == "Playing":
+            player.pause()
+        length = state.metadata.get("mpris:length") or 600_000_000
+        set_position_errors, seek_errors, latencies = [], [], []
+        try:
+            for probe in range(1, self.probes + 1):
+                target = length * probe // (self.probes + 1)
+                start = time.perf_counter()
+                player.set_position(target)
+                latencies.append(time.perf_counter() - start)
+                self._sleep(self.settle)
+                landed = player.position
+                set_position_errors.append(landed - target)
+                if landed + self.seek_probe < 0:
+                    continue
+                start = time.perf_counter()
+                player.seek(self.seek_probe)
+                latencies.append(time.perf_counter() - start)
+                self._sleep(self.settle)
+                seek_errors.append(player.position - (landed + self.seek_probe))
+        finally:
+            player.set_position(state.position)
+            if state.playback_status == "Playing":
+                player.play()
+        return CorrectionProfile(
+            set_position_offset=statistics.median(set_position_errors),
+            seek_offset=statistics.median(seek_errors) if seek_errors else 0,
+            command_latency=statistics.median(latencies),
+            samples=self.probes,
+            calibrated_at=time.time(),
+        )
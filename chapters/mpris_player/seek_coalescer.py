@@ -0,0 +1,96 @@
+import threading
+from typing import Callable
+
+
+class SeekCoalescer:
+    """Coalesces bursts of seek requests, e.g. from a held down skip key, into a
+    single Seek.
+
+    The first seek of a burst is sent immediately and opens a window of window
+    seconds. The offsets of the seeks that are requested within the window are
+    added up and sent as one Seek when the window closes, which opens the next
+    window. A set_position request replaces any pending seek and absorbs the
+    seeks that follow it within the window, it is then sent as one SetPosition.
+    The burst ends with a window in which nothing was requested."""
+
+    def __init__(
+        self,
+        seek: Callable[[int], None],
+        set_position: Callable[[int], None],
+        window: float = 0.15,
+    ) -> None:
+        self._seek = seek
+        self._set_position = set_position
+        self.window = window
+        self._lock = threading.Lock()
+        self._pending_offset = 0
+        self._pending_position: int = None
+        # Whether a burst is in progress, its requests wait for the window to close
+        self._in_burst = False
+        self._timer: threading.Timer = None
+
+    @property
+    def pending(self) -> bool:
+        """Whether a seek or set_position waits for the window to close"""
+        with self._lock:
+            return self._pending_offset != 0 or self._pending_position is not None
+
+    def seek(self, offset: int) -> None:
+        with self._lock:
+            if self._in_burst:
+                if self._pending_position is not None:
+                    self._pending_position += offset
+                else:
+                    self._pending_offset += offset
+                return
+            self._in_burst = True
+        self._send_and_open_window(lambda: self._seek(offset))
+
+    def set_position(self, to_position: int) -> None:
+        with self._lock:
+            if self._in_burst:
+                self._pending_position = to_position
+                self._pending_offset = 0
+                return
+            self._in_burst = True
+        self._send_and_open_window(lambda: self._set_position(max(0, to_position)))
+
+    def _send_and_open_window(self, send: Callable[[], None]) -> None:
+        # The window opens once the command is sent, so the pending seeks are not
+        # sent while it is still on its way
+        try:
+            send()
+        finally:
+            with self._lock:
+                if self._in_burst and self._timer is None:
+                    self._timer = threading.Timer(self.window, self._close_window)
+                    self._timer.daemon = True
+                    self._timer.start()
+
+    def _close_window(self) -> None:
+        with self._lock:
+            self._timer = None
+            offset, self._pending_offset = self._pending_offset, 0
+            position, self._pending_position = self._pending_position, None
+            if position is None and not offset:
+                self._in_burst = False
+                return
+        if position is not None:
+            self._send_and_open_window(lambda: self._set_position(max(0, position)))
+        else:
+            self._send_and_open_window(lambda: self._seek(offset))
+
+    def flush(self) -> None:
+        """Sends the pending seek or set_position, if any, immediately and ends the
+        burst"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._in_burst = False
+            offset, self._pending_offset = self._pending_offset, 0
+            position, self._pending_position = self._pending_position, None
+        if position is not None:
+            self._set_position(max(0, position))
+        elif offset:
+            self._seek(offset)
@@ -0,0 +1,46 @@
+"""Dispatching of D-Bus signals for the player backends.
+
+D-Bus signals are delivered through a GLib main loop. The GUI's main thread is
+owned by the Tk main loop and the console UI blocks on input, so the GLib main
+loop is run in a daemon thread that is started on demand."""
+
+import threading
+from chapters.logger_config import logger
+
+_loop_thread: threading.Thread = None
+_loop_lock = threading.Lock()
+
+
+def install_dbus_python_main_loop() -> bool:
+    """dbus-python only attaches a main loop to bus connections that are created
+    after the default main loop is set. It is therefore installed as soon as the
+    dbus-python backend is imported.
+    returns: True if the GLib main loop integration is available."""
+    try:
+        from dbus.mainloop.glib import DBusGMainLoop
+    except ImportError:
+        logger().debug("dbus.mainloop.glib is not available")
+        return False
+    DBusGMainLoop(set_as_default=True)
+    return True
+
+
+def ensure_signal_loop() -> bool:
+    """Starts the GLib main loop in a daemon thread, if it is not already running.
+    returns: True if the loop is running, False if GLib is not available."""
+    global _loop_thread
+    with _loop_lock:
+        if _loop_thread is not None and _loop_thread.is_alive():
+            return True
+        try:
+            from gi.repository import GLib
+        except ImportError:
+            logger().warning("GLib is not available, D-Bus signals cannot be received")
+            return False
+        loop = GLib.MainLoop()
+        _loop_thread = threading.Thread(
+            target=loop.run, name="dbus-signal-loop", daemon=True
+        )
+        _loop_thread.start()
+        logger().debug("Started the D-Bus signal loop")
+        return True
@@ -0,0 +1,3 @@
+"""Fake MPRIS players on a private session bus, for tests and benchmarks"""
+
+from .session import *
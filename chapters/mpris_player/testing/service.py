@@ -0,0 +1,226 @@
+"""A scriptable fake MPRIS player, published with dbus-next.
+
+Started by MockMprisSession.add_player in its own process, so that a crash or a
+hang of the player can be simulated by signalling the process. Every method call
+and property read is answered after the configured latency.
+
+Usage: python -m chapters.mpris_player.testing.service NAME [--latency SECONDS]
+           [--trackid {valid,invalid,missing}] [--length MICROSECONDS]
+"""
+
+import argparse
+import asyncio
+import time
+from dbus_next import BusType, Variant
+from dbus_next.aio import MessageBus
+from dbus_next.service import PropertyAccess, ServiceInterface, dbus_property
+from dbus_next.service import method, signal
+
+OBJECT_PATH = "/org/mpris/MediaPlayer2"
+TRACKIDS = {
+    "valid": Variant("o", "/org/mpris/MediaPlayer2/Track/1"),
+    # Players such as Spotify use identifiers that are not object paths
+    "invalid": Variant("s", "spotify:track:4uLU6hMCjMI75M1A2tKUQC"),
+    "missing": None,
+}
+
+
+class PlaybackState:
+    """The state of the fake player, the position advances while it plays"""
+
+    def __init__(self, trackid: str, length: int) -> None:
+        self.trackid = TRACKIDS[trackid]
+        self.length = length
+        self.status = "Paused"
+        self._position = 0
+        self._anchor = time.monotonic()
+
+    @property
+    def position(self) -> int:
+        position = self._position
+        if self.status == "Playing":
+            position += int((time.monotonic() - self._anchor) * 1_000_000)
+        return max(0, min(position, self.length))
+
+    @position.setter
+    def position(self, position: int) -> None:
+        self._position = max(0, min(position, self.length))
+        self._anchor = time.monotonic()
+
+    def set_status(self, status: str) -> None:
+        self.position = self.position
+        self.status = status
+
+    def metadata(self) -> dict:
+        metadata = {
+            "mpris:length": Variant("x", self.length),
+            "xesam:title": Variant("s", "Mock lecture"),
+            "xesam:url": Variant("s", "file:///tmp/mock_lecture.mp4"),
+        }
+        if self.trackid is not None:
+            metadata["mpris:trackid"] = self.trackid
+        return metadata
+
+
+class MediaPlayer2Interface(ServiceInterface):
+    def __init__(self, name: str, latency: float) -> None:
+        super().__init__("org.mpris.MediaPlayer2")
+        self._name = name
+        self._latency = latency
+
+    @method()
+    async def Raise(self):
+        await asyncio.sleep(self._latency)
+
+    @method()
+    async def Quit(self):
+        await asyncio.sleep(self._latency)
+
+    @dbus_property(access=PropertyAccess.READ)
+    async def Identity(self) -> "s":
+        await asyncio.sleep(self._latency)
+        return f"Mock {self._name}"
+
+    @dbus_property(access=PropertyAccess.READ)
+    async def DesktopEntry(self) -> "s":
+        await asyncio.sleep(self._latency)
+        return f"mock-{self._name}"
+
+    @dbus_property(access=PropertyAccess.READ)
+    async def CanRaise(self) -> "b":
+        return True
+
+    @dbus_property(access=PropertyAccess.READ)
+    async def CanQuit(self) -> "b":
+        return True
+
+
+class PlayerInterface(ServiceInterface):
+    def __init__(self, state: PlaybackState, latency: float) -> None:
+        super().__init__("org.mpris.MediaPlayer2.Player")
+        self._state = state
+        self._latency = latency
+
+    def _playback_status_changed(self) -> None:
+        self.emit_properties_changed({"PlaybackStatus": self._state.status})
+
+    @method()
+    async def Play(self):
+        await asyncio.sleep(self._latency)
+        self._state.set_status("Playing")
+        self._playback_status_changed()
+
+    @method()
+    async def Pause(self):
+        await asyncio.sleep(self._latency)
+        self._state.set_status("Paused")
+        self._playback_status_changed()
+
+    @method()
+    async def PlayPause(self):
+        await asyncio.sleep(self._latency)
+        status = "Paused" if self._state.status == "Playing" else "Playing"
+        self._state.set_status(status)
+        self._playback_status_changed()
+
+    @method()
+    async def Stop(self):
+        await asyncio.sleep(self._latency)
+        self._state.set_status("Stopped")
+        self._state.position = 0
+        self._playback_status_changed()
+
+    @method()
+    async def Next(self):
+        await asyncio.sleep(self._latency)
+
+    @method()
+    async def Previous(self):
+        await asyncio.sleep(self._latency)
+
+    @method()
+    async def Seek(self, offset: "x"):
+        await asyncio.sleep(self._latency)
+        self._state.position = self._state.position + offset
+        self.Seeked()
+
+    @method()
+    async def SetPosition(self, trackid: "o", position: "x"):
+        await asyncio.sleep(self._latency)
+        # As required by MPRIS, stale or invalid trackids are ignored
+        if self._state.trackid is None or trackid != self._state.trackid.value:
+            return
+        if 0 <= position <= self._state.length:
+            self._state.position = position
+            self.Seeked()
+
+    @signal()
+    def Seeked(self) -> "x":
+        return self._state.position
+
+    @dbus_property(access=PropertyAccess.READ)
+    async def PlaybackStatus(self) -> "s":
+        await asyncio.sleep(self._latency)
+        return self._state.status
+
+    @dbus_property(access=PropertyAccess.READ)
+    async def Position(self) -> "x":
+        await asyncio.sleep(self._latency)
+        return self._state.position
+
+    @dbus_property(access=PropertyAccess.READ)
+    async def Rate(self) -> "d":
+        return 1.0
+
+    @dbus_property(access=PropertyAccess.READ)
+    async def Metadata(self) -> "a{sv}":
+        await asyncio.sleep(self._latency)
+        return self._state.metadata()
+
+    @dbus_property(access=PropertyAccess.READ)
+    async def CanControl(self) -> "b":
+        return True
+
+    @dbus_property(access=PropertyAccess.READ)
+    async def CanSeek(self) -> "b":
+        return True
+
+    @dbus_property(access=PropertyAccess.READ)
+    async def CanPlay(self) -> "b":
+        return True
+
+    @dbus_property(access=PropertyAccess.READ)
+    async def CanPause(self) -> "b":
+        return True
+
+    @dbus_property(access=PropertyAccess.READ)
+    async def CanGoNext(self) -> "b":
+        return True
+
+    @dbus_property(access=PropertyAccess.READ)
+    async def CanGoPrevious(self) -> "b":
+        return True
+
+
+async def serve(arguments: argparse.Namespace) -> None:
+    bus = await MessageBus(bus_type=BusType.SESSION).connect()
+    state = PlaybackState(arguments.trackid, arguments.length)
+    bus.export(OBJECT_PATH, MediaPlayer2Interface(arguments.name, arguments.latency))
+    bus.export(OBJECT_PATH, PlayerInterface(state, arguments.latency))
+    await bus.request_name(f"org.mpris.MediaPlayer2.{arguments.name}")
+    # MockMprisSession waits for this line before using the player
+    print("ready", flush=True)
+    await bus.wait_for_disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("name")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--trackid", choices=list(TRACKIDS), default="valid")
+    parser.add_argument("--length", type=int, default=3600 * 1_000_000)
+    asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
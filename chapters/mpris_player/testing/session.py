@@ -0,0 +1,189 @@
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+SESSION_CONFIG = """<!DOCTYPE busconfig PUBLIC
+ "-//freedesktop//DTD D-Bus Bus Configuration 1.0//EN"
+ "http://www.freedesktop.org/standards/dbus/1.0/busconfig.dtd">
+<busconfig>
+  <type>session</type>
+  <listen>unix:dir={socket_dir}</listen>
+  <auth>EXTERNAL</auth>
+  <policy context="default">
+    <allow send_destination="*" eavesdrop="true"/>
+    <allow eavesdrop="true"/>
+    <allow own="*"/>
+  </policy>
+</busconfig>
+"""
+
+
+class MockPlayer:
+    """A fake MPRIS player running in its own process on a MockMprisSession"""
+
+    def __init__(self, session: "MockMprisSession", name: str, args: List[str]):
+        self._session = session
+        self.name = name
+        self.fq_name = f"org.mpris.MediaPlayer2.{name}"
+        self._args = args
+        self._process: subprocess.Popen = None
+
+    def start(self) -> None:
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "chapters.mpris_player.testing.service"]
+            + self._args,
+            env=self._session.environment(),
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        if self._process.stdout.readline().strip() != "ready":
+            self._process.kill()
+            raise RuntimeError(f"The mock player {self.name} did not start")
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def crash(self) -> None:
+        """Kills the player, its name vanishes from the bus"""
+        self._process.kill()
+        self._process.wait()
+
+    def restart(self) -> None:
+        """Starts the player again, with a new unique bus name"""
+        if self.running:
+            self.crash()
+        self.start()
+
+    def hang(self) -> None:
+        """Stops the player process, calls to it get no reply until resume"""
+        self._process.send_signal(signal.SIGSTOP)
+
+    def resume(self) -> None:
+        self._process.send_signal(signal.SIGCONT)
+
+    def stop(self) -> None:
+        if self._process is None:
+            return
+        self.resume()
+        self._process.terminate()
+        try:
+            self._process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+        self._process.stdout.close()
+
+
+class MockMprisSession:
+    """A private dbus-daemon session bus with scriptable fake MPRIS players, for
+    headless tests and benchmarks of the player layer.
+
+    While the session runs, DBUS_SESSION_BUS_ADDRESS points to the private bus,
+    so the player backends connect to it:
+
+        with MockMprisSession() as session:
+            session.add_player("vlc", latency=0.01, trackid="invalid")
+            players = PlayerFactory.get_running_player_names()
+
+    Requires the dbus-daemon executable and, for the players, dbus-next."""
+
+    def __init__(self) -> None:
+        self._directory: tempfile.TemporaryDirectory = None
+        self._daemon: subprocess.Popen = None
+        self._players: Dict[str, MockPlayer] = {}
+        self._saved_address: str = None
+        self.address: str = None
+
+    @staticmethod
+    def available() -> bool:
+        """Whether a session can be started on this host"""
+        try:
+            import dbus_next  # noqa: F401
+        except ImportError:
+            return False
+        return shutil.which("dbus-daemon") is not None
+
+    def environment(self) -> Dict[str, str]:
+        environment = dict(os.environ)
+        environment["DBUS_SESSION_BUS_ADDRESS"] = self.address
+        return environment
+
+    def start(self) -> None:
+        self._directory = tempfile.TemporaryDirectory(prefix="mock-mpris-")
+        config_file = os.path.join(self._directory.name, "session.conf")
+        with open(config_file, "w") as config:
+            config.write(SESSION_CONFIG.format(socket_dir=self._directory.name))
+        self._daemon = subprocess.Popen(
+            [
+                "dbus-daemon",
+                f"--config-file={config_file}",
+                "--nofork",
+                "--nopidfile",
+                "--print-address=1",
+            ],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        self.address = self._daemon.stdout.readline().strip()
+        if not self.address:
+            self.stop()
+            raise RuntimeError("dbus-daemon did not start")
+        self._saved_address = os.environ.get("DBUS_SESSION_BUS_ADDRESS")
+        os.environ["DBUS_SESSION_BUS_ADDRESS"] = self.address
+
+    def add_player(
+        self,
+        name: str,
+        latency: float = 0.0,
+        trackid: str = "valid",
+        length: int = 3600 * 1_000_000,
+    ) -> MockPlayer:
+        """Starts a fake player that owns org.mpris.MediaPlayer2.<name>.
+        :param latency: the time, in seconds, the player takes to answer a call.
+        :param trackid: valid, invalid (not an object path, SetPosition cannot be
+        used) or missing from the metadata.
+        :param length: the length of the track in microseconds."""
+        args = [name, f"--latency={latency}", f"--trackid={trackid}"]
+        args.append(f"--length={length}")
+        player = MockPlayer(self, name, args)
+        player.start()
+        self._players[name] = player
+        return player
+
+    def player(self, name: str) -> MockPlayer:
+        return self._players[name]
+
+    def remove_player(self, name: str) -> None:
+        """Stops the fake player, its name leaves the bus"""
+        player = self._players.pop(name, None)
+        if player is not None:
+            player.stop()
+
+    def stop(self) -> None:
+        for player in self._players.values():
+            player.stop()
+        self._players.clear()
+        if self._daemon is not None:
+            self._daemon.terminate()
+            self._daemon.wait()
+            self._daemon.stdout.close()
+            self._daemon = None
+        if self._saved_address is None:
+            os.environ.pop("DBUS_SESSION_BUS_ADDRESS", None)
+        else:
+            os.environ["DBUS_SESSION_BUS_ADDRESS"] = self._saved_address
+        if self._directory is not None:
+            self._directory.cleanup()
+            self._directory = None
+
+    def __enter__(self) -> "MockMprisSession":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,70 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from chapters.chapter_index import ChapterIndex
+
+"""Unit tests for the chapter index"""
+
+
+class TestChapterIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.index_path = Path(self.directory.name) / "chapter_index.json"
+        self.index = ChapterIndex(self.index_path)
+        self.chapters_file = Path(self.directory.name) / "movie.ch"
+        self.chapters_file.write_text("{}")
+
+    def test_lookup_by_url(self):
+        self.index.add({"xesam:url": "/videos/my movie.mkv"}, str(self.chapters_file))
+        self.assertEqual(
+            self.index.lookup({"xesam:url": "file:///videos/my%20movie.mkv"}),
+            str(self.chapters_file),
+        )
+        self.assertIsNone(self.index.lookup({"xesam:url": "/videos/other.mkv"}))
+        self.assertIsNone(self.index.lookup({}))
+
+    def test_lookup_by_title_without_url(self):
+        self.index.add({"xesam:title": "My Movie"}, str(self.chapters_file))
+        self.assertEqual(
+            self.index.lookup({"xesam:title": "My Movie"}), str(self.chapters_file)
+        )
+        self.assertIsNone(
+            self.index.lookup(
+                {"xesam:title": "My Movie", "xesam:url": "https://example.org/x"}
+            )
+        )
+
+    def test_missing_chapters_file_is_not_returned(self):
+        self.index.add({"xesam:url": "/videos/movie.mkv"}, str(self.chapters_file))
+        self.chapters_file.unlink()
+        self.assertIsNone(self.index.lookup({"xesam:url": "/videos/movie.mkv"}))
+
+    def test_index_is_persistent(self):
+        self.assertFalse(self.index.add({}, str(self.chapters_file)))
+        self.index.add({"xesam:url": "/videos/movie.mkv"}, str(self.chapters_file))
+        index = ChapterIndex(self.index_path)
+        self.assertEqual(len(index), 1)
+        self.assertEqual(
+            index.lookup({"xesam:url": "/videos/movie.mkv"}), str(self.chapters_file)
+        )
+
+    def test_lookup_time_does_not_depend_on_the_index_size(self):
+        index = ChapterIndex(self.index_path)
+        index._load().update(
+            {
+                key: str(self.chapters_file)
+                for i in range(20_000)
+                for key in ChapterIndex.media_keys({"xesam:url": f"/videos/{i}.mkv"})
+            }
+        )
+        self.assertEqual(len(index), 20_000)
+        start = time.perf_counter()
+        for i in range(1000):
+            index.lookup({"xesam:url": f"/videos/{i * 20}.mkv"})
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,1023 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+from chapters import helpers
+from chapters.mpris_player.player import Player, PlayerState, PlayerTimeoutError
+from chapters.mpris_player.call_timeouts import CallTimeouts
+from chapters.mpris_player.player_group import PlayerGroup
+from chapters.mpris_player.proxy_player import PlayerProxy
+from chapters.mpris_player.latency_stats import LatencyHistogram, LatencyRecorder
+from chapters.mpris_player.expiring_set import ExpiringSet
+from chapters.mpris_player.player_simulated import Player_simulated
+from chapters.mpris_player.player_simulated import constant_latency
+from chapters.mpris_player.player_simulated import SimulatedDBusError
+from chapters.mpris_player.backend_selection import BackendSelector
+from chapters.mpris_player.capability_cache import CapabilityCache
+from chapters.mpris_player.seek_calibration import SeekCalibration
+from chapters.mpris_player.player_watchdog import PlayerWatchdog
+from chapters.mpris_player.reconnect_policy import PlayerDisconnectedError
+from chapters.mpris_player.player import PlayerCreationError
+from chapters.mpris_player.property_cache import PropertyCache, PLAYER_INTERFACE
+from chapters.mpris_player.position_clock import PositionClock
+from chapters.mpris_player.metadata import decode, metadata_diff, select_metadata
+from chapters.mpris_player.player_factory import PlayerFactory
+from chapters.mpris_player.player_registry import PlayerRegistry
+from chapters.mpris_player.bus_manager import BusConnectionManager
+from chapters.mpris_player.command_dispatcher import CommandDispatcher
+from chapters.mpris_player.seek_coalescer import SeekCoalescer
+from chapters.mpris_player.reconnect_policy import (
+    CircuitState,
+    ErrorKind,
+    ReconnectPolicy,
+    classify_error,
+)
+
+"""Unit tests for the bus independent parts of the mpris_player package"""
+
+
+def setUpModule():
+    # Keep the players seen by the tests out of the user's cache files
+    global _cache_directory
+    _cache_directory = tempfile.TemporaryDirectory()
+    capability_cache = mock.patch.object(
+        Player,
+        "capability_cache",
+        CapabilityCache(Path(_cache_directory.name) / "players.json"),
+    )
+    capability_cache.start()
+    unittest.addModuleCleanup(capability_cache.stop)
+    seek_calibration = mock.patch.object(
+        Player,
+        "seek_calibration",
+        SeekCalibration(Path(_cache_directory.name) / "calibration.json"),
+    )
+    seek_calibration.start()
+    unittest.addModuleCleanup(seek_calibration.stop)
+    unittest.addModuleCleanup(_cache_directory.cleanup)
+
+
+class TestPlayerState(unittest.TestCase):
+    def test_from_properties(self):
+        state = PlayerState.from_properties(
+            {
+                "PlaybackStatus": "Playing",
+                "Position": 5000000,
+                "Rate": 1.0,
+                "Metadata": {"mpris:trackid": "/org/mpris/track/1"},
+                "CanControl": True,
+                "CanSeek": True,
+            }
+        )
+        self.assertEqual(state.playback_status, "Playing")
+        self.assertEqual(state.position, 5000000)
+        self.assertEqual(state.trackid, "/org/mpris/track/1")
+        self.assertTrue(state.can_control)
+        self.assertTrue(state.can_seek)
+        self.assertFalse(state.can_pause)
+
+    def test_from_properties_missing_values(self):
+        state = PlayerState.from_properties({})
+        self.assertIsNone(state.playback_status)
+        self.assertEqual(state.position, 0)
+        self.assertEqual(state.trackid, "")
+        self.assertEqual(state.metadata, {})
+
+    def test_slots(self):
+        state = PlayerState()
+        self.assertRaises(AttributeError, setattr, state, "unknown", 1)
+
+
+class TestPropertyCache(unittest.TestCase):
+    def setUp(self):
+        self.bus_calls = []
+        self.properties = {
+            "PlaybackStatus": "Paused",
+            "Position": 1000000,
+            "Metadata": {"mpris:trackid": "/track/1"},
+        }
+        self.cache = PropertyCache(self._get_property, self._get_all_properties)
+
+    def _get_property(self, interface_name, property_name):
+        self.bus_calls.append(property_name)
+        return self.properties[property_name]
+
+    def _get_all_properties(self, interface_name):
+        self.bus_calls.append("GetAll")
+        return dict(self.properties)
+
+    def test_reads_are_cached(self):
+        self.cache.get(PLAYER_INTERFACE, "Metadata")
+        self.cache.get(PLAYER_INTERFACE, "Metadata")
+        self.assertEqual(self.bus_calls, ["Metadata"])
+
+    def test_properties_changed_updates_cache(self):
+        self.cache.get(PLAYER_INTERFACE, "Metadata")
+        new_metadata = {"mpris:trackid": "/track/2"}
+        self.cache.properties_changed(PLAYER_INTERFACE, {"Metadata": new_metadata}, [])
+        self.assertEqual(self.cache.get(PLAYER_INTERFACE, "Metadata"), new_metadata)
+        self.assertEqual(self.bus_calls, ["Metadata"])
+
+    def test_position_is_extrapolated(self):
+        self.cache.get_all(PLAYER_INTERFACE)
+        self.cache.get(PLAYER_INTERFACE, "Position")
+        self.cache.properties_changed(
+            PLAYER_INTERFACE, {"PlaybackStatus": "Playing"}, []
+        )
+        self.cache.get(PLAYER_INTERFACE, "Position")
+        self.assertEqual(self.bus_calls, ["GetAll"])
+
+    def test_position_is_retrieved_when_drift_is_too_large(self):
+        cache = PropertyCache(
+            self._get_property, self._get_all_properties, max_position_drift=-1
+        )
+        cache.get_all(PLAYER_INTERFACE)
+        cache.get(PLAYER_INTERFACE, "Position")
+        self.assertEqual(self.bus_calls, ["GetAll", "Position"])
+
+    def test_seeked_updates_position(self):
+        self.cache.get_all(PLAYER_INTERFACE)
+        self.cache.seeked(5000000)
+        self.assertEqual(self.cache.get(PLAYER_INTERFACE, "Position"), 5000000)
+        self.assertEqual(self.bus_calls, ["GetAll"])
+
+    def test_track_listeners(self):
+        tracks = []
+        self.cache.add_track_listener(tracks.append)
+        self.cache.get(PLAYER_INTERFACE, "Metadata")
+        self.cache.properties_changed(
+            PLAYER_INTERFACE, {"Metadata": {"mpris:trackid": "/track/1"}}, []
+        )
+        self.cache.properties_changed(
+            PLAYER_INTERFACE, {"Metadata": {"mpris:trackid": "/track/2"}}, []
+        )
+        self.assertEqual(tracks, [{"mpris:trackid": "/track/2"}])
+
+    def test_failing_track_listener(self):
+        tracks = []
+        self.cache.add_track_listener(mock.Mock(side_effect=ValueError))
+        self.cache.add_track_listener(tracks.append)
+        self.cache.properties_changed(
+            PLAYER_INTERFACE, {"Metadata": {"mpris:trackid": "/track/2"}}, []
+        )
+        self.assertEqual(len(tracks), 1)
+
+    def test_clear(self):
+        self.cache.get(PLAYER_INTERFACE, "Metadata")
+        self.cache.clear(":1.42", "")
+        self.cache.get(PLAYER_INTERFACE, "Metadata")
+        self.assertEqual(self.bus_calls, ["Metadata", "Metadata"])
+
+
+class FakeVariant:
+    def __init__(self, signature, value):
+        self.signature = signature
+        self.value = value
+
+
+class TestMetadata(unittest.TestCase):
+    def test_decode(self):
+        class ObjectPath(str):
+            pass
+
+        class Boolean(int):
+            # dbus.Boolean, as dbus-python returns it
+            variant_level = 0
+
+        self.assertIs(type(decode(ObjectPath("/track/1"))), str)
+        self.assertIs(decode(Boolean(1)), True)
+        self.assertIs(decode(Boolean(0)), False)
+        self.assertEqual(PlayerProxy(None).metadata_values("mpris:trackid"), {})
+        self.assertEqual(decode(FakeVariant("as", ["Artist"])), ["Artist"])
+        self.assertEqual(decode(mock.Mock(unpack=lambda: 42)), 42)
+
+    def test_select_metadata_decodes_only_the_selected_keys(self):
+        lyrics = mock.Mock()
+        lyrics.unpack.side_effect = AssertionError("lyrics should not be decoded")
+        metadata = {
+            "mpris:trackid": FakeVariant("o", "/track/1"),
+            "xesam:asText": lyrics,
+        }
+        self.assertEqual(
+            select_metadata(metadata, ("mpris:trackid", "xesam:url")),
+            {"mpris:trackid": "/track/1"},
+        )
+        self.assertEqual(select_metadata(None, ("mpris:trackid",)), {})
+
+    def test_metadata_diff(self):
+        art = ["x" * 100_000]
+        previous = {"mpris:trackid": "/track/1", "mpris:artUrl": art}
+        current = {"mpris:trackid": "/track/2", "mpris:artUrl": art}
+        self.assertEqual(metadata_diff(previous, current), {"mpris:trackid"})
+        self.assertEqual(metadata_diff(previous, dict(previous)), frozenset())
+        self.assertEqual(
+            metadata_diff(previous, {}, ("mpris:trackid",)), {"mpris:trackid"}
+        )
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPositionClock(unittest.TestCase):
+    def setUp(self):
+        self.time = FakeClock()
+        self.clock = PositionClock(
+            drift_rate=0.01, signal_latency=1000, clock=self.time
+        )
+
+    def test_not_anchored(self):
+        self.assertFalse(self.clock.synced)
+        self.assertRaises(ValueError, self.clock.estimated_position)
+
+    def test_extrapolates_while_playing(self):
+        self.clock.anchor(1000000, rate=1.0, playback_status="Playing")
+        self.time.now += 2
+        self.assertEqual(self.clock.estimated_position(), 3000000)
+        self.assertEqual(self.clock.drift_bound(), 20000)
+
+    def test_rate(self):
+        self.clock.anchor(0, rate=2.0, playback_status="Playing")
+        self.time.now += 1
+        self.assertEqual(self.clock.estimated_position(), 2000000)
+
+    def test_paused(self):
+        self.clock.anchor(1000000, playback_status="Paused")
+        self.time.now += 10
+        self.assertEqual(self.clock.estimate(), (1000000, 0))
+
+    def test_status_change_reanchors(self):
+        self.clock.anchor(0, playback_status="Playing")
+        self.time.now += 1
+        self.clock.set_playback_status("Paused")
+        self.time.now += 5
+        self.assertEqual(self.clock.estimated_position(), 1000000)
+        self.assertEqual(self.clock.drift_bound(), 11000)
+
+    def test_seeked(self):
+        self.clock.anchor(0, playback_status="Playing")
+        self.time.now += 1
+        self.clock.seeked(60000000)
+        self.assertEqual(self.clock.estimate(), (60000000, 1000))
+
+    def test_length_limits_estimate(self):
+        self.clock.anchor(0, playback_status="Playing")
+        self.clock.set_length(500000)
+        self.time.now += 1
+        self.assertEqual(self.clock.estimated_position(), 500000)
+
+
+class TestPlayerRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = PlayerRegistry()
+        running_players = {
+            "vlc": "org.mpris.MediaPlayer2.vlc",
+            "mpv": "org.mpris.MediaPlayer2.mpv",
+            "firefox": "org.mpris.MediaPlayer2.firefox",
+        }
+        with mock.patch.object(
+            PlayerFactory, "get_running_player_names", return_value=running_players
+        ):
+            self.registry.refresh()
+
+    def test_cycling(self):
+        self.assertEqual(self.registry.next_player_name("vlc"), "mpv")
+        self.assertEqual(self.registry.next_player_name("firefox"), "vlc")
+        self.assertEqual(self.registry.previous_player_name("vlc"), "firefox")
+        self.assertEqual(self.registry.next_player_name(None), "vlc")
+
+    def test_name_owner_changed(self):
+        self.registry._name_owner_changed("org.mpris.MediaPlayer2.mpv", ":1.5", "")
+        self.assertEqual(self.registry.next_player_name("vlc"), "firefox")
+        with mock.patch.object(
+            PlayerFactory,
+            "_validate_players",
+            return_value=iter([("mpv", "org.mpris.MediaPlayer2.mpv")]),
+        ):
+            self.registry._validate_and_add("org.mpris.MediaPlayer2.mpv")
+        self.assertEqual(self.registry.previous_player_name("vlc"), "mpv")
+
+    def test_ignores_other_services(self):
+        self.registry._name_owner_changed("org.gnome.Shell", ":1.5", "")
+        self.assertEqual(len(self.registry), 3)
+
+    def test_changes_during_refresh_are_kept(self):
+        def discover():
+            # Signalled while the players are being discovered
+            self.registry._remove("org.mpris.MediaPlayer2.vlc")
+            with mock.patch.object(
+                PlayerFactory,
+                "_validate_players",
+                return_value=iter([("mpv", "org.mpris.MediaPlayer2.mpv")]),
+            ):
+                self.registry._validate_and_add("org.mpris.MediaPlayer2.mpv")
+            return {"vlc": "org.mpris.MediaPlayer2.vlc"}
+
+        with mock.patch.object(
+            PlayerFactory, "get_running_player_names", side_effect=discover
+        ):
+            self.registry.refresh()
+        self.assertEqual(len(self.registry), 1)
+        self.assertEqual(
+            self.registry.fq_player_name("mpv"), "org.mpris.MediaPlayer2.mpv"
+        )
+
+
+class FakeBus:
+    def __init__(self):
+        self.connected = True
+
+
+class ProxyOwner:
+    pass
+
+
+class TestBusConnectionManager(unittest.TestCase):
+    def setUp(self):
+        self.manager = BusConnectionManager(
+            backend_name="test", connect=FakeBus, is_connected=lambda b: b.connected
+        )
+
+    def test_connection_is_shared(self):
+        self.assertIs(self.manager.get_bus(), self.manager.get_bus())
+        self.assertEqual(self.manager.connections_opened, 1)
+
+    def test_reconnects_when_dropped(self):
+        bus = self.manager.get_bus()
+        self.assertEqual(self.manager.connections_alive, 1)
+        bus.connected = False
+        self.assertEqual(self.manager.connections_alive, 0)
+        self.assertIsNot(self.manager.get_bus(), bus)
+        self.assertEqual(self.manager.reconnections, 1)
+        self.assertEqual(self.manager.connections_alive, 1)
+
+    def test_proxies_alive(self):
+        owner = ProxyOwner()
+        self.manager.register_proxy(owner)
+        self.manager.register_proxy(owner)
+        self.assertEqual(self.manager.proxies_alive, 1)
+        self.assertEqual(self.manager.proxies_created, 2)
+        del owner
+        self.assertEqual(self.manager.proxies_alive, 0)
+
+
+class TestCommandDispatcher(unittest.TestCase):
+    def test_commands_are_sent_in_order(self):
+        sent = []
+        dispatcher = CommandDispatcher()
+        for i in range(10):
+            dispatcher.submit("seek", sent.append, i)
+        dispatcher.wait_until_idle()
+        dispatcher.stop()
+        self.assertEqual(sent, list(range(10)))
+
+    def test_failures_are_reported(self):
+        errors = []
+
+        def fail():
+            raise RuntimeError("player gone")
+
+        dispatcher = CommandDispatcher(
+            on_error=lambda name, e: errors.append((name, str(e)))
+        )
+        dispatcher.submit("play_pause", fail)
+        dispatcher.wait_until_idle()
+        dispatcher.stop()
+        self.assertEqual(errors, [("play_pause", "player gone")])
+
+
+class TestSeekCoalescer(unittest.TestCase):
+    def setUp(self):
+        self.sent = []
+        self.coalescer = SeekCoalescer(
+            seek=lambda offset: self.sent.append(("seek", offset)),
+            set_position=lambda position: self.sent.append(("set_position", position)),
+            window=60,
+        )
+        self.addCleanup(self.coalescer.flush)
+
+    def test_seeks_are_added_up(self):
+        for _ in range(5):
+            self.coalescer.seek(5000000)
+        self.coalescer.seek(-10000000)
+        # The first seek of the burst is sent immediately
+        self.assertEqual(self.sent, [("seek", 5000000)])
+        self.assertTrue(self.coalescer.pending)
+        self.coalescer.flush()
+        self.assertEqual(self.sent, [("seek", 5000000), ("seek", 10000000)])
+
+    def test_set_position_absorbs_later_seeks(self):
+        self.coalescer.set_position(30000000)
+        self.coalescer.seek(5000000)
+        self.coalescer.set_position(60000000)
+        self.coalescer.seek(10000000)
+        self.coalescer.flush()
+        self.assertEqual(
+            self.sent, [("set_position", 30000000), ("set_position", 70000000)]
+        )
+
+    def test_window_closes(self):
+        self.coalescer.seek(1000000)
+        self.coalescer.seek(2000000)
+        timer = self.coalescer._timer
+        timer.cancel()
+        timer.function()
+        self.assertEqual(self.sent, [("seek", 1000000), ("seek", 2000000)])
+        self.assertFalse(self.coalescer.pending)
+        # A window without seeks ends the burst
+        self.coalescer.window = 0.01
+        self.coalescer._timer.cancel()
+        self.coalescer._timer.function()
+        self.coalescer.seek(3000000)
+        self.coalescer._timer.join()
+        self.coalescer.seek(4000000)
+        self.assertEqual(self.sent[2:], [("seek", 3000000), ("seek", 4000000)])
+
+    def test_nothing_pending(self):
+        self.coalescer.flush()
+        self.assertEqual(self.sent, [])
+
+
+class TestReconnectPolicy(unittest.TestCase):
+    def setUp(self):
+        self.time = FakeClock()
+        self.policy = ReconnectPolicy(
+            initial_backoff=1.0,
+            backoff_multiplier=2.0,
+            max_backoff=3.0,
+            clock=self.time,
+        )
+        self.states = []
+        self.policy.add_listener(self.states.append)
+
+    def test_opens_on_failure(self):
+        self.assertTrue(self.policy.allow_call())
+        self.policy.record_failure()
+        self.assertIs(self.policy.state, CircuitState.OPEN)
+        self.assertFalse(self.policy.allow_call())
+        self.assertEqual(self.states, [CircuitState.OPEN])
+
+    def test_backoff(self):
+        self.policy.record_failure()
+        self.time.now += 1
+        self.assertIs(self.policy.state, CircuitState.HALF_OPEN)
+        self.policy.record_failure()
+        self.time.now += 1.5
+        self.assertFalse(self.policy.allow_call())
+        self.time.now += 0.5
+        self.assertTrue(self.policy.allow_call())
+        self.policy.record_failure()
+        self.assertAlmostEqual(self.policy.retry_in, 3.0)
+
+    def test_success_closes(self):
+        self.policy.record_failure()
+        self.time.now += 1
+        self.policy.record_success()
+        self.assertIs(self.policy.state, CircuitState.CLOSED)
+        self.assertEqual(self.states, [CircuitState.OPEN, CircuitState.CLOSED])
+
+    def test_classify_error(self):
+        self.assertIs(
+            classify_error(
+                Exception(
+                    "g-dbus-error-quark: GDBus.Error:"
+                    "org.freedesktop.DBus.Error.ServiceUnknown: The name is not owned"
+                )
+            ),
+            ErrorKind.DISCONNECTED,
+        )
+        self.assertIs(
+            classify_error(Exception("org.freedesktop.DBus.Error.NoReply")),
+            ErrorKind.TIMEOUT,
+        )
+        self.assertIs(
+            classify_error(Exception("org.freedesktop.DBus.Error.NotSupported")),
+            ErrorKind.OTHER,
+        )
+
+
+class TestCallTimeouts(unittest.TestCase):
+    def test_timeouts(self):
+        timeouts = CallTimeouts(default=3.0, Seek=0.25, Foo=7.0)
+        self.assertEqual(timeouts.timeout("Seek"), 0.25)
+        self.assertEqual(timeouts.timeout("Get"), CallTimeouts.default_timeouts["Get"])
+        self.assertEqual(timeouts.timeout("Unknown"), 3.0)
+        self.assertEqual(timeouts.max_timeout, 7.0)
+
+    def test_call_passes_timeout(self):
+        player = mock.Mock(_timeouts=CallTimeouts(Seek=0.25), _ext_name="vlc")
+        method = mock.Mock(return_value=None)
+        Player._call(player, method, "Seek", 10)
+        method.assert_called_once_with(10, timeout=0.25)
+
+    def test_call_converts_timeouts(self):
+        player = mock.Mock(_timeouts=CallTimeouts(), _ext_name="vlc")
+        method = mock.Mock(side_effect=Exception("org.freedesktop.DBus.Error.NoReply"))
+        with self.assertRaises(PlayerTimeoutError):
+            Player._call(player, method, "Play")
+        method = mock.Mock(side_effect=ValueError("not a timeout"))
+        with self.assertRaises(ValueError):
+            Player._call(player, method, "Play")
+
+
+class GroupMember:
+    """A player whose commands take latency seconds and land offset microseconds
+    away from the requested position"""
+
+    def __init__(self, ext_name, latency=0.0, offset=0, fail=False):
+        self.ext_name = ext_name
+        self.latency = latency
+        self.offset = offset
+        self.fail = fail
+        self.position = 0
+
+    def set_position(self, to_position):
+        time.sleep(self.latency)
+        if self.fail:
+            raise Exception("org.freedesktop.DBus.Error.ServiceUnknown")
+        self.position = to_position + self.offset
+
+    def retrieve_position(self):
+        return self.position
+
+
+class TestPlayerGroup(unittest.TestCase):
+    def test_commands_are_sent_concurrently(self):
+        members = [GroupMember(f"player{i}", latency=0.1) for i in range(4)]
+        group = PlayerGroup(members)
+        start = time.perf_counter()
+        group.set_position(1000000)
+        self.assertLess(time.perf_counter() - start, 0.3)
+        self.assertEqual([m.position for m in members], [1000000] * 4)
+
+    def test_reports_spread(self):
+        reports = []
+        group = PlayerGroup([GroupMember("mpv"), GroupMember("vlc", offset=120000)])
+        group.add_report_listener(reports.append)
+        group.set_position(5000000)
+        self.assertEqual(reports, [group.last_report])
+        self.assertEqual(group.last_report.command, "set_position")
+        self.assertEqual(group.last_report.spread, 120000)
+        self.assertEqual(group.ext_name, "mpv+vlc")
+
+    def test_fails_only_if_all_members_fail(self):
+        group = PlayerGroup([GroupMember("mpv", fail=True), GroupMember("vlc")])
+        group.set_position(5000000)
+        self.assertEqual(list(group.last_report.positions), ["vlc"])
+        self.assertEqual(list(group.last_report.failures), ["mpv"])
+        group = PlayerGroup([GroupMember("mpv", fail=True)])
+        with self.assertRaises(Exception):
+            group.set_position(5000000)
+
+    def test_close(self):
+        group = PlayerGroup([GroupMember("mpv"), GroupMember("vlc")])
+        group.close()
+        with self.assertRaises(RuntimeError):
+            group.set_position(5000000)
+
+
+class TestLatencyStats(unittest.TestCase):
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for micros in range(1000, 101000, 1000):
+            histogram.record(micros)
+        histogram.record(2000000, failed=True)
+        summary = histogram.summary()
+        self.assertEqual(summary["count"], 101)
+        self.assertEqual(summary["errors"], 1)
+        self.assertEqual(summary["max"], 2000000)
+        # Percentiles are accurate to within one bucket (19%)
+        self.assertAlmostEqual(summary["p50"], 50000, delta=50000 * 0.19)
+        self.assertAlmostEqual(summary["p95"], 95000, delta=95000 * 0.19)
+        self.assertLessEqual(histogram.percentile(100), 2000000)
+
+    def test_recorder(self):
+        recorder = LatencyRecorder()
+        self.assertEqual(recorder.report(), "No player calls have been recorded.")
+        recorder.record("vlc", "Seek", 0.002)
+        recorder.record("vlc", "Seek", 0.004, failed=True)
+        recorder.record("mpv", "GetAll", 0.001)
+        histograms = recorder.histograms()
+        self.assertEqual(list(histograms), [("mpv", "GetAll"), ("vlc", "Seek")])
+        self.assertEqual(histograms[("vlc", "Seek")]["errors"], 1)
+        self.assertEqual(len(recorder.report().splitlines()), 3)
+        recorder.enabled = False
+        recorder.record("vlc", "Seek", 0.002)
+        self.assertEqual(recorder.histograms()[("vlc", "Seek")]["count"], 2)
+
+
+class TestExpiringSet(unittest.TestCase):
+    def setUp(self):
+        self.time = FakeClock()
+        self.unuseable = ExpiringSet(ttl=10, max_size=2, clock=self.time)
+
+    def test_expiry(self):
+        self.unuseable.add(":1.5")
+        self.assertIn(":1.5", self.unuseable)
+        self.time.now += 5
+        self.unuseable.add(":1.6")
+        self.time.now += 5
+        self.assertNotIn(":1.5", self.unuseable)
+        self.assertEqual(len(self.unuseable), 1)
+
+    def test_size_cap(self):
+        for owner in (":1.5", ":1.6", ":1.7"):
+            self.unuseable.add(owner)
+        self.assertNotIn(":1.5", self.unuseable)
+        self.assertEqual(len(self.unuseable), 2)
+
+    def test_unuseable_owner_is_not_probed_again(self):
+        owners = {"org.mpris.MediaPlayer2.vlc": ":1.5"}
+        with mock.patch.object(
+            PlayerFactory, "unuseable_players", self.unuseable
+        ), mock.patch.object(
+            PlayerFactory, "get_name_owner", side_effect=owners.get
+        ), mock.patch.object(
+            PlayerFactory, "_probe_player", side_effect=PlayerCreationError
+        ) as probe:
+            validate = PlayerFactory._validate_player
+            self.assertFalse(validate("org.mpris.MediaPlayer2.vlc", "vlc"))
+            self.assertFalse(validate("org.mpris.MediaPlayer2.vlc", "vlc"))
+            self.assertEqual(probe.call_count, 1)
+            # A restarted player has a new owner
+            owners["org.mpris.MediaPlayer2.vlc"] = ":1.9"
+            self.assertFalse(validate("org.mpris.MediaPlayer2.vlc", "vlc"))
+            self.assertEqual(probe.call_count, 2)
+
+
+class TestPlayerSimulated(unittest.TestCase):
+    def setUp(self):
+        self.time = FakeClock()
+        self.slept = []
+        backend = mock.patch.object(PlayerFactory, "backend", "simulated")
+        backend.start()
+        self.addCleanup(backend.stop)
+        self.media_player = Player_simulated.add_service(
+            "sim",
+            latency=constant_latency(0.002),
+            clock=self.time,
+            sleep=self.slept.append,
+        )
+        self.addCleanup(Player_simulated.services.clear)
+        self.player = PlayerFactory.get_player("org.mpris.MediaPlayer2.sim", "sim")
+
+    def test_metadata_values(self):
+        self.assertEqual(
+            self.player.metadata_values("mpris:trackid", "xesam:asText"),
+            {"mpris:trackid": "/org/mpris/MediaPlayer2/Track/1"},
+        )
+
+    def test_invalid_trackid_falls_back_to_seek_for_the_player_only(self):
+        self.media_player.trackid = ""
+        self.player.set_position(60_000_000)
+        self.assertEqual(self.player.position, 60_000_000)
+        calls = self.media_player.calls
+        # The trackid is not read again until set_position_recheck has passed
+        self.player.set_position(30_000_000)
+        # GetAll and Seek
+        self.assertEqual(self.media_player.calls - calls, 2)
+        self.assertEqual(self.player.position, 30_000_000)
+        other_player = PlayerFactory.get_player("org.mpris.MediaPlayer2.sim", "sim")
+        self.media_player.trackid = "/org/mpris/MediaPlayer2/Track/1"
+        with mock.patch.object(self.media_player, "Seek") as seek:
+            other_player.set_position(10_000_000)
+            seek.assert_not_called()
+        self.assertEqual(other_player.position, 10_000_000)
+
+    def test_set_position_is_used_again_once_the_track_is_valid(self):
+        recheck = mock.patch.object(Player, "set_position_recheck", 0)
+        recheck.start()
+        self.addCleanup(recheck.stop)
+        self.media_player.trackid = ""
+        self.player.set_position(60_000_000)
+        self.media_player.trackid = "/org/mpris/MediaPlayer2/Track/1"
+        with mock.patch.object(self.media_player, "Seek") as seek:
+            self.player.set_position(10_000_000)
+            seek.assert_not_called()
+        self.assertEqual(self.player.position, 10_000_000)
+        self.assertTrue(self.player.player._set_position_supported)
+
+    def test_rejected_set_position_falls_back_to_seek(self):
+        with mock.patch.object(
+            self.media_player,
+            "SetPosition",
+            side_effect=SimulatedDBusError(
+                "org.freedesktop.DBus.Error.NotSupported", "SetPosition"
+            ),
+        ) as set_position:
+            self.player.set_position(60_000_000)
+            self.player.set_position(30_000_000)
+            set_position.assert_called_once()
+        self.assertEqual(self.player.position, 30_000_000)
+        self.assertFalse(self.player.player._set_position_supported)
+
+    def test_track_listeners_move_to_the_replacing_player(self):
+        proxy = PlayerProxy(None)
+        tracks = []
+        self.assertFalse(proxy.add_track_listener(tracks.append))
+        proxy.set_player(Player_simulated("org.mpris.MediaPlayer2.sim", "sim", True))
+        proxy.metadata
+        proxy.next()
+        self.assertEqual(
+            [track["mpris:trackid"] for track in tracks],
+            ["/org/mpris/MediaPlayer2/Track/2"],
+        )
+
+    def test_retrieve_position_is_not_extrapolated(self):
+        player = PlayerFactory.get_player(
+            "org.mpris.MediaPlayer2.sim", "sim", cached=True
+        )
+        self.assertEqual(player.position, 0)
+        # A move the player has not signalled yet
+        self.media_player._move_to(30_000_000)
+        self.assertEqual(player.position, 0)
+        self.assertEqual(player.retrieve_position(), 30_000_000)
+        self.assertEqual(player.position, 30_000_000)
+
+    def test_discovery(self):
+        self.assertEqual(
+            PlayerFactory.get_running_player_names(),
+            {"sim": "org.mpris.MediaPlayer2.sim"},
+        )
+
+    def test_discovery_resolves_the_owner_once(self):
+        with mock.patch.object(
+            Player_simulated,
+            "get_name_owner",
+            side_effect=Player_simulated.get_name_owner,
+        ) as get_name_owner:
+            self.assertTrue(
+                PlayerFactory._validate_player("org.mpris.MediaPlayer2.sim", "sim")
+            )
+        get_name_owner.assert_called_once_with("org.mpris.MediaPlayer2.sim")
+
+    def test_position_advances_while_playing(self):
+        self.player.play()
+        self.time.now += 2
+        self.assertEqual(self.player.position, 2_000_000)
+        self.player.seek(-5_000_000)
+        self.assertEqual(self.player.position, 0)
+        self.player.set_position(60_000_000)
+        self.assertEqual(self.player.position, 60_000_000)
+        self.assertAlmostEqual(self.media_player.ipc_time, 0.002 * len(self.slept))
+
+    def test_seek_past_the_end_moves_to_the_next_track(self):
+        self.player.seek(self.media_player.length + 1)
+        self.assertEqual(self.player.trackid, "/org/mpris/MediaPlayer2/Track/2")
+        self.assertEqual(self.player.position, 0)
+
+    def test_failures(self):
+        self.media_player.latency = constant_latency(5.0)
+        with self.assertRaises(PlayerTimeoutError):
+            self.player.pause()
+        self.assertIs(self.player.connection_state, CircuitState.CLOSED)
+        self.media_player.latency = constant_latency(0.0)
+        Player_simulated.remove_service("sim")
+        with self.assertRaises(PlayerDisconnectedError):
+            self.player.pause()
+
+    def test_reconnects_only_when_the_owner_changes(self):
+        owner = self.player.owner
+        self.media_player.failure_error = "org.freedesktop.DBus.Error.NoServer"
+        self.media_player.failure_rate = 1.0
+        with mock.patch.object(Player_simulated, "connect") as connect:
+            with self.assertRaises(PlayerDisconnectedError):
+                self.player.pause()
+            connect.assert_not_called()
+        self.player.reconnect_policy.record_success()
+        Player_simulated.remove_service("sim")
+        restarted_player = Player_simulated.add_service("sim", sleep=self.slept.append)
+        self.player.pause()
+        self.assertNotEqual(self.player.owner, owner)
+        # The reconnection introspects the restarted player before the Pause
+        self.assertEqual(restarted_player.calls, 2)
+
+
+class TestBackendSelector(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.selector = BackendSelector(Path(directory.name) / "backend.json")
+        backends = mock.patch.object(
+            BackendSelector,
+            "available_backends",
+            return_value={"pydbus": Player, "dbus-python": Player},
+        )
+        self.available_backends = backends.start()
+        self.addCleanup(backends.stop)
+        self.round_trips = {"pydbus": 0.002, "dbus-python": 0.001}
+        self.measured = []
+
+    def measure(self, backend, fq_player_name, short_player_name, timeouts):
+        backend_name = ("pydbus", "dbus-python")[len(self.measured) % 2]
+        self.measured.append(backend_name)
+        return self.round_trips[backend_name]
+
+    def test_selects_and_caches_the_faster_backend(self):
+        self.assertEqual(self.selector.select("fq", "vlc", self.measure), "dbus-python")
+        self.assertEqual(self.measured, ["pydbus", "dbus-python"])
+        self.round_trips = {"pydbus": 0.001, "dbus-python": 0.002}
+        self.assertEqual(self.selector.select("fq", "vlc", self.measure), "dbus-python")
+        self.assertEqual(len(self.measured), 2)
+        self.selector.forget()
+        self.assertEqual(self.selector.select("fq", "vlc", self.measure), "pydbus")
+
+    def test_failed_measurements(self):
+        def fail(backend, fq_player_name, short_player_name, timeouts):
+            raise PlayerCreationError("not running")
+
+        self.assertIsNone(self.selector.select("fq", "vlc", fail))
+        self.assertIsNone(self.selector.cached_choice())
+
+    def test_factory_measures_with_reads_and_the_players_timeouts(self):
+        calls = []
+
+        def simulated_backend(backend_name, latency):
+            class Backend(Player_simulated):
+                def _call(self, method, method_name, *args):
+                    calls.append((backend_name, method_name, self.timeouts))
+                    time.sleep(latency)
+                    return super()._call(method, method_name, *args)
+
+            return Backend
+
+        self.available_backends.return_value = {
+            "pydbus": simulated_backend("pydbus", 0.002),
+            "dbus-python": simulated_backend("dbus-python", 0.0),
+        }
+        for name, value in (
+            ("backend", "fastest"),
+            ("selected_backend", None),
+            ("backend_selector", self.selector),
+        ):
+            patcher = mock.patch.object(PlayerFactory, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        Player_simulated.add_service("vlc", sleep=lambda s: None)
+        self.addCleanup(Player_simulated.services.clear)
+        timeouts = CallTimeouts(Get=0.5)
+        player = PlayerFactory.get_player(
+            "org.mpris.MediaPlayer2.vlc", "vlc", timeouts=timeouts
+        )
+        self.assertEqual(PlayerFactory.selected_backend, "dbus-python")
+        self.assertIsInstance(
+            player.player, self.available_backends.return_value["dbus-python"]
+        )
+        self.assertEqual({call[1] for call in calls}, {"Introspect", "Get"})
+        self.assertTrue(all(call[2] is timeouts for call in calls))
+
+
+class TestCapabilityCache(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_path = Path(directory.name) / "players.json"
+        capability_cache = mock.patch.object(
+            Player, "capability_cache", CapabilityCache(self.cache_path)
+        )
+        capability_cache.start()
+        self.addCleanup(capability_cache.stop)
+        backend = mock.patch.object(PlayerFactory, "backend", "simulated")
+        backend.start()
+        self.addCleanup(backend.stop)
+        self.media_player = Player_simulated.add_service("vlc", sleep=lambda s: None)
+        self.addCleanup(Player_simulated.services.clear)
+
+    def connect(self):
+        return PlayerFactory.get_player("org.mpris.MediaPlayer2.vlc", "vlc")
+
+    def test_known_players_take_no_capability_round_trips(self):
+        player = self.connect()
+        self.assertTrue(player.can_seek)
+        Player.capability_cache.revalidate(player)
+        Player.capability_cache._executor.shutdown(wait=True)
+        Player.capability_cache = CapabilityCache(self.cache_path)
+        self.assertEqual(
+            Player.capability_cache.identity("vlc"),
+            {"Identity": "Simulated vlc", "DesktopEntry": "vlc"},
+        )
+        player = self.connect()
+        calls = self.media_player.calls
+        with mock.patch.object(CapabilityCache, "revalidate") as revalidate:
+            self.assertTrue(player.can_control and player.can_seek)
+        self.assertEqual(self.media_player.calls, calls)
+        revalidate.assert_called()
+
+    def test_changed_capabilities_are_revalidated(self):
+        Player.capability_cache.store(
+            "vlc", {"DesktopEntry": "vlc"}, {"CanControl": True, "CanSeek": False}
+        )
+        player = self.connect()
+        self.assertFalse(player.can_seek)
+        Player.capability_cache._executor.shutdown(wait=True)
+        self.assertTrue(player.can_seek)
+        self.assertTrue(Player.capability_cache.capabilities("vlc")["CanSeek"])
+
+    def test_useability_is_answered_from_the_cache(self):
+        Player.capability_cache.store(
+            "vlc", {"DesktopEntry": "vlc"}, {"CanControl": True, "CanSeek": True}
+        )
+        player = self.connect()
+        properties = self.media_player.properties
+
+        def live_stream_properties(interface_name):
+            return dict(properties(interface_name), CanSeek=False)
+
+        with mock.patch.object(self.media_player, "properties", live_stream_properties):
+            calls = self.media_player.calls
+            with mock.patch.object(CapabilityCache, "revalidate"):
+                self.assertTrue(helpers.is_player_useable(player))
+            self.assertEqual(self.media_player.calls, calls)
+            # The revalidation contradicts the entry, it is removed from the file
+            media_player = player._player
+            Player.capability_cache.revalidate(
+                media_player, media_player._capabilities_changed
+            ).result()
+            self.assertFalse(helpers.is_player_useable(player))
+        self.assertIsNone(CapabilityCache(self.cache_path).capabilities("vlc"))
+        self.assertFalse(Player.capability_cache.capabilities("vlc")["CanSeek"])
+
+
+class TestSeekCalibration(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_path = Path(directory.name) / "calibration.json"
+        seek_calibration = mock.patch.object(
+            Player,
+            "seek_calibration",
+            SeekCalibration(self.cache_path, probes=4, sleep=lambda s: None),
+        )
+        seek_calibration.start()
+        self.addCleanup(seek_calibration.stop)
+        backend = mock.patch.object(PlayerFactory, "backend", "simulated")
+        backend.start()
+        self.addCleanup(backend.stop)
+        self.time = FakeClock()
+        self.media_player = Player_simulated.add_service(
+            "sim", landing_error=-1_500_000, clock=self.time, sleep=lambda s: None
+        )
+        self.addCleanup(Player_simulated.services.clear)
+        self.player = PlayerFactory.get_player("org.mpris.MediaPlayer2.sim", "sim")
+
+    def test_calibration_corrects_the_landing_error(self):
+        self.player.set_position(60_000_000)
+        self.assertEqual(self.player.position, 58_500_000)
+        self.player.play()
+        profile = Player.seek_calibration.calibrate(self.player)
+        self.assertEqual(profile.set_position_offset, -1_500_000)
+        self.assertEqual(profile.seek_offset, -1_500_000)
+        self.assertEqual(self.player.playback_status, "Playing")
+        self.player.pause()
+        self.player.set_position(60_000_000)
+        self.assertEqual(self.player.position, 60_000_000)
+        self.player.seek(10_000_000)
+        self.assertEqual(self.player.position, 70_000_000)
+        stored = SeekCalibration(self.cache_path).profile("sim")
+        self.assertEqual(stored.set_position_offset, -1_500_000)
+
+    def test_seek_fallback_while_playing(self):
+        self.media_player.landing_error = 0
+        self.media_player.trackid = "not an object path"
+        self.player.play()
+        self.player.set_position(60_000_000)
+        self.time.now += 1
+        self.assertAlmostEqual(self.player.position, 61_000_000, delta=10_000)
+
+
+class TestPlayerWatchdog(unittest.TestCase):
+    def setUp(self):
+        backend = mock.patch.object(PlayerFactory, "backend", "simulated")
+        backend.start()
+        self.addCleanup(backend.stop)
+        Player_simulated.add_service("vlc", sleep=lambda s: None)
+        self.addCleanup(Player_simulated.services.clear)
+        self.player = PlayerFactory.get_player("org.mpris.MediaPlayer2.vlc", "vlc")
+        self.watchdog = PlayerWatchdog(self.player, sleep=lambda s: None)
+        self.assertTrue(self.watchdog.start())
+        self.addCleanup(self.watchdog.stop)
+
+    def test_restarted_player_is_reconnected_before_the_next_command(self):
+        Player_simulated.remove_service("vlc")
+        self.assertIs(self.player.connection_state, CircuitState.OPEN)
+        restarted_player = Player_simulated.add_service("vlc", sleep=lambda s: None)
+        self.watchdog.wait_for_reconnection()
+        self.assertIs(self.player.connection_state, CircuitState.CLOSED)
+        calls = restarted_player.calls
+        self.player.pause()
+        self.assertEqual(restarted_player.calls, calls + 1)
+
+    def test_another_instance_replaces_a_player_that_quit(self):
+        Player_simulated.add_service("mpv", sleep=lambda s: None)
+        self.watchdog.wait_for_reconnection()
+        self.assertEqual(self.player.ext_name, "vlc")
+        Player_simulated.remove_service("vlc")
+        Player_simulated.add_service("vlc.instance_2", sleep=lambda s: None)
+        self.watchdog.wait_for_reconnection()
+        self.assertEqual(self.player.ext_name, "vlc.instance_2")
+        self.assertIs(self.player.connection_state, CircuitState.CLOSED)
@@ -0,0 +1,91 @@
+import asyncio
+import time
+import unittest
+from chapters.mpris_player import CallTimeouts, PlayerFactory, PlayerTimeoutError
+from chapters.mpris_player import PlayerDisconnectedError, CircuitState
+from chapters.mpris_player.testing import MockMprisSession
+
+"""Tests of the player layer against fake MPRIS players on a private session bus"""
+
+
+@unittest.skipUnless(MockMprisSession.available(), "needs dbus-daemon and dbus-next")
+class TestBackendsWithMockPlayers(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.session = MockMprisSession()
+        cls.session.start()
+        cls.session.add_player("vlc", latency=0.005)
+        cls.session.add_player("spotify", trackid="invalid")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.session.stop()
+
+    def setUp(self):
+        try:
+            PlayerFactory.get_bus_manager().get_bus()
+        except Exception as e:
+            self.skipTest(f"no synchronous player backend: {e}")
+
+    def test_discovery(self):
+        self.assertEqual(
+            PlayerFactory.get_running_player_names(),
+            {
+                "spotify": "org.mpris.MediaPlayer2.spotify",
+                "vlc": "org.mpris.MediaPlayer2.vlc",
+            },
+        )
+
+    def test_set_position(self):
+        for name in ("vlc", "spotify"):
+            player = PlayerFactory.get_player(f"org.mpris.MediaPlayer2.{name}", name)
+            player.set_position(60_000_000)
+            self.assertAlmostEqual(player.position, 60_000_000, delta=1_000_000)
+
+    def test_crash_and_restart(self):
+        mock_player = self.session.add_player("mpv")
+        # The other tests expect the players added in setUpClass only
+        self.addCleanup(self.session.remove_player, "mpv")
+        player = PlayerFactory.get_player(mock_player.fq_name, "mpv")
+        mock_player.crash()
+        with self.assertRaises(PlayerDisconnectedError):
+            player.play()
+        self.assertIs(player.connection_state, CircuitState.OPEN)
+        mock_player.restart()
+        time.sleep(player.reconnect_policy.retry_in)
+        player.play()
+        self.assertIs(player.connection_state, CircuitState.CLOSED)
+
+    def test_hung_player_times_out(self):
+        mock_player = self.session.add_player("hung")
+        self.addCleanup(self.session.remove_player, "hung")
+        player = PlayerFactory.get_player(
+            mock_player.fq_name, "hung", timeouts=CallTimeouts(Pause=0.2)
+        )
+        mock_player.hang()
+        try:
+            start = time.perf_counter()
+            with self.assertRaises(PlayerTimeoutError):
+                player.pause()
+            self.assertLess(time.perf_counter() - start, 1.0)
+        finally:
+            mock_player.resume()
+
+
+@unittest.skipUnless(MockMprisSession.available(), "needs dbus-daemon and dbus-next")
+class TestAsyncBackendWithMockPlayers(unittest.TestCase):
+    def test_snapshot_and_seek(self):
+        with MockMprisSession() as session:
+            session.add_player("vlc")
+
+            async def seek():
+                player = await PlayerFactory.get_async_player(
+                    "org.mpris.MediaPlayer2.vlc", "vlc"
+                )
+                await player.seek(5_000_000)
+                return await player.snapshot()
+
+            state = asyncio.run(seek())
+        self.assertEqual(state.playback_status, "Paused")
+        self.assertEqual(state.position, 5_000_000)
+        self.assertEqual(state.trackid, "/org/mpris/MediaPlayer2/Track/1")
@@ -8,7 +8,7 @@ from chapters.mpris_player import (
     NoValidMprisPlayersError,
     PlayerCreationError,
 )
-from chapters.mpris_player import Player, PlayerFactory
+from chapters.mpris_player import Player, PlayerFactory, PlayerRegistry
 from chapters import helpers
 from chapters.logger_config import logger
 
@@ -58,8 +58,14 @@ class ChaptersMenuConsoleBuilder:
 
         self.build_reload_chapters_item()
         self.build_player_control_menu()
+        self.build_latency_statistics_item()
         self.build_chapters_menu()
 
+    def build_latency_statistics_item(self) -> None:
+        self.chapters_menu_console.append_main_menu_item(
+            FunctionItem("Show Latency Statistics", show_latency_statistics)
+        )
+
     def build_reload_chapters_item(self) -> None:
         self.chapters_menu_console.append_main_menu_item(
             FunctionItem(
@@ -119,9 +125,26 @@ class ChaptersMenuConsoleBuilder:
                 [helpers.to_microsecs("00:01:00") * -1],
             )
         )
+        command_menu.append_item(
+            FunctionItem("Calibrate Seeking", calibrate_player, [self._player])
+        )
         self.chapters_menu_console.append_main_menu_item(command_submenu_item)
 
 
+def show_latency_statistics() -> None:
+    """Prints the latencies of the calls made to the players"""
+    print(Player.latency_recorder.report())
+    input("\nPress [Enter] to continue")
+
+
+def calibrate_player(player: Player) -> None:
+    """Measures and stores the seek correction profile of the player"""
+    print(f"Calibrating {player.ext_name}, playback resumes when done")
+    profile = Player.seek_calibration.calibrate(player)
+    print(profile.summary())
+    input("\nPress [Enter] to continue")
+
+
 def user_try_another_player() -> bool:
     """Interactive prompt informing the user that their existing player
     selection is not valid and requesting the user to choose a different player"""
@@ -208,7 +231,8 @@ def build_console_menu(
     """Orchestrates the building of the console menu by using the capabilities of the
     ChaptersMenuConsoleBuilder. This is the Director in the Builder Pattern"""
     player: Player = None
-    running_players = PlayerFactory.get_running_player_names()
+    # The console menu connects once, a single (non-live) registry read suffices
+    running_players = PlayerRegistry().player_names()
     if len(running_players) == 0:
         raise PlayerCreationError("No mpris enabled players are running.")
     if len(running_players) == 1:
@@ -227,5 +251,6 @@ def build_console_menu(
         console_builder.build_reload_chapters_item()
     if player_controls_option:
         console_builder.build_player_control_menu()
+        console_builder.build_latency_statistics_item()
     console_builder.build_chapters_menu()
     return console_builder.chapters_menu_console
@@ -316,6 +316,15 @@ class AppMenuBar(tk.Menu):
             label="Connect ...", command=connect_player_command, underline=0
         )
 
+    def bind_connect_to_all_players_command(
+        self, connect_all_players_command: callable
+    ):
+        self._connection_menu.add_command(
+            label="Connect To All Players",
+            command=connect_all_players_command,
+            underline=11,
+        )
+
     def bind_disconnect_player_command(self, disconnect_player_command: callable):
         self._connection_menu.add_command(
             label="Disconnect", command=disconnect_player_command, underline=0
@@ -337,6 +346,22 @@ class AppMenuBar(tk.Menu):
             underline=0,
         )
 
+    def bind_show_latency_statistics_command(
+        self, show_latency_statistics_command: callable
+    ):
+        self._connection_menu.add_command(
+            label="Latency Statistics",
+            command=show_latency_statistics_command,
+            underline=0,
+        )
+
+    def bind_calibrate_player_command(self, calibrate_player_command: callable):
+        self._connection_menu.add_command(
+            label="Calibrate Seeking",
+            command=calibrate_player_command,
+            underline=1,
+        )
+
 
 class AppMainWindow(ttk.tk.Tk):
     """The main window for the application. In addation, this class implements a view
@@ -515,6 +540,17 @@ class AppMainWindow(ttk.tk.Tk):
     ):
         self.bind("<n>", connect_next_player_command)
 
+    def bind_connect_to_previous_player_command(
+        self, connect_previous_player_command: callable
+    ):
+        self.bind("<b>", connect_previous_player_command)
+
+    def bind_connect_to_all_players_command(
+        self, connect_all_players_command: callable
+    ):
+        self._menu_bar.bind_connect_to_all_players_command(connect_all_players_command)
+        self.bind("<g>", connect_all_players_command)
+
     def bind_disconnect_player_command(self, disconnect_player_command: callable):
         self._menu_bar.bind_disconnect_player_command(disconnect_player_command)
         self.bind("<d>", disconnect_player_command)
@@ -527,6 +563,16 @@ class AppMainWindow(ttk.tk.Tk):
         )
         self.bind("<Control-j>", jump_to_position_player_command)
 
+    def bind_show_latency_statistics_command(
+        self, show_latency_statistics_command: callable
+    ):
+        self._menu_bar.bind_show_latency_statistics_command(
+            show_latency_statistics_command
+        )
+
+    def bind_calibrate_player_command(self, calibrate_player_command: callable):
+        self._menu_bar.bind_calibrate_player_command(calibrate_player_command)
+
     def bind_raise_player_window_command(self, raise_player_window_command: callable):
         self._menu_bar.bind_raise_player_window_command(raise_player_window_command)
         self.bind("<f>", raise_player_window_command)
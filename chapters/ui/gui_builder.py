@@ -68,6 +68,12 @@ class AppGuiBuilder:
         self._view.bind_connect_to_next_player_command(
             self._gui_controller.handle_next_connection_command
         )
+        self._view.bind_connect_to_previous_player_command(
+            self._gui_controller.handle_previous_connection_command
+        )
+        self._view.bind_connect_to_all_players_command(
+            self._gui_controller.handle_group_connection_command
+        )
         self._view.bind_disconnect_player_command(
             self._gui_controller.handle_disconnection_command
         )
@@ -78,6 +84,12 @@ class AppGuiBuilder:
         self._view.bind_raise_player_window_command(
             self._gui_controller.handle_raise_player_window_command
         )
+        self._view.bind_show_latency_statistics_command(
+            self._gui_controller.handle_show_latency_statistics_command
+        )
+        self._view.bind_calibrate_player_command(
+            self._gui_controller.handle_calibrate_player_command
+        )
 
         self._view.bind_show_overview_help_command(
             self._gui_controller.handle_show_overview_help_command
@@ -1,8 +1,13 @@
+import html
 from typing import List, Dict, Protocol, TextIO, Tuple
 from chapters import helpers
+from chapters.chapter_index import ChapterIndex
 from chapters.mpris_player import Player
 from chapters.mpris_player import PlayerFactory, PlayerCreationError
-from chapters.mpris_player import PlayerProxy
+from chapters.mpris_player import PlayerProxy, PlayerRegistry, CommandDispatcher
+from chapters.mpris_player import CircuitState, PlayerDisconnectedError
+from chapters.mpris_player import PlayerTimeoutError
+from chapters.mpris_player import GroupCommandReport, PlayerGroup, PlayerWatchdog
 from chapters.chapters_help import (
     keyboard_shortcuts_help,
     overview_help,
@@ -13,6 +18,7 @@ from chapters.chapters_help import (
 )
 from chapters.logger_config import logger
 import threading
+from concurrent.futures import Future
 
 
 def ignore_inst_method_args(func):
@@ -75,6 +81,24 @@ class GuiAppInterface(Protocol):
 
     def bind_connect_to_player_command(self, connect_player_command: callable): ...
 
+    def bind_connect_to_next_player_command(
+        self, connect_next_player_command: callable
+    ): ...
+
+    def bind_connect_to_previous_player_command(
+        self, connect_previous_player_command: callable
+    ): ...
+
+    def bind_connect_to_all_players_command(
+        self, connect_all_players_command: callable
+    ): ...
+
+    def bind_show_latency_statistics_command(
+        self, show_latency_statistics_command: callable
+    ): ...
+
+    def bind_calibrate_player_command(self, calibrate_player_command: callable): ...
+
     def select_recent_chapters(self, recent_chapters: List[str]) -> str: ...
 
     def select_new_player(self) -> Player: ...
@@ -91,6 +115,8 @@ class GuiAppInterface(Protocol):
 
     def show_error_message(self, message: str) -> None: ...
 
+    def after(self, ms: int, func: callable, *args): ...
+
     def show_info_message(self, message: str) -> None: ...
 
     def show_help(self, content: str, view_dimensions: str) -> None: ...
@@ -100,13 +126,26 @@ class GuiAppInterface(Protocol):
     def exit_application(self): ...
 
 
+def player_timeout_message(player: Player) -> str:
+    return (
+        f"{player.ext_name} did not respond in time.\n"
+        "The player may be busy or hung, the command was abandoned."
+    )
+
+
 def handle_player_error(func: callable):
     def decorator(self, *args, **kwargs):
         try:
             func(self, *args, **kwargs)
+        except PlayerDisconnectedError as e:
+            # The player control panel already shows the player as disconnected
+            logger().info(e)
+        except PlayerTimeoutError as e:
+            logger().warning(e)
+            self._view.show_error_message(player_timeout_message(self._cur_player))
         except Exception as e:
             logger().error("An error occured when attempting to call the player")
-            logger().error(type(e))
+            logger().error(f"{type(e).__name__}: {e}")
             self._view.show_error_message(
                 "An error occurred in the currently connected player.\n"
                 "Kindly try reconnecting or disconnecting to avoid this error message"
@@ -116,6 +155,13 @@ def handle_player_error(func: callable):
 
 
 class GuiController:
+    # The first seek is sent immediately, the seeks that follow it within this
+    # many seconds, e.g. from a held down skip key, are sent as a single seek
+    seek_coalescing_window = 0.15
+    # How often, in milliseconds, the view's event loop checks whether the
+    # players discovered at startup are known
+    startup_poll_interval = 20
+
     def __init__(
         self,
         view: GuiAppInterface,
@@ -123,15 +169,68 @@ class GuiController:
     ):
         self._view: GuiAppInterface = view
         self._gui_builder: AppGuiBuilderInterface = app_gui_builder
-        player = self._get_sole_running_player()
+        self._command_dispatcher = CommandDispatcher(
+            on_error=self._handle_player_command_error
+        )
+        self._player_registry = PlayerRegistry()
+        self._player_watchdog: PlayerWatchdog = None
+        self._chapter_index = ChapterIndex()
+        self._cur_player: PlayerProxy = None
+        self.cur_player = PlayerProxy(None)
+        self._initialise_chapters_content()
+        # Discovering the players can take seconds, the window is shown straight
+        # away and the sole running player is attached when discovery finishes
+        self._view.set_player_instance_name("connecting...")
+        # The startup connection thread does not call into the view, the view
+        # may not run its event loop yet. It hands the player over in
+        # _startup_player, which the event loop polls.
+        self._startup_player: Future = Future()
+        self._startup_player_attached = threading.Event()
+        threading.Thread(
+            target=self._connect_sole_running_player,
+            name="player-startup",
+            daemon=True,
+        ).start()
+        self._view.after(self.startup_poll_interval, self._poll_startup_player)
+
+    def _connect_sole_running_player(self):
+        # Runs on the startup connection thread
+        try:
+            self._player_registry.start()
+            self._startup_player.set_result(self._get_sole_running_player())
+        except Exception as e:
+            self._startup_player.set_exception(e)
+
+    def _poll_startup_player(self):
+        if not self._startup_player.done():
+            self._view.after(self.startup_poll_interval, self._poll_startup_player)
+            return
+        try:
+            self._attach_startup_player(self._startup_player.result())
+        except Exception as e:
+            logger().error(f"Unable to connect to the running player: {e}")
+            self._view.set_player_instance_name(None)
+        finally:
+            self._startup_player_attached.set()
+
+    def _attach_startup_player(self, player: Player | None):
+        if self._cur_player.player is not None:
+            # A player was connected to while the players were being discovered
+            return
         if player:
             self.cur_player = player
         else:
-            self.cur_player = PlayerProxy(None)
-        self._initialise_chapters_content()
+            self._view.set_player_instance_name(None)
+
+    def wait_for_startup_connection(self, timeout: float = None) -> bool:
+        """Blocks until the player discovered at startup has been attached by
+        the view's event loop. Called from the event loop's thread, timeout has
+        to be given and the event loop run between calls.
+        returns: False if the player was not attached within timeout seconds."""
+        return self._startup_player_attached.wait(timeout)
 
     def _get_sole_running_player(self) -> Player:
-        running_players = PlayerFactory.get_running_player_names()
+        running_players = self._player_registry.player_names()
         player: Player = None
         if len(running_players) == 1:
             player_names = list(running_players.keys())
@@ -140,7 +239,7 @@ class GuiController:
             logger().debug("Creating player")
             try:
                 player = PlayerFactory.get_player(
-                    selected_player_fq_name, selected_player_name
+                    selected_player_fq_name, selected_player_name, cached=True
                 )
             except PlayerCreationError as e:
                 logger().error(e)
@@ -163,8 +262,151 @@ class GuiController:
 
     @cur_player.setter
     def cur_player(self, player: Player):
+        player.set_dispatcher(self._command_dispatcher)
+        player.set_seek_coalescing_window(self.seek_coalescing_window)
+        player.reconnect_policy.add_listener(
+            lambda state: self._player_connection_state_changed(player, state)
+        )
+        self._close_player_group()
         self._cur_player = player
         self._view.set_player_instance_name(player.ext_name)
+        self._watch_player(player)
+        self._follow_player_tracks(player)
+
+    def _close_player_group(self):
+        # A group being replaced is not used again, its threads are stopped
+        if self._cur_player is not None and isinstance(
+            self._cur_player.player, PlayerGroup
+        ):
+            self._cur_player.player.close()
+
+    def _watch_player(self, player: PlayerProxy):
+        # The label shows the player as disconnected as soon as it quits and the
+        # player is reconnected in the background when it is restarted
+        if self._player_watchdog is not None:
+            self._player_watchdog.stop()
+            self._player_watchdog = None
+        if player.player is None or isinstance(player.player, PlayerGroup):
+            return
+        self._player_watchdog = PlayerWatchdog(player)
+        self._player_watchdog.start()
+
+    def _follow_player_tracks(self, player: PlayerProxy):
+        # The chapters of the tracks the player plays are loaded automatically,
+        # when they are in the chapter index
+        if player.player is None:
+            return
+        # The proxy keeps the listener when the watchdog replaces its player
+        player.add_track_listener(
+            lambda metadata: self._player_track_changed(player, metadata)
+        )
+        threading.Thread(
+            target=self._load_current_track_chapters, args=(player,), daemon=True
+        ).start()
+
+    def _load_current_track_chapters(self, player: PlayerProxy):
+        try:
+            metadata = player.metadata_values(*ChapterIndex.METADATA_KEYS)
+        except Exception as e:
+            logger().debug(f"Unable to read the track of {player.ext_name}: {e}")
+            return
+        self._load_track_chapters(player, metadata)
+
+    def _player_track_changed(self, player: PlayerProxy, metadata: Dict):
+        # Called from the thread that delivers the player's signals, the index
+        # lookup and the chapters file are left to a thread of their own
+        if player is not self._cur_player:
+            return
+        threading.Thread(
+            target=self._load_track_chapters,
+            args=(player, metadata),
+            daemon=True,
+        ).start()
+
+    def _load_track_chapters(self, player: PlayerProxy, metadata: Dict):
+        chapters_file = self._chapter_index.lookup(metadata)
+        if not chapters_file or chapters_file == self._chapters_filename:
+            return
+        try:
+            chapters_title, chapters = helpers.load_chapters_file(chapters_file)
+        except (FileNotFoundError, ValueError) as e:
+            logger().error(e)
+            return
+        self._view.after(
+            0,
+            self._show_track_chapters,
+            player,
+            chapters_file,
+            chapters_title,
+            chapters,
+        )
+
+    def _show_track_chapters(
+        self,
+        player: PlayerProxy,
+        chapters_file: str,
+        chapters_title: str,
+        chapters: Dict[str, str],
+    ):
+        if player is not self._cur_player:
+            return
+        logger().info(f"Loaded {chapters_file} for the track {player.ext_name} plays")
+        self._chapters_filename = chapters_file
+        self._chapters_title = chapters_title
+        self._chapters = chapters
+        self._chapters_cache[chapters_title] = chapters
+        self._gui_builder.create_chapters_panel_bindings(chapters_title, chapters)
+
+    def _index_current_track(self, chapters_filename: str):
+        # The chapters loaded or saved while a track plays are loaded automatically
+        # when the track is played again
+        if self._cur_player.player is None:
+            return
+        try:
+            metadata = self._cur_player.metadata_values(*ChapterIndex.METADATA_KEYS)
+        except Exception as e:
+            logger().debug(f"Unable to read the track of {self._cur_player.ext_name}")
+            logger().debug(e)
+            return
+        self._chapter_index.add(metadata, chapters_filename)
+
+    def _player_connection_state_changed(self, player: Player, state: CircuitState):
+        # May be called from the command dispatcher's worker thread
+        if player is not self._cur_player:
+            return
+        instance_name = player.ext_name
+        if state is CircuitState.OPEN:
+            instance_name = f"{instance_name} (disconnected)"
+        self._view.after(0, self._view.set_player_instance_name, instance_name)
+
+    def _player_group_command_reported(
+        self, player: Player, report: GroupCommandReport
+    ):
+        # Called from the command dispatcher's worker thread
+        logger().info(report)
+        if player is not self._cur_player:
+            return
+        instance_name = f"{player.ext_name} (spread {report.spread // 1000} ms)"
+        self._view.after(0, self._view.set_player_instance_name, instance_name)
+
+    def _handle_player_command_error(self, command_name: str, error: Exception):
+        # Called from the command dispatcher's worker thread
+        if isinstance(error, PlayerDisconnectedError):
+            return
+        if isinstance(error, PlayerTimeoutError):
+            logger().warning(error)
+            self._view.after(
+                0,
+                self._view.show_error_message,
+                player_timeout_message(self._cur_player),
+            )
+            return
+        self._view.after(
+            0,
+            self._view.show_error_message,
+            "An error occurred in the currently connected player.\n"
+            "Kindly try reconnecting or disconnecting to avoid this error message",
+        )
 
     def set_chapters_filename(self, filename: str):
         self._chapters_filename = filename
@@ -207,20 +449,18 @@ class GuiController:
         self._cur_player.raise_window()
 
     def handle_disconnection_command(self, event=None):
-        self._cur_player = PlayerProxy(None)
-        self._view.set_player_instance_name(None)
+        self.cur_player = PlayerProxy(None)
 
     def handle_connection_command(self, event=None):
-        running_player_names = PlayerFactory.get_running_player_names()
+        running_player_names = self._player_registry.player_names()
         new_player_name = self._view.select_new_player(
             list(running_player_names.keys())
         )
         if new_player_name:
             try:
-                self._cur_player = PlayerFactory.get_player(
-                    running_player_names[new_player_name], new_player_name
+                self.cur_player = PlayerFactory.get_player(
+                    running_player_names[new_player_name], new_player_name, cached=True
                 )
-                self._view.set_player_instance_name(new_player_name)
             except PlayerCreationError as e:
                 logger().error(e)
 
@@ -239,29 +479,85 @@ class GuiController:
         :type event: None or tk.Event
         :raises: PlayerCreationError if the player cannot be created.
         """
-        cur_player_name = self._cur_player.ext_name
-        running_player_names = PlayerFactory.get_running_player_names()
-        if not running_player_names:
+        self._connect_to_neighbour_player(self._player_registry.next_player_name)
+
+    def handle_previous_connection_command(self, event=None):
+        """
+        Connect to the previous MPRIS enabled media player in the list of running
+        players. If the current player is the first one in the list, it will
+        wrap around to the last player in the list.
+
+        :param event: GUI event, ignored.
+        :type event: None or tk.Event
+        """
+        self._connect_to_neighbour_player(self._player_registry.previous_player_name)
+
+    def _connect_to_neighbour_player(self, neighbour_player_name: callable):
+        if not self._player_registry.live:
+            self._player_registry.refresh()
+        new_player_name = neighbour_player_name(self._cur_player.ext_name)
+        if new_player_name is None:
             return
-        running_player_names_list = list(running_player_names.keys())
-        next_player_name = None
-        for i, pn in enumerate(running_player_names_list):
-            if pn == cur_player_name:
-                next_player_name = running_player_names_list[
-                    (i + 1) % len(running_player_names_list)
-                ]
-                break
-        if next_player_name is None:
-            next_player_name = running_player_names_list[0]
         try:
-
-            self._cur_player = PlayerFactory.get_player(
-                running_player_names[next_player_name], next_player_name
+            self.cur_player = PlayerFactory.get_player(
+                self._player_registry.fq_player_name(new_player_name),
+                new_player_name,
+                cached=True,
             )
-            self._view.set_player_instance_name(next_player_name)
         except PlayerCreationError as e:
             logger().error(e)
 
+    def handle_group_connection_command(self, event=None):
+        """
+        Connect to all running MPRIS enabled media players as a group. Commands are
+        sent to every player in the group and the title shows how far apart, in
+        milliseconds, the players landed after the last seek or jump.
+
+        :param event: GUI event, ignored.
+        :type event: None or tk.Event
+        """
+        running_player_names = self._player_registry.player_names()
+        if not running_player_names:
+            return
+        try:
+            group = PlayerFactory.get_player_group(running_player_names, cached=True)
+        except PlayerCreationError as e:
+            logger().error(e)
+            return
+        player = PlayerProxy(group)
+        group.add_report_listener(
+            lambda report: self._player_group_command_reported(player, report)
+        )
+        self.cur_player = player
+
+    def handle_show_latency_statistics_command(self, event=None):
+        report = html.escape(Player.latency_recorder.report())
+        self._view.show_help(
+            content=f"<h4>Player call latencies</h4><pre>{report}</pre>",
+            view_dimensions="760x400",
+        )
+
+    def handle_calibrate_player_command(self, event=None):
+        player = self._cur_player.player
+        if player is None or isinstance(player, PlayerGroup):
+            self._view.show_info_message("Connect to a single player to calibrate it.")
+            return
+        self._view.show_info_message(
+            f"{player.ext_name} will be paused and sent a series of probe seeks."
+            " Playback resumes when the calibration is done."
+        )
+        # The probes are sent to the player itself, not through the dispatcher
+        self._command_dispatcher.submit("calibrate", self._calibrate_player, player)
+
+    def _calibrate_player(self, player: Player):
+        # Called from the command dispatcher's worker thread
+        profile = Player.seek_calibration.calibrate(player)
+        self._view.after(
+            0,
+            self._view.show_info_message,
+            f"{player.ext_name} calibrated:\n{profile.summary()}",
+        )
+
     def handle_raise_player_window_command(self, event=None):
         self.raise_player_window()
 
@@ -292,6 +588,7 @@ class GuiController:
             return
         self._chapters_filename = chapters_file.name
         helpers.save_chapters_file(chapters_file, self._chapters_title, self._chapters)
+        self._index_current_track(self._chapters_filename)
 
     def handle_load_chapters_file_command(self, event=None):
         chapters_file = self._view.request_chapters_file()
@@ -302,6 +599,7 @@ class GuiController:
         self._gui_builder.create_chapters_panel_bindings(
             self._chapters_title, self._chapters
         )
+        self._index_current_track(self._chapters_filename)
 
     def _load_chapters_from_youtube(self, gui_prompt: bool):
         video_name = helpers.get_url_from_clipboard()
@@ -549,4 +847,9 @@ class GuiController:
         )
 
     def handle_exit_application_command(self, event=None):
+        if self._player_watchdog is not None:
+            self._player_watchdog.stop()
+        self._player_registry.stop()
+        self._command_dispatcher.stop()
+        self._close_player_group()
         self._view.exit_application()